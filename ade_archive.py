@@ -0,0 +1,190 @@
+"""
+Archive locale des semaines capturées (HTML complet ou grille compacte), pour reparser sans navigateur.
+
+Chaque capture est stockée une seule fois, compressée (zstd si le module zstandard est installé, sinon gzip),
+sous le nom de l'empreinte SHA-256 de son contenu; un index JSONL garde (programme, semaine, date de capture).
+
+    archive/
+        index.jsonl                  # une ligne par capture
+        objects/ab/abcdef....zst     # contenu dédupliqué
+
+Utilisation: python ade_archive.py [--archive DIR] list | stats
+"""
+from ade_browser import CACHE_DIR
+from ade_weeks import monday_of_week
+from datetime import datetime
+import tempfile
+import hashlib
+import json
+import gzip
+import os
+
+ARCHIVE_DIR = os.path.join(CACHE_DIR, 'archive')
+INDEX_FILE = 'index.jsonl'
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def encode_content(week_content):
+    """
+    Octets canoniques d'une semaine capturée: HTML en UTF-8, grille en JSON trié et compact
+    """
+    if isinstance(week_content, str):
+        return 'html', week_content.encode('utf-8')
+    return 'grid', json.dumps(week_content, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def decode_content(kind, data):
+    text = data.decode('utf-8')
+    return text if kind == 'html' else json.loads(text)
+
+
+class WeekArchive:
+    def __init__(self, root=None):
+        self.root = root or os.environ.get('ADE_ARCHIVE_DIR') or ARCHIVE_DIR
+        self.index_file = os.path.join(self.root, INDEX_FILE)
+        # Numéros des semaines retournées par le dernier load_weeks (semaines absentes de l'archive exclues)
+        self.loaded_weeks = []
+
+    def _object_path(self, digest, codec):
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest}.{codec}")
+
+    def _find_object(self, digest):
+        for codec in ('zst', 'gz'):
+            path = self._object_path(digest, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None, None
+
+    def put(self, week_content, programme, week_number, captured_at=None):
+        """
+        Archive une semaine capturée; le contenu n'est écrit que s'il n'existe pas déjà. Retourne l'empreinte.
+        """
+        kind, data = encode_content(week_content)
+        digest = hashlib.sha256(data).hexdigest()
+
+        path, codec = self._find_object(digest)
+        if not path:
+            zstandard = _zstd()
+            codec = 'zst' if zstandard else 'gz'
+            compressed = (zstandard.ZstdCompressor(level=10).compress(data) if zstandard
+                          else gzip.compress(data, compresslevel=9, mtime=0))
+            path = self._object_path(digest, codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Fichier temporaire unique: navigateurs parallèles dans le même processus
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+
+        entry = {
+            'programme': programme,
+            'week': week_number,
+            'monday': monday_of_week(week_number).isoformat(),
+            'captured_at': (captured_at or datetime.now()).isoformat(timespec='seconds'),
+            'sha256': digest,
+            'kind': kind,
+            'size': len(data),
+        }
+        # Une ligne par écriture (ajout atomique), partagée par les navigateurs capturant en parallèle
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.index_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return digest
+
+    def get(self, digest, kind):
+        """
+        Contenu d'une capture (HTML ou grille)
+        """
+        path, codec = self._find_object(digest)
+        if not path:
+            raise KeyError(f"Capture {digest} absente de l'archive")
+        with open(path, 'rb') as f:
+            compressed = f.read()
+        if codec == 'zst':
+            zstandard = _zstd()
+            if not zstandard:
+                raise RuntimeError("Capture compressée en zstd: installer le module zstandard")
+            data = zstandard.ZstdDecompressor().decompress(compressed)
+        else:
+            data = gzip.decompress(compressed)
+        return decode_content(kind, data)
+
+    def entries(self, programme=None):
+        """
+        Captures de l'index, dans l'ordre de capture
+        """
+        if not os.path.exists(self.index_file):
+            return []
+        entries = []
+        with open(self.index_file, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if programme is None or entry['programme'] == programme:
+                    entries.append(entry)
+        return entries
+
+    def latest(self, programme, mondays=None):
+        """
+        Dernière capture de chaque semaine du programme (filtrée sur les lundis `mondays`), par date de semaine
+        """
+        latest = {}
+        for entry in self.entries(programme):
+            if mondays is None or entry['monday'] in mondays:
+                if entry['monday'] not in latest or entry['captured_at'] >= latest[entry['monday']]['captured_at']:
+                    latest[entry['monday']] = entry
+        return [latest[monday] for monday in sorted(latest)]
+
+    def load_weeks(self, programme, weeks=None):
+        """
+        Contenus des dernières captures du programme, dans l'ordre des semaines.
+        weeks: numéros de semaine ISO (voir ade_weeks.resolve_weeks), None pour toutes les semaines archivées.
+        """
+        mondays = None if weeks is None else {monday_of_week(week).isoformat() for week in weeks}
+        entries = self.latest(programme, mondays)
+        self.loaded_weeks = [entry['week'] for entry in entries]
+        print(f"Archive: {len(entries)} semaine(s) de '{programme}' ({self.root})")
+        return [self.get(entry['sha256'], entry['kind']) for entry in entries]
+
+    def stats(self):
+        entries = self.entries()
+        objects = {entry['sha256'] for entry in entries}
+        stored = 0
+        for digest in objects:
+            path, _ = self._find_object(digest)
+            if path:
+                stored += os.path.getsize(path)
+        raw = sum(entry['size'] for entry in entries)
+        return {'captures': len(entries), 'objects': len(objects), 'raw_bytes': raw, 'stored_bytes': stored}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Archive des semaines capturées")
+    parser.add_argument('--archive', help="Dossier de l'archive (défaut: ADE_ARCHIVE_DIR ou ~/.cache/edt-miage/archive)")
+    parser.add_argument('command', choices=['list', 'stats'])
+    args = parser.parse_args()
+
+    archive = WeekArchive(args.archive)
+    if args.command == 'list':
+        for entry in archive.entries():
+            print(f"{entry['captured_at']}  {entry['programme']:<20} semaine {entry['week']:>2} "
+                  f"({entry['monday']})  {entry['kind']:<4} {entry['sha256'][:12]}")
+    else:
+        stats = archive.stats()
+        ratio = stats['raw_bytes'] / stats['stored_bytes'] if stats['stored_bytes'] else 0
+        print(f"{stats['captures']} capture(s), {stats['objects']} contenu(s) distinct(s), "
+              f"{stats['raw_bytes'] / 1024:.0f} Ko → {stats['stored_bytes'] / 1024:.0f} Ko stockés (x{ratio:.1f})")
+
+
+if __name__ == "__main__":
+    main()
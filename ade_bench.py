@@ -0,0 +1,370 @@
+"""
+Benchmarks sur des pages ADE enregistrées (schedule.html, pages sauvegardées, archive des semaines...):
+    parsers: backends de parsing; vérifie que chaque backend produit exactement la même grille
+             que BeautifulSoup (donc les mêmes événements: grid_events ne dépend que de la grille)
+    ics:     écriture en flux (ade_ics) contre Calendar.to_ical() d'icalendar, fichiers identiques
+Et sur des semaines synthétiques (ade_synthetic):
+    suite:   débit, latence par cours et pic mémoire de chaque étape (extraction de la grille, calibration,
+             conversion en cours, écriture iCal), comparés à une référence enregistrée (bench_baseline.json);
+             code de sortie 1 si une étape régresse au-delà de la tolérance, 2 s'il n'y a pas de référence
+             pour ces paramètres et ce parseur. Les temps comparés sont le meilleur des temps rapportés à une
+             boucle d'étalonnage mesurée juste avant et juste après chaque passage: la référence reste valable
+             sur une machine plus lente ou plus rapide (runner, CI) et le bruit de mesure reste sous la tolérance
+
+Utilisation: python ade_bench.py parsers schedule.html [autres pages ou dossiers] [--repeat 5]
+             python ade_bench.py ics schedule.html [--copies 20]
+             python ade_bench.py suite [--weeks 20 --events 40 --days 6] [--backend lxml] [--save-baseline]
+"""
+from ade_grid import (PARSER_BACKENDS, GridLayout, available_backends, calibrate, extract_grid, grid_events,
+                      resolve_backend)
+from ade_ics import write_ics
+from ade_archive import WeekArchive, INDEX_FILE
+from ade_synthetic import weeks_html
+from contextlib import redirect_stdout
+from icalendar import Calendar
+import tracemalloc
+import math
+import argparse
+import tempfile
+import json
+import time
+import sys
+import io
+import os
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+CALIBRATION_ITERATIONS = 50000
+MIN_PASS_S = 0.05
+# Pic mémoire: écart absolu ignoré (allocations du ramasse-miettes et des caches, étapes de quelques Ko)
+MEMORY_SLACK_KB = 256
+
+
+def load_pages(paths):
+    """
+    Lit les pages HTML données (fichiers, dossiers contenant des .html ou archive ade_archive)
+    """
+    pages = []
+    for path in paths:
+        if os.path.exists(os.path.join(path, INDEX_FILE)):
+            # Archive des semaines capturées: chaque page HTML distincte une fois
+            archive = WeekArchive(path)
+            seen = set()
+            for entry in archive.entries():
+                if entry['kind'] == 'html' and entry['sha256'] not in seen:
+                    seen.add(entry['sha256'])
+                    pages.append((f"{entry['programme']} semaine {entry['week']} ({entry['captured_at']})",
+                                  archive.get(entry['sha256'], entry['kind'])))
+            continue
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.html'))
+        else:
+            files = [path]
+        for file in files:
+            with open(file, encoding='utf-8') as f:
+                pages.append((file, f.read()))
+    return pages
+
+
+def bench_parsers(pages, repeat=5, backends=None):
+    """
+    Temps de parsing par semaine (meilleur de `repeat` passages) pour chaque backend disponible
+    """
+    backends = backends or available_backends()
+    reference = [extract_grid(html, 'bs4') for _, html in pages]
+
+    results = {}
+    for backend in backends:
+        grids = [extract_grid(html, backend) for _, html in pages]
+        mismatches = [file for (file, _), grid, ref in zip(pages, grids, reference) if grid != ref]
+
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _, html in pages:
+                PARSER_BACKENDS[backend](html)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        results[backend] = {
+            'ms_per_week': best * 1000 / len(pages),
+            'events': sum(len(grid['events']) for grid in grids),
+            'mismatches': mismatches,
+        }
+    return results
+
+
+def icalendar_bytes(events, prodid, calname):
+    """
+    Chemin d'origine: arbre icalendar complet puis Calendar.to_ical()
+    """
+    cal = Calendar()
+    cal.add('prodid', prodid)
+    cal.add('version', '2.0')
+    cal.add('X-WR-CALNAME', calname)
+    cal.add('X-WR-TIMEZONE', 'Europe/Paris')
+    cal.add('method', 'PUBLISH')
+    for event in events:
+        cal.add_component(event.to_event())
+    return cal.to_ical()
+
+
+def bench_ics(events, repeat=3):
+    """
+    Temps et pic mémoire de l'écriture d'un calendrier: icalendar contre ade_ics.write_ics
+    """
+    prodid, calname = '-//UT Capitole M1 MIAGE FA-ALT//FR', 'M1 MIAGE FA-ALT'
+    with tempfile.TemporaryDirectory() as directory:
+        reference_file = os.path.join(directory, 'icalendar.ics')
+        stream_file = os.path.join(directory, 'stream.ics')
+
+        def with_icalendar():
+            data = icalendar_bytes(events, prodid, calname)
+            with open(reference_file, 'wb') as f:
+                f.write(data)
+
+        def with_stream():
+            write_ics(events, stream_file, prodid=prodid, calname=calname)
+
+        results = {}
+        for name, write in (('icalendar', with_icalendar), ('ade_ics', with_stream)):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                write()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            tracemalloc.start()
+            write()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[name] = {'ms': best * 1000, 'peak_kb': peak / 1024}
+
+        with open(reference_file, 'rb') as f:
+            reference = f.read()
+        with open(stream_file, 'rb') as f:
+            identical = f.read() == reference
+    return results, identical, len(reference)
+
+
+def measure(stage, repeat):
+    """
+    Temps de stage() rapporté à la boucle d'étalonnage mesurée juste avant et juste après (même état de la
+    machine: fréquence, charge des autres processus). Retourne (plus petit rapport sur `repeat` passages,
+    le bruit ne pouvant qu'allonger un passage; meilleur temps, meilleur temps d'étalonnage,
+    pic mémoire d'une exécution supplémentaire).
+    """
+    ratios, best, unit = [], None, None
+    with redirect_stdout(io.StringIO()):
+        # Étapes courtes répétées dans chaque passage: un passage dure au moins MIN_PASS_S
+        loops = max(1, math.ceil(MIN_PASS_S / max(_timed(stage), 1e-6)))
+        for _ in range(repeat):
+            before = _timed(calibration_loop)
+            elapsed = _timed(lambda: [stage() for _ in range(loops)]) / loops
+            after = _timed(calibration_loop)
+            ratios.append(elapsed / min(before, after))
+            best = elapsed if best is None else min(best, elapsed)
+            unit = min(before, after) if unit is None else min(unit, before, after)
+        tracemalloc.start()
+        stage()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return min(ratios), best, unit, peak
+
+
+def _timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def calibration_loop(iterations=CALIBRATION_ITERATIONS):
+    """
+    Charge de référence en pur Python (chaînes, dictionnaires, entiers), indépendante du code mesuré:
+    son temps sert d'unité pour comparer des mesures faites sur des machines différentes
+    """
+    counts = {}
+    for i in range(iterations):
+        key = str(i % 1000)
+        counts[key] = counts.get(key, 0) + len(key) * i % 7
+    return counts
+
+
+def run_suite(weeks=20, events=40, days=6, repeat=9, backend=None):
+    """
+    Mesure chaque étape du traitement sur `weeks` semaines synthétiques de `events` cours sur `days` jours
+    (temps absolus, et relatifs à la boucle d'étalonnage pour la comparaison à la référence)
+    """
+    backend = resolve_backend(backend)
+    pages = weeks_html(weeks, events=events, days=days)
+    with redirect_stdout(io.StringIO()):
+        grids = [extract_grid(html, backend) for html in pages]
+        records = [event for grid in grids for event in grid_events(grid)]
+    slots = [tuple((text, style) for text, style in grid['slots']) for grid in grids]
+    count = len(records)
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, 'bench.ics')
+        stages = {
+            # HTML complet → grille compacte
+            'extraction': lambda: [extract_grid(html, backend) for html in pages],
+            # Calibration et géométrie de chaque semaine, sans le cache entre semaines
+            'calibration': lambda: [(calibrate.__wrapped__(slot), GridLayout.from_grid(grid))
+                                    for slot, grid in zip(slots, grids)],
+            # Grille → cours (EventRecord)
+            'conversion': lambda: [grid_events(grid) for grid in grids],
+            # Cours → fichier iCal
+            'ecriture': lambda: write_ics(records, output_file, prodid='-//Bench//FR', calname='Bench'),
+        }
+        results = {}
+        units = []
+        for name, stage in stages.items():
+            ratio, elapsed, unit, peak = measure(stage, repeat)
+            units.append(unit)
+            results[name] = {
+                'events_per_s': round(count / elapsed),
+                'us_per_event': round(elapsed * 1e6 / count, 3),
+                # Millionièmes de la boucle d'étalonnage par cours (meilleur passage)
+                'calibrated_per_event': round(ratio * 1e6 / count, 3),
+                'peak_kb': round(peak / 1024, 1),
+            }
+    return {'params': {'weeks': weeks, 'events': events, 'days': days}, 'backend': backend, 'events': count,
+            'calibration_ms': round(min(units) * 1000, 3), 'stages': results}
+
+
+def compare_to_baseline(results, reference, tolerance):
+    """
+    Liste des régressions (étape, mesure, valeur, référence) au-delà de la tolérance relative.
+    Les temps sont comparés après étalonnage (calibrated_per_event), pas en microsecondes; le pic mémoire
+    avec une marge absolue de MEMORY_SLACK_KB.
+    """
+    regressions = []
+    for name, stats in results['stages'].items():
+        expected = reference['stages'].get(name)
+        if not expected:
+            continue
+        if stats['calibrated_per_event'] > expected['calibrated_per_event'] * (1 + tolerance):
+            regressions.append((name, 'calibrated_per_event', stats['calibrated_per_event'],
+                                expected['calibrated_per_event']))
+        if stats['peak_kb'] > expected['peak_kb'] * (1 + tolerance) + MEMORY_SLACK_KB:
+            regressions.append((name, 'peak_kb', stats['peak_kb'], expected['peak_kb']))
+    return regressions
+
+
+def load_baseline(path):
+    """
+    Référence: paramètres de la suite et mesures par parseur (None si absente ou d'un format antérieur)
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    return baseline if 'backends' in baseline else None
+
+
+def save_baseline(path, results):
+    """
+    Enregistre les mesures du parseur utilisé, en gardant celles des autres parseurs (mêmes paramètres)
+    """
+    baseline = load_baseline(path)
+    if not baseline or baseline['params'] != results['params']:
+        baseline = {'params': results['params'], 'backends': {}}
+    baseline['backends'][results['backend']] = {key: results[key] for key in ('events', 'calibration_ms', 'stages')}
+    baseline['backends'] = dict(sorted(baseline['backends'].items()))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks sur des pages ADE enregistrées")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    suite_cmd = subparsers.add_parser('suite', help="Suite de benchmarks sur des semaines synthétiques")
+    suite_cmd.add_argument('--weeks', type=int, default=20, help="Nombre de semaines générées")
+    suite_cmd.add_argument('--events', type=int, default=40, help="Cours par semaine")
+    suite_cmd.add_argument('--days', type=int, default=6, help="Jours affichés par semaine")
+    suite_cmd.add_argument('--repeat', type=int, default=9,
+                           help="Nombre de passages (meilleur temps rapporté à l'étalonnage)")
+    suite_cmd.add_argument('--backend',
+                           help="Parseur HTML (défaut: ADE_PARSER, sinon le plus rapide installé); "
+                                "une référence par parseur")
+    suite_cmd.add_argument('--baseline', default=BASELINE_FILE, help="Fichier de référence")
+    suite_cmd.add_argument('--tolerance', type=float, default=0.5,
+                           help="Régression tolérée par rapport à la référence (0.5: +50%%, au-delà du bruit "
+                                "de mesure d'environ 20%% observé sur une machine partagée)")
+    suite_cmd.add_argument('--save-baseline', action='store_true', help="Enregistrer les résultats comme référence")
+    parsers_cmd = subparsers.add_parser('parsers', help="Comparer les backends de parsing HTML")
+    ics_cmd = subparsers.add_parser('ics', help="Comparer l'écriture iCal en flux à icalendar")
+    ics_cmd.add_argument('--copies', type=int, default=20,
+                         help="Nombre de copies des cours des pages (calendrier plus long)")
+    for command in (parsers_cmd, ics_cmd):
+        command.add_argument('pages', nargs='+', help="Pages HTML ou dossiers de pages")
+        command.add_argument('--repeat', type=int, default=5, help="Nombre de passages (le meilleur est retenu)")
+    args = parser.parse_args()
+
+    if args.command == 'suite':
+        results = run_suite(args.weeks, args.events, args.days, args.repeat, args.backend)
+        params = results['params']
+        print(f"{params['weeks']} semaine(s) x {params['events']} cours sur {params['days']} jours "
+              f"({results['events']} cours, parseur {results['backend']}, étalonnage {results['calibration_ms']} ms)")
+        for name, stats in results['stages'].items():
+            print(f"  {name:<12} {stats['events_per_s']:>10} cours/s  {stats['us_per_event']:9.2f} µs/cours  "
+                  f"pic mémoire {stats['peak_kb']:8.1f} Ko")
+
+        if args.save_baseline:
+            save_baseline(args.baseline, results)
+            print(f"✓ Référence enregistrée pour le parseur {results['backend']}: {args.baseline}")
+            return
+        # Sans référence correspondante, la comparaison n'a pas lieu: code 2 plutôt qu'un succès silencieux
+        baseline = load_baseline(args.baseline)
+        if baseline is None:
+            print(f"✗ Pas de référence utilisable dans {args.baseline} (--save-baseline pour en créer une)")
+            sys.exit(2)
+        if baseline['params'] != params:
+            print(f"✗ Paramètres différents de la référence {baseline['params']}: pas de comparaison")
+            sys.exit(2)
+        reference = baseline['backends'].get(results['backend'])
+        if reference is None:
+            print(f"✗ Pas de référence pour le parseur {results['backend']} (références: "
+                  f"{', '.join(baseline['backends']) or 'aucune'}; --save-baseline pour en créer une)")
+            sys.exit(2)
+        regressions = compare_to_baseline(results, reference, args.tolerance)
+        for name, metric, value, expected in regressions:
+            print(f"✗ Régression {name} ({metric}): {value} contre {expected} (+{value / expected - 1:.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"✓ Aucune régression au-delà de {args.tolerance:.0%} par rapport à la référence "
+              f"(parseur {results['backend']})")
+        return
+
+    pages = load_pages(args.pages)
+    if not pages:
+        print("✗ Aucune page HTML trouvée")
+        return
+    size = sum(len(html) for _, html in pages)
+    print(f"{len(pages)} page(s), {size / 1024:.0f} Ko")
+
+    if args.command == 'ics':
+        with redirect_stdout(io.StringIO()):
+            events = [event for _, html in pages for event in grid_events(html)] * args.copies
+        results, identical, size = bench_ics(events, repeat=args.repeat)
+        baseline = results['icalendar']['ms']
+        for name, stats in results.items():
+            print(f"  {name:<10} {stats['ms']:8.1f} ms  x{baseline / stats['ms']:.1f}  "
+                  f"pic mémoire {stats['peak_kb']:.0f} Ko")
+        print(f"  {len(events)} événements, {size / 1024:.0f} Ko: "
+              + ('✓ fichiers identiques' if identical else '✗ fichiers différents'))
+        return
+
+    results = bench_parsers(pages, repeat=args.repeat)
+    baseline = results.get('bs4', {}).get('ms_per_week')
+    for backend, stats in results.items():
+        speedup = f"  x{baseline / stats['ms_per_week']:.1f}" if baseline else ''
+        status = '✓ identique' if not stats['mismatches'] else f"✗ {len(stats['mismatches'])} page(s) différente(s)"
+        print(f"  {backend:<11} {stats['ms_per_week']:8.2f} ms/semaine{speedup}  "
+              f"{stats['events']} événements  {status}")
+        for file in stats['mismatches']:
+            print(f"      ⚠ {file}")
+
+
+if __name__ == "__main__":
+    main()
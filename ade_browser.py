@@ -0,0 +1,183 @@
+"""
+Lancement de Chrome: résolution du driver sans accès réseau, profil persistant (cache HTTP et cache
+de code V8 des scripts GWT conservés entre deux exécutions) et mesure des temps de démarrage.
+"""
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import SessionNotCreatedException
+from datetime import datetime
+import threading
+import tempfile
+import time
+import json
+import os
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'edt-miage')
+DRIVER_PATH_CACHE = os.path.join(CACHE_DIR, 'chromedriver_path')
+METRICS_FILE = os.path.join(CACHE_DIR, 'startup_metrics.jsonl')
+# Exécutions conservées dans l'historique des démarrages (les plus récentes)
+METRICS_HISTORY = 200
+# Navigateurs parallèles d'un même processus: une mise à jour de l'historique à la fois
+_metrics_lock = threading.Lock()
+
+
+def resolve_driver_path(driver_path=None, use_cache=False):
+    """
+    Retourne le chemin de chromedriver, dans l'ordre: paramètre, variable CHROMEDRIVER_PATH,
+    dernier chemin résolu (démarrage à chaud seulement, use_cache), sinon webdriver-manager.
+    """
+    driver_path = driver_path or os.environ.get('CHROMEDRIVER_PATH')
+    if driver_path:
+        return driver_path
+
+    if use_cache and os.path.exists(DRIVER_PATH_CACHE):
+        with open(DRIVER_PATH_CACHE, encoding='utf-8') as f:
+            cached = f.read().strip()
+        if cached and os.path.exists(cached):
+            return cached
+
+    return install_driver(use_cache)
+
+
+def install_driver(use_cache=False):
+    """
+    Chromedriver correspondant au Chrome installé (webdriver-manager), mémorisé si use_cache
+    """
+    from webdriver_manager.chrome import ChromeDriverManager
+    resolved = ChromeDriverManager().install()
+    if use_cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(DRIVER_PATH_CACHE, 'w', encoding='utf-8') as f:
+            f.write(resolved)
+    return resolved
+
+
+def apply_profile(options, profile_dir):
+    """
+    Utilise un profil Chrome persistant: le cache disque HTTP et le cache de code compilé
+    des bundles GWT sont réutilisés au démarrage suivant. Retourne 'warm' si le profil existait déjà.
+    """
+    profile_dir = os.path.abspath(profile_dir)
+    warm = os.path.isdir(os.path.join(profile_dir, 'Default'))
+    options.add_argument(f'--user-data-dir={profile_dir}')
+    options.add_argument(f'--disk-cache-dir={os.path.join(profile_dir, "cache")}')
+    options.add_argument('--disk-cache-size=268435456')
+    # Garder le bytecode V8 des gros scripts GWT au lieu de le recompiler
+    options.add_argument('--js-flags=--no-flush-bytecode')
+    return 'warm' if warm else 'cold'
+
+
+def create_driver(options, profile_dir=None, driver_path=None):
+    """
+    Lance Chrome avec les options données. Retourne (driver, métriques de démarrage)
+    """
+    mode = apply_profile(options, profile_dir) if profile_dir else 'cold'
+    use_cache = bool(profile_dir)
+
+    start = time.time()
+    path = resolve_driver_path(driver_path, use_cache)
+    resolved = time.time()
+    try:
+        driver = webdriver.Chrome(service=Service(path), options=options)
+    except SessionNotCreatedException as e:
+        # Chrome mis à jour depuis la résolution du driver (mise à jour apt sur le runner): driver périmé
+        print(f"⚠ Session Chrome impossible avec {path}: {e.msg}")
+        if os.path.exists(DRIVER_PATH_CACHE):
+            os.remove(DRIVER_PATH_CACHE)
+        print("  Nouvelle résolution de chromedriver via webdriver-manager")
+        path = install_driver(use_cache)
+        resolved = time.time()
+        driver = webdriver.Chrome(service=Service(path), options=options)
+    launched = time.time()
+
+    metrics = {
+        'mode': mode,
+        'profile': bool(profile_dir),
+        'driver_resolution_s': round(resolved - start, 3),
+        'browser_launch_s': round(launched - resolved, 3),
+    }
+    return driver, metrics
+
+
+def page_timings(driver):
+    """
+    Temps de rendu de la page courante (ms depuis le début de la navigation)
+    """
+    try:
+        return driver.execute_script("""
+            var nav = performance.getEntriesByType('navigation')[0] || {};
+            var paint = performance.getEntriesByType('paint').filter(function(p) {
+                return p.name === 'first-contentful-paint';
+            })[0];
+            var resources = performance.getEntriesByType('resource');
+            var cached = resources.filter(function(r) { return r.transferSize === 0 && r.decodedBodySize > 0; });
+            return {
+                dom_content_loaded_ms: Math.round(nav.domContentLoadedEventEnd || 0),
+                load_ms: Math.round(nav.loadEventEnd || 0),
+                first_contentful_paint_ms: paint ? Math.round(paint.startTime) : null,
+                resources: resources.length,
+                resources_from_cache: cached.length
+            };
+        """)
+    except Exception:
+        return {}
+
+
+def report_startup(metrics, metrics_file=METRICS_FILE, record=None, history_size=METRICS_HISTORY):
+    """
+    Affiche les métriques de démarrage. Elles ne sont historisées (et comparées froid / chaud) qu'en démarrage
+    à chaud ou sur demande (record, ou ADE_STARTUP_METRICS=1); l'historique garde les history_size dernières.
+    """
+    metrics = dict(metrics, date=datetime.now().isoformat(timespec='seconds'))
+    print(f"  Démarrage ({metrics['mode']}): driver {metrics['driver_resolution_s']}s, "
+          f"navigateur {metrics['browser_launch_s']}s, premier rendu {metrics.get('time_to_first_render_s')}s")
+
+    if record is None:
+        record = metrics['mode'] == 'warm' or os.environ.get('ADE_STARTUP_METRICS') == '1'
+    if not record:
+        return
+
+    with _metrics_lock:
+        lines = []
+        try:
+            with open(metrics_file, encoding='utf-8') as f:
+                lines = [line for line in f if line.strip()]
+        except OSError:
+            pass
+        lines = (lines + [json.dumps(metrics) + '\n'])[-history_size:]
+
+        directory = os.path.dirname(metrics_file)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(metrics_file) + '.', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        os.replace(tmp_path, metrics_file)
+
+    history = {'cold': [], 'warm': []}
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if entry.get('time_to_first_render_s') is not None and entry.get('mode') in history:
+            history[entry['mode']].append(entry)
+
+    for mode, entries in history.items():
+        if entries:
+            startup = sum(e['driver_resolution_s'] + e['browser_launch_s'] for e in entries) / len(entries)
+            render = sum(e['time_to_first_render_s'] for e in entries) / len(entries)
+            print(f"  Moyenne {mode} ({len(entries)} exécution(s)): démarrage {startup:.2f}s, premier rendu {render:.2f}s")
+
+
+def prime_profile(driver, url, readiness, loads=2):
+    """
+    Charge plusieurs fois la page pour remplir le cache HTTP et faire compiler/mettre en cache
+    les bundles GWT par V8 (le cache de code n'est produit qu'à partir du deuxième chargement)
+    """
+    for i in range(loads):
+        start = time.time()
+        driver.get(url)
+        readiness.wait_until_ready(quiet_ms=500)
+        timings = page_timings(driver)
+        print(f"  Préchauffage {i + 1}/{loads}: {time.time() - start:.1f}s "
+              f"({timings.get('resources_from_cache', 0)}/{timings.get('resources', 0)} ressources en cache)")
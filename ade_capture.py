@@ -0,0 +1,56 @@
+"""
+Capture de plusieurs semaines en parallèle, chaque tranche de semaines dans son propre navigateur
+"""
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+
+def split_weeks(weeks, concurrency):
+    """
+    Découpe la liste de semaines en au plus `concurrency` tranches contiguës (listes de numéros de semaine)
+    """
+    concurrency = max(1, min(concurrency, len(weeks)))
+    size, extra = divmod(len(weeks), concurrency)
+    chunks = []
+    start = 0
+    for i in range(concurrency):
+        count = size + (1 if i < extra else 0)
+        chunks.append(list(weeks[start:start + count]))
+        start += count
+    return chunks
+
+
+def capture_weeks_concurrently(capture_range, weeks, concurrency=2):
+    """
+    Capture les semaines `weeks` (liste ordonnée de numéros, voir ade_weeks.resolve_weeks)
+    avec `concurrency` navigateurs en parallèle.
+
+    capture_range(chunk, worker=i) ouvre son navigateur, va directement sur chaque semaine de la tranche
+    et retourne la liste des HTML de ces semaines (ou None en cas d'échec). worker, rang du navigateur,
+    est stable d'une exécution à l'autre (profil Chrome propre à chaque navigateur).
+    Les résultats sont fusionnés dans l'ordre des semaines; les tranches en échec sont ignorées.
+    """
+    chunks = split_weeks(weeks, concurrency)
+    print(f"Capture parallèle: {len(weeks)} semaine(s) sur {len(chunks)} navigateur(s) {chunks}")
+    start = time.time()
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        futures = {executor.submit(capture_range, chunk, worker=index): index for index, chunk in enumerate(chunks)}
+        for future, index in futures.items():
+            chunk = chunks[index]
+            try:
+                html_list = future.result()
+            except Exception as e:
+                print(f"⚠ Tranche {chunk} en échec: {e}")
+                continue
+            if not html_list:
+                print(f"⚠ Tranche {chunk} vide")
+                continue
+            if len(html_list) < len(chunk):
+                print(f"⚠ Tranche {chunk}: {len(html_list)}/{len(chunk)} semaine(s) capturée(s)")
+            results[index] = html_list
+
+    all_html = [html for index in sorted(results) for html in results[index]]
+    print(f"✓ {len(all_html)} semaine(s) capturée(s) en {time.time() - start:.1f}s")
+    return all_html
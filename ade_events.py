@@ -0,0 +1,97 @@
+"""
+Représentation interne compacte d'un cours, entre le parsing (grille, backend HTTP) et les sorties (iCal...).
+"""
+from icalendar import Event
+from datetime import datetime, timedelta
+import sys
+import pytz
+
+EPOCH = datetime(1970, 1, 1, tzinfo=pytz.UTC)
+
+
+class EventRecord:
+    """
+    Un cours: début et fin en minutes UTC depuis l'epoch, titre et lieu internés (très répétés d'une
+    semaine à l'autre), description (lignes séparées par des retours à la ligne) ou None.
+    Sans __dict__: quelques dizaines d'octets par cours, sérialisation (pickle) légère entre processus.
+    Les champs de publication (uid, sequence, stamp en minutes UTC, status) sont renseignés par ade_sync
+    juste avant l'écriture; ils ne font pas partie de l'identité du cours (égalité, pickle).
+    """
+    __slots__ = ('start', 'end', 'summary', 'location', 'description', 'uid', 'sequence', 'stamp', 'status')
+
+    def __init__(self, start, end, summary, location='', description=None):
+        self.start = start
+        self.end = end
+        self.summary = sys.intern(summary)
+        self.location = sys.intern(location)
+        self.description = description or None
+        self.uid = self.sequence = self.stamp = self.status = None
+
+    @classmethod
+    def from_datetimes(cls, start, end, summary, location='', description=None):
+        """
+        Crée un cours à partir de datetimes avec fuseau horaire
+        """
+        return cls(to_minutes(start), to_minutes(end), summary, location, description)
+
+    @property
+    def start_datetime(self):
+        return from_minutes(self.start)
+
+    @property
+    def end_datetime(self):
+        return from_minutes(self.end)
+
+    def to_event(self):
+        """
+        Événement iCal (propriétés dans l'ordre historique des fichiers générés, dates en UTC)
+        """
+        event = Event()
+        event.add('summary', self.summary)
+        event.add('dtstart', self.start_datetime)
+        event.add('dtend', self.end_datetime)
+        if self.description:
+            event.add('description', self.description)
+        event.add('location', self.location)
+        if self.uid:
+            event.add('uid', self.uid)
+            event.add('sequence', self.sequence or 0)
+            event.add('dtstamp', from_minutes(self.stamp))
+        if self.status:
+            event.add('status', self.status)
+        return event
+
+    def _key(self):
+        return self.start, self.end, self.summary, self.location, self.description
+
+    def __eq__(self, other):
+        return isinstance(other, EventRecord) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"EventRecord({self.start_datetime:%Y-%m-%d %H:%M}Z, {self.summary!r}, {self.location!r})"
+
+    def __getstate__(self):
+        return self._key()
+
+    def __setstate__(self, state):
+        self.start, self.end, self.summary, self.location, self.description = state
+        self.uid = self.sequence = self.stamp = self.status = None
+        self.summary = sys.intern(self.summary)
+        self.location = sys.intern(self.location)
+
+
+def to_minutes(value):
+    """
+    Minutes UTC depuis l'epoch d'un datetime avec fuseau horaire
+    """
+    return (value - EPOCH) // timedelta(minutes=1)
+
+
+def from_minutes(minutes):
+    """
+    Datetime UTC de minutes depuis l'epoch
+    """
+    return EPOCH + timedelta(minutes=int(minutes))
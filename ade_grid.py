@@ -0,0 +1,399 @@
+"""
+Grille du planning ADE sous forme compacte, et conversion de la grille en cours (ade_events.EventRecord).
+
+Une grille est un dict JSON:
+    {'slots':  [[texte, style], ...],                 # libellés d'heures (div.slot)
+     'days':   [[texte, style], ...],                 # libellés des jours (div.labelLegend)
+     'events': [[aria-label, style, style_table], ...]}  # div.eventText, style du parent positionné, table.event
+Elle est produite soit dans le navigateur (EXTRACT_GRID_JS), soit à partir du HTML complet (extract_grid),
+avec le parseur le plus rapide installé: selectolax, lxml, sinon BeautifulSoup (variable ADE_PARSER pour forcer).
+"""
+from bs4 import BeautifulSoup
+from ade_events import EventRecord, to_minutes
+from functools import lru_cache
+from datetime import datetime, timedelta
+import numpy as np
+import importlib
+import re
+import os
+import pytz
+
+# Collecte dans la page uniquement les noeuds utiles au parsing (mêmes règles que extract_grid)
+EXTRACT_GRID_JS = """
+function text(el) {
+    // Équivalent de BeautifulSoup get_text(strip=True): textes non vides, nettoyés, concaténés
+    var walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT), parts = [], node;
+    while ((node = walker.nextNode())) {
+        var t = node.nodeValue.trim();
+        if (t) { parts.push(t); }
+    }
+    return parts.join('');
+}
+function style(el) { return el ? (el.getAttribute('style') || '') : null; }
+
+var grid = {slots: [], days: [], events: []};
+document.querySelectorAll('div.slot').forEach(function(el) { grid.slots.push([text(el), style(el)]); });
+document.querySelectorAll('div.labelLegend').forEach(function(el) { grid.days.push([text(el), style(el)]); });
+document.querySelectorAll('div.eventText[aria-label]').forEach(function(el) {
+    var parent = el.parentElement;
+    while (parent && !(parent.tagName === 'DIV' && (parent.getAttribute('style') || '').indexOf('position: absolute') !== -1)) {
+        parent = parent.parentElement;
+    }
+    var table = parent ? parent.querySelector('table.event') : null;
+    grid.events.push([el.getAttribute('aria-label'), style(parent), style(table)]);
+});
+return grid;
+"""
+
+DAY_NAMES = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+
+
+def _grid_bs4(html_content):
+    """
+    Backend BeautifulSoup (html.parser, pur Python): toujours disponible, le plus lent
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    grid = {'slots': [], 'days': [], 'events': []}
+
+    for label in soup.find_all('div', class_='slot'):
+        grid['slots'].append([label.get_text(strip=True), label.get('style', '')])
+
+    for label in soup.find_all('div', class_='labelLegend'):
+        grid['days'].append([label.get_text(strip=True), label.get('style', '')])
+
+    for event_div in soup.find_all('div', attrs={'aria-label': True, 'class': 'eventText'}):
+        # Récupérer le parent avec position absolute
+        parent = event_div.find_parent('div', style=lambda s: s and 'position: absolute' in s)
+        table = parent.find('table', class_='event') if parent else None
+        grid['events'].append([
+            event_div.get('aria-label', ''),
+            parent.get('style') if parent else None,
+            table.get('style') if table else None,
+        ])
+
+    return grid
+
+
+@lru_cache(maxsize=None)
+def _lxml_queries():
+    from lxml import etree
+
+    def has_class(name):
+        return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+    return {
+        'slots': etree.XPath(f"//div[{has_class('slot')}]"),
+        'days': etree.XPath(f"//div[{has_class('labelLegend')}]"),
+        'events': etree.XPath(f"//div[@aria-label][{has_class('eventText')}]"),
+        # Ancêtre le plus proche (axe inverse: [1] est le parent le plus proche)
+        'parent': etree.XPath("ancestor::div[contains(@style, 'position: absolute')][1]"),
+        'table': etree.XPath(f".//table[{has_class('event')}][1]"),
+    }
+
+
+def _grid_lxml(html_content):
+    """
+    Backend lxml (libxml2, en C): XPath précompilés, un seul passage par type de noeud
+    """
+    from lxml import html as lxml_html
+
+    try:
+        root = lxml_html.document_fromstring(html_content)
+    except ValueError:
+        # Chaîne avec déclaration d'encodage XML: lxml exige des octets
+        root = lxml_html.document_fromstring(html_content.encode('utf-8'))
+    queries = _lxml_queries()
+
+    def text(el):
+        return ''.join(t.strip() for t in el.itertext())
+
+    grid = {'slots': [], 'days': [], 'events': []}
+    for el in queries['slots'](root):
+        grid['slots'].append([text(el), el.get('style', '')])
+    for el in queries['days'](root):
+        grid['days'].append([text(el), el.get('style', '')])
+    for el in queries['events'](root):
+        parents = queries['parent'](el)
+        parent = parents[0] if parents else None
+        tables = queries['table'](parent) if parent is not None else []
+        grid['events'].append([
+            el.get('aria-label', ''),
+            parent.get('style') if parent is not None else None,
+            tables[0].get('style') if tables else None,
+        ])
+    return grid
+
+
+def _grid_selectolax(html_content):
+    """
+    Backend selectolax (lexbor, en C): sélecteurs CSS natifs, le plus rapide
+    """
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html_content)
+
+    def text(node):
+        return node.text(deep=True, separator='', strip=True)
+
+    grid = {'slots': [], 'days': [], 'events': []}
+    for node in tree.css('div.slot'):
+        grid['slots'].append([text(node), node.attributes.get('style') or ''])
+    for node in tree.css('div.labelLegend'):
+        grid['days'].append([text(node), node.attributes.get('style') or ''])
+    for node in tree.css('div.eventText[aria-label]'):
+        parent = node.parent
+        while parent is not None and not (parent.tag == 'div' and
+                                          'position: absolute' in (parent.attributes.get('style') or '')):
+            parent = parent.parent
+        table = parent.css_first('table.event') if parent is not None else None
+        grid['events'].append([
+            node.attributes.get('aria-label') or '',
+            parent.attributes.get('style') if parent is not None else None,
+            table.attributes.get('style') if table is not None else None,
+        ])
+    return grid
+
+
+# Du plus rapide au plus lent; 'bs4' reste le recours si aucune bibliothèque en C n'est installée
+PARSER_BACKENDS = {
+    'selectolax': _grid_selectolax,
+    'lxml': _grid_lxml,
+    'bs4': _grid_bs4,
+}
+PARSER_MODULES = {'selectolax': 'selectolax.lexbor', 'lxml': 'lxml.html', 'bs4': 'bs4'}
+
+
+@lru_cache(maxsize=None)
+def available_backends():
+    """
+    Backends dont la bibliothèque est installée, du plus rapide au plus lent
+    """
+    available = []
+    for name, module in PARSER_MODULES.items():
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            continue
+        available.append(name)
+    return tuple(available)
+
+
+def resolve_backend(backend=None):
+    """
+    Backend demandé (paramètre ou ADE_PARSER), sinon le plus rapide disponible
+    """
+    backend = backend or os.environ.get('ADE_PARSER') or 'auto'
+    if backend == 'auto':
+        return available_backends()[0]
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Parseur inconnu '{backend}' (choix: auto, {', '.join(PARSER_BACKENDS)})")
+    if backend not in available_backends():
+        raise ValueError(f"Parseur '{backend}' non installé (disponibles: {', '.join(available_backends())})")
+    return backend
+
+
+def extract_grid(html_content, backend=None):
+    """
+    Construit la grille compacte à partir du HTML complet de la page (page_source).
+    Tous les backends produisent exactement la même grille.
+    """
+    return PARSER_BACKENDS[resolve_backend(backend)](html_content)
+
+
+# Styles parsés avec des expressions précompilées (mêmes motifs que le parsing d'origine)
+TOP_RE = re.compile(r'top:\s*(\d+)px')
+LEFT_RE = re.compile(r'left:\s*(\d+)px')
+DAY_LEFT_RE = re.compile(r'left:(\d+)px')
+HEIGHT_RE = re.compile(r'height:(\d+)px')
+DATE_RE = re.compile(r'(\d{2})/(\d{2})/(\d{4})')
+SLOT_HOUR_RE = re.compile(r'(\d{1,2})h(\d{2})')
+# Position des libellés d'heures, fractionnaire quand la grille est zoomée
+SLOT_TOP_RE = re.compile(r'top:\s*(\d+(?:\.\d+)?)px')
+
+# Valeurs par défaut (ancienne échelle)
+DEFAULT_PIXELS_PER_HOUR = 17.5
+DEFAULT_HOUR_OFFSET = 17
+DEFAULT_COLUMN_WIDTH = 115
+# Les événements ont un offset de ~8px par rapport à la grille
+EVENT_OFFSET = 8
+DEFAULT_DURATION_HOURS = 1.5
+
+PARIS_TZ = pytz.timezone('Europe/Paris')
+
+
+@lru_cache(maxsize=64)
+def calibrate(slots):
+    """
+    Échelle verticale (pixels par heure, position de 8h) ajustée par moindres carrés sur tous les libellés
+    d'heures ("08h00", "09h00", "13h30"...), plus précise qu'une seule paire quand la grille est zoomée.
+    `slots` est un tuple de (texte, style): le résultat est mis en cache pour les semaines de même géométrie.
+    """
+    hours = []
+    tops = []
+    for text, style in slots:
+        hour_match = SLOT_HOUR_RE.search(text or '')
+        top_match = SLOT_TOP_RE.search(style or '')
+        if hour_match and top_match:
+            hours.append(int(hour_match.group(1)) + int(hour_match.group(2)) / 60)
+            tops.append(float(top_match.group(1)))
+
+    if len(set(hours)) >= 2:
+        slope, intercept = np.polyfit(np.array(hours), np.array(tops, dtype=float), 1)
+        # Arrondi au millième de pixel: une grille régulière donne exactement l'échelle entière
+        pixels_per_hour = round(float(slope), 3)
+        hour_offset = round(float(slope * 8 + intercept), 3)
+        if pixels_per_hour > 0:
+            print(f"  Calibration: {pixels_per_hour:g}px/heure, offset={hour_offset:g}px ({len(hours)} libellés)")
+            return pixels_per_hour, hour_offset
+
+    print(f"  Calibration par défaut: {DEFAULT_PIXELS_PER_HOUR}px/heure")
+    return DEFAULT_PIXELS_PER_HOUR, DEFAULT_HOUR_OFFSET
+
+
+class GridLayout:
+    """
+    Géométrie d'une semaine de la grille: échelle verticale, dates des colonnes de jours et décalage
+    Europe/Paris → UTC de chaque jour. Convertit en un seul calcul vectoriel les coordonnées en pixels
+    de tous les événements de la semaine.
+    """
+
+    def __init__(self, pixels_per_hour, hour_offset, column_width, day_dates):
+        self.pixels_per_hour = pixels_per_hour
+        self.hour_offset = hour_offset
+        self.column_width = column_width
+        # Date de chaque colonne, dans l'ordre des positions horizontales
+        self.day_dates = day_dates
+        self.day_starts = np.array(day_dates, dtype='datetime64[m]')
+        # Décalage UTC (minutes) de chaque jour, hors nuit du changement d'heure (voir to_utc)
+        self.utc_offsets = np.array([PARIS_TZ.utcoffset(d.replace(hour=12)) // timedelta(minutes=1)
+                                     for d in day_dates], dtype='timedelta64[m]')
+
+    @classmethod
+    def from_grid(cls, grid):
+        pixels_per_hour, hour_offset = calibrate(tuple((text, style) for text, style in grid['slots']))
+
+        # Extraire les dates des jours de la semaine
+        days_mapping = {}  # left position -> date
+        day_positions = []  # Pour calculer la largeur des colonnes
+        for text, style in grid['days']:
+            # Chercher les dates au format "Lundi 17/11/2025"
+            if '/' in text and any(day in text for day in DAY_NAMES):
+                left_match = DAY_LEFT_RE.search(style or '')
+                date_match = DATE_RE.search(text)
+                if left_match and date_match:
+                    left_pos = int(left_match.group(1))
+                    day, month, year = (int(g) for g in date_match.groups())
+                    days_mapping[left_pos] = datetime(year, month, day)
+                    day_positions.append(left_pos)
+
+        # Calculer la largeur des colonnes automatiquement
+        if len(day_positions) >= 2:
+            day_positions.sort()
+            column_width = day_positions[1] - day_positions[0]
+            print(f"  Largeur colonne: {column_width}px")
+        else:
+            column_width = DEFAULT_COLUMN_WIDTH
+            print(f"  Largeur colonne par défaut: {column_width}px")
+
+        return cls(pixels_per_hour, hour_offset, column_width, [days_mapping[left] for left in sorted(days_mapping)])
+
+    def columns(self, lefts):
+        """
+        Indice de colonne de chaque position `left` (-1 hors de la grille)
+        """
+        if self.column_width <= 0:
+            return np.full(len(lefts), -1)
+        columns = lefts // self.column_width
+        return np.where((columns >= 0) & (columns < len(self.day_dates)), columns, -1)
+
+    def start_hours(self, tops):
+        """
+        Heures de début (décimales) des événements positionnés à `tops`
+        """
+        return 8 + (tops - self.hour_offset - EVENT_OFFSET) / self.pixels_per_hour
+
+    def durations(self, heights):
+        """
+        Durées (heures) d'après la hauteur des tables d'événements (NaN: durée par défaut)
+        """
+        return np.where(np.isnan(heights), DEFAULT_DURATION_HOURS, heights / self.pixels_per_hour)
+
+    def to_utc_minutes(self, columns, minutes):
+        """
+        Minutes UTC depuis l'epoch des minutes locales `minutes` dans les jours `columns`
+        """
+        utc = (self.day_starts[columns] + minutes.astype('timedelta64[m]') - self.utc_offsets[columns])
+        utc = utc.astype('int64')
+        # Nuit du changement d'heure possible: conversion exacte par pytz
+        for i in np.flatnonzero(minutes < 4 * 60):
+            local = self.day_dates[columns[i]] + timedelta(minutes=int(minutes[i]))
+            utc[i] = to_minutes(PARIS_TZ.localize(local))
+        return utc
+
+
+def round_to_15min(minutes):
+    """
+    Arrondit des durées en minutes au quart d'heure (créneaux standards universitaires)
+    """
+    return np.round(minutes / 15) * 15
+
+
+def grid_events(grid, backend=None):
+    """
+    Convertit une grille (dict) ou une page HTML en liste de cours (EventRecord)
+    (calibration automatique de l'échelle, dates des colonnes, heures arrondies au quart d'heure)
+    """
+    if isinstance(grid, str):
+        grid = extract_grid(grid, backend)
+
+    layout = GridLayout.from_grid(grid)
+
+    # Coordonnées de tous les événements de la semaine (un seul passage sur les styles)
+    rows = []
+    lefts, tops, heights = [], [], []
+    for aria_label, style, table_style in grid['events']:
+        left_match = LEFT_RE.search(style) if style else None
+        top_match = TOP_RE.search(style) if style else None
+        if not left_match or not top_match:
+            continue
+        height_match = HEIGHT_RE.search(table_style) if table_style else None
+        rows.append(aria_label)
+        lefts.append(int(left_match.group(1)))
+        tops.append(int(top_match.group(1)))
+        heights.append(int(height_match.group(1)) if height_match else np.nan)
+
+    if not rows:
+        return []
+
+    columns = layout.columns(np.array(lefts))
+    start_hours = layout.start_hours(np.array(tops, dtype=float))
+    # Ignorer les événements hors grille ou hors limites (probablement chevauchement ou erreur)
+    keep = (columns >= 0) & (start_hours >= 0) & (start_hours <= 23)
+
+    start_minutes = round_to_15min(start_hours * 60)
+    end_minutes = round_to_15min((start_hours + layout.durations(np.array(heights, dtype=float))) * 60)
+
+    # Valider les heures (doivent être entre 0 et 23)
+    invalid = keep & ((start_minutes >= 24 * 60) | (end_minutes < 0) | (end_minutes >= 24 * 60))
+    for i in np.flatnonzero(invalid):
+        print(f"⚠ Heure invalide: {int(start_minutes[i] // 60)}h{int(start_minutes[i] % 60)} - "
+              f"{int(end_minutes[i] // 60)}h{int(end_minutes[i] % 60)}")
+    keep &= ~invalid
+
+    indices = np.flatnonzero(keep)
+    starts = layout.to_utc_minutes(columns[indices], start_minutes[indices])
+    ends = layout.to_utc_minutes(columns[indices], end_minutes[indices])
+
+    events = []
+    for i, start, end in zip(indices, starts.tolist(), ends.tolist()):
+        # Extraire le titre et les détails
+        lines = [line.strip() for line in (rows[i] or '').split('null') if line.strip()]
+
+        summary = lines[0] if lines else "Cours"
+        description_parts = lines[1:] if len(lines) > 1 else []
+
+        events.append(EventRecord(start, end, summary, description_parts[0] if description_parts else '',
+                                  '\n'.join(description_parts)))
+
+    return events
+
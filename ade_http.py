@@ -0,0 +1,148 @@
+"""
+Backend HTTP sans navigateur pour l'interface anonyme d'ADE ("direct")
+Résout les ressources par leur nom via la web API puis télécharge l'export iCal des semaines voulues.
+"""
+from requests.adapters import HTTPAdapter
+from icalendar import Calendar
+from ade_events import EventRecord
+from datetime import timedelta
+import xml.etree.ElementTree as ET
+import requests
+import pytz
+from ade_replay import save_response
+from ade_weeks import resolve_weeks, monday_of_week
+
+ADE_HOST = "https://ade-production.ut-capitole.fr"
+PARIS_TZ = pytz.timezone('Europe/Paris')
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+class ADEHttpClient:
+    def __init__(self, base_url=ADE_HOST, project_id=26, login='anonymous', timeout=30, record_dir=None):
+        self.base_url = base_url.rstrip('/')
+        self.project_id = project_id
+        self.login = login
+        self.timeout = timeout
+        # Si défini, chaque réponse est enregistrée pour être rejouée par ade_replay.ReplayServer
+        self.record_dir = record_dir
+        self.session_id = None
+
+        # Session HTTP partagée: connexions keep-alive réutilisées, réponses compressées
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=2)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Language': 'fr-FR,fr',
+        })
+
+    def _get(self, path, params):
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        if self.record_dir:
+            save_response(self.record_dir, response.url, response.status_code,
+                          response.headers.get('Content-Type', 'application/octet-stream'), response.content)
+        response.raise_for_status()
+        return response
+
+    def _webapi(self, function, **params):
+        """
+        Appelle la web API ADE et retourne la racine XML (lève RuntimeError sur une réponse <error>)
+        """
+        params = {'function': function, **params}
+        if self.session_id and function != 'connect':
+            params['sessionId'] = self.session_id
+        root = ET.fromstring(self._get('/jsp/webapi', params).content)
+        if root.tag == 'error':
+            raise RuntimeError(f"Erreur web API ADE ({function}): {root.get('name') or root.get('description')}")
+        return root
+
+    def connect(self):
+        """
+        Ouvre une session anonyme sur le projet
+        """
+        root = self._webapi('connect', login=self.login)
+        self.session_id = root.get('id')
+        self._webapi('setProject', projectId=self.project_id)
+        print(f"✓ Session ADE ouverte ({self.login}, projet {self.project_id})")
+
+    def resolve_resources(self, names, navigation_path=None):
+        """
+        Retourne {nom: id} pour les ressources demandées.
+        Si plusieurs ressources portent le même nom, on garde celle dont le chemin contient navigation_path.
+        """
+        if not self.session_id:
+            self.connect()
+
+        resolved = {}
+        for name in names:
+            root = self._webapi('getResources', name=name, detail=3)
+            candidates = [r for r in root.iter('resource') if r.get('name') == name]
+            if navigation_path and len(candidates) > 1:
+                in_path = [r for r in candidates if all(p in (r.get('path') or '') for p in navigation_path[:3])]
+                candidates = in_path or candidates
+            if not candidates:
+                print(f"  ⚠ Ressource '{name}' introuvable")
+                continue
+            resolved[name] = candidates[0].get('id')
+            print(f"  ✓ {name} → {resolved[name]}")
+        return resolved
+
+    def get_events(self, resource_ids, first_date, last_date):
+        """
+        Télécharge l'export iCal des ressources entre deux dates (incluses)
+        et le convertit en cours (EventRecord), au même format que le scraper Selenium
+        """
+        response = self._get('/jsp/custom/modules/plannings/anonymous_cal.jsp', {
+            'resources': ','.join(str(r) for r in resource_ids),
+            'projectId': self.project_id,
+            'calType': 'ical',
+            'firstDate': first_date.strftime('%Y-%m-%d'),
+            'lastDate': last_date.strftime('%Y-%m-%d'),
+        })
+        exported = Calendar.from_ical(response.content)
+        events = [self._to_event(component) for component in exported.walk('VEVENT')]
+        events.sort(key=lambda e: e.start)
+        return events
+
+    def _to_event(self, component):
+        def to_utc(value):
+            if value.tzinfo is None:
+                value = PARIS_TZ.localize(value)
+            return value.astimezone(pytz.UTC)
+
+        # Même structure que le scraper: salle, enseignant(s), groupes (sans la ligne "(Exporté le ...)")
+        location = str(component.get('location', '')).strip()
+        lines = [line.strip() for line in str(component.get('description', '')).split('\n')
+                 if line.strip() and not line.strip().startswith('(Export')]
+        description_parts = ([location] if location else []) + lines
+
+        return EventRecord.from_datetimes(to_utc(component.decoded('dtstart')), to_utc(component.decoded('dtend')),
+                                          str(component.get('summary', '')).strip() or "Cours", location,
+                                          '\n'.join(description_parts))
+
+    def fetch_events(self, names, navigation_path=None, weeks=2, start=None):
+        """
+        Résout les ressources puis récupère les semaines demandées: un nombre de semaines à partir de la semaine
+        de `start` (aujourd'hui par défaut) ou une sélection de semaines (voir ade_weeks.resolve_weeks)
+        """
+        resources = self.resolve_resources(names, navigation_path)
+        if not resources:
+            return []
+
+        targets = resolve_weeks(weeks, start)
+        if not targets:
+            return []
+        mondays = [monday_of_week(week, start) for week in targets]
+        first_date = min(mondays)
+        last_date = max(mondays) + timedelta(days=6)
+        print(f"Téléchargement du {first_date} au {last_date}...")
+        events = self.get_events(resources.values(), first_date, last_date)
+        # Sélection non contiguë: ne garder que les semaines demandées
+        events = [e for e in events if e.start_datetime.astimezone(PARIS_TZ).isocalendar()[1] in targets]
+        print(f"✓ {len(events)} événements récupérés")
+        return events
+
+    def close(self):
+        self.session.close()
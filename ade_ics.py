@@ -0,0 +1,141 @@
+"""
+Écriture d'un calendrier iCalendar (RFC 5545) au fil de l'eau, sans construire d'arbre icalendar.
+Le résultat est identique octet pour octet à Calendar.to_ical() (icalendar 7): même ordre des propriétés,
+même échappement des textes, même pliage des lignes longues, dates en UTC.
+"""
+import time
+import os
+
+CRLF = b'\r\n'
+FOLD_LIMIT = 75
+
+
+def escape_text(text):
+    """
+    Échappement des valeurs TEXT (RFC 5545 §3.3.11), dans le même ordre que icalendar
+    """
+    return (text.replace('\\N', '\n')
+            .replace('\\', '\\\\')
+            .replace(';', '\\;')
+            .replace(',', '\\,')
+            .replace('\r\n', '\\n')
+            .replace('\n', '\\n')
+            .replace('\r', '\\n'))
+
+
+def fold_line(line):
+    """
+    Plie une ligne de contenu en segments de moins de 75 octets (RFC 5545 §3.1), sans couper un caractère
+    UTF-8 ni séparer un échappement ("\\" ou "^") du caractère qui le suit, comme icalendar
+    """
+    if len(line) < FOLD_LIMIT and line.isascii():
+        return line
+    folded = []
+    current = []
+    byte_count = 0
+    for char in line:
+        char_len = len(char.encode('utf-8'))
+        if current and byte_count + char_len >= FOLD_LIMIT:
+            if len(current) > 1 and current[-1] in '\\^':
+                prefix = current.pop()
+                folded.append(''.join(current))
+                current = [prefix]
+                byte_count = len(prefix.encode('utf-8'))
+            else:
+                folded.append(''.join(current))
+                current = []
+                byte_count = 0
+        current.append(char)
+        byte_count += char_len
+    if current:
+        folded.append(''.join(current))
+    return '\r\n '.join(folded)
+
+
+def format_utc(minutes):
+    """
+    Date-heure UTC iCalendar ("20251117T080000Z") de minutes depuis l'epoch
+    """
+    return time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(minutes * 60))
+
+
+class ICSWriter:
+    """
+    Écrit un VCALENDAR dans un flux binaire (fichier, socket...) au fur et à mesure des cours:
+        writer = ICSWriter(stream, prodid='-//...//FR', calname='M1 MIAGE FA-ALT')
+        for event in events:
+            writer.write_event(event)
+        writer.close()
+    """
+
+    def __init__(self, stream, prodid, calname, timezone='Europe/Paris', method='PUBLISH', fingerprint=None):
+        self.stream = stream
+        self.count = 0
+        # Ordre canonique d'icalendar: VERSION, PRODID, METHOD, X-WR-CALNAME
+        # puis les autres propriétés par ordre alphabétique
+        lines = [
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            'PRODID:' + escape_text(prodid),
+            'METHOD:' + escape_text(method),
+            'X-WR-CALNAME:' + escape_text(calname),
+        ]
+        if fingerprint:
+            # Empreinte des cours (ade_sync.fingerprint), pour ne pas republier un calendrier inchangé
+            lines.append('X-EDT-FINGERPRINT:' + fingerprint)
+        lines.append('X-WR-TIMEZONE:' + escape_text(timezone))
+        self._write_lines(lines)
+
+    def _write_lines(self, lines):
+        self.stream.write(b''.join(fold_line(line).encode('utf-8') + CRLF for line in lines))
+
+    def write_event(self, event):
+        """
+        Écrit un cours (EventRecord) sous forme de VEVENT
+        """
+        # Ordre canonique d'icalendar: SUMMARY, DTSTART, DTEND, DTSTAMP, UID, SEQUENCE
+        # puis les autres propriétés par ordre alphabétique
+        lines = [
+            'BEGIN:VEVENT',
+            'SUMMARY:' + escape_text(event.summary),
+            'DTSTART:' + format_utc(event.start),
+            'DTEND:' + format_utc(event.end),
+        ]
+        if event.uid:
+            lines.append('DTSTAMP:' + format_utc(event.stamp))
+            lines.append('UID:' + escape_text(event.uid))
+            lines.append(f'SEQUENCE:{event.sequence or 0}')
+        if event.description:
+            lines.append('DESCRIPTION:' + escape_text(event.description))
+        lines.append('LOCATION:' + escape_text(event.location))
+        if event.status:
+            lines.append('STATUS:' + escape_text(event.status))
+        lines.append('END:VEVENT')
+        self._write_lines(lines)
+        self.count += 1
+
+    def close(self):
+        self._write_lines(['END:VCALENDAR'])
+
+
+def write_ics(events, output_file, prodid, calname, **calendar):
+    """
+    Écrit les cours dans output_file au fil de l'eau; le fichier n'est remplacé qu'une fois complet
+    (écriture dans un fichier temporaire puis renommage atomique), un abonné ne lit jamais un calendrier tronqué
+    """
+    directory = os.path.dirname(os.path.abspath(output_file))
+    tmp_path = os.path.join(directory, f".{os.path.basename(output_file)}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            writer = ICSWriter(f, prodid, calname, **calendar)
+            for event in events:
+                writer.write_event(event)
+            writer.close()
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return writer.count
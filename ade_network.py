@@ -0,0 +1,160 @@
+"""
+Politique de chargement des ressources: bloque via CDP (Network.setBlockedURLs) ce dont le scraper
+n'a pas besoin (polices, images, médias, statistiques). Politique par défaut: 'safe' ('none' charge tout).
+
+Rapport optionnel (--resource-report ou ADE_RESOURCE_REPORT=1, journal de performance de Chrome activé
+seulement dans ce cas): requêtes chargées, requêtes bloquées par catégorie et octets économisés, estimés
+d'après une mesure sans blocage enregistrée (exécution avec --resource-policy none --resource-report).
+"""
+from ade_browser import CACHE_DIR
+from datetime import datetime
+import tempfile
+import fnmatch
+import json
+import os
+
+ANALYTICS = ['*google-analytics.com*', '*googletagmanager.com*', '*matomo*', '*piwik*', '*xiti*', '*hotjar*']
+FONTS = ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot']
+MEDIA = ['*.mp4', '*.webm', '*.mp3']
+# Les .gif sont conservés en mode "safe": GXT s'en sert pour les icônes de l'arbre (clear.gif + sprites CSS)
+IMAGES = ['*.png', '*.jpg', '*.jpeg', '*.svg', '*.webp', '*.ico']
+
+CATEGORIES = {'statistiques': ANALYTICS, 'polices': FONTS, 'médias': MEDIA, 'images': IMAGES + ['*.gif'],
+              'css': ['*.css']}
+
+POLICIES = {
+    'none': [],
+    'safe': ANALYTICS + FONTS + MEDIA + IMAGES,
+    'aggressive': ANALYTICS + FONTS + MEDIA + IMAGES + ['*.gif', '*.css'],
+}
+
+SIZES_FILE = os.path.join(CACHE_DIR, 'resource_sizes.json')
+
+
+def category(url):
+    """
+    Catégorie d'une ressource bloquée (statistiques, polices, médias, images, css, autre)
+    """
+    path = url.split('?', 1)[0].lower()
+    for name, patterns in CATEGORIES.items():
+        if any(fnmatch.fnmatch(path if pattern.startswith('*.') else url.lower(), pattern) for pattern in patterns):
+            return name
+    return 'autre'
+
+
+class ResourcePolicy:
+    def __init__(self, name='safe', extra_patterns=None, sizes_file=SIZES_FILE, report=None):
+        if name not in POLICIES:
+            raise ValueError(f"Politique inconnue '{name}' (choix: {', '.join(POLICIES)})")
+        self.name = name
+        self.patterns = POLICIES[name] + list(extra_patterns or [])
+        self.sizes_file = sizes_file
+        self.reporting = report if report is not None else os.environ.get('ADE_RESOURCE_REPORT') == '1'
+
+    def apply_options(self, options):
+        """
+        Active le journal de performance (événements Network) seulement si le rapport est demandé:
+        il est conservé en mémoire par Chrome pendant toute la session
+        """
+        if self.reporting:
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+    def install(self, driver):
+        """
+        Bloque les URL de la politique pour toutes les pages suivantes
+        """
+        if not self.patterns:
+            return
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.patterns})
+            print(f"  Politique de ressources '{self.name}': {len(self.patterns)} motif(s) bloqué(s)")
+        except Exception as e:
+            print(f"  ⚠ Blocage des ressources indisponible: {e}")
+
+    def report(self, driver):
+        """
+        Analyse le journal de performance: requêtes chargées, requêtes bloquées par catégorie et octets économisés
+        (estimés d'après la mesure sans blocage enregistrée). Rien si le rapport n'est pas demandé.
+        """
+        if not self.reporting:
+            return None
+        try:
+            entries = driver.get_log('performance')
+        except Exception:
+            return None
+
+        urls = {}
+        types = {}
+        loaded_bytes = {}
+        blocked = {}
+        for entry in entries:
+            message = json.loads(entry['message'])['message']
+            method, params = message.get('method'), message.get('params', {})
+            if method == 'Network.requestWillBeSent':
+                urls[params['requestId']] = params['request']['url']
+                types[params['requestId']] = params.get('type')
+            elif method == 'Network.loadingFinished':
+                loaded_bytes[params['requestId']] = params.get('encodedDataLength', 0)
+            elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+                blocked[params['requestId']] = params['blockedReason']
+
+        measurement = self._load_sizes()
+        if not self.patterns:
+            # Exécution sans blocage: mesure de référence des ressources statiques (pas les réponses XHR)
+            sizes = {urls[request_id]: size for request_id, size in loaded_bytes.items()
+                     if request_id in urls and size and types.get(request_id) not in ('XHR', 'Fetch', 'Document')}
+            measurement = {'measured_at': datetime.now().isoformat(timespec='seconds'), 'sizes': sizes}
+            self._save_sizes(measurement)
+
+        sizes = measurement.get('sizes', {})
+        blocked_urls = [urls.get(request_id, '') for request_id in blocked]
+        by_category = {}
+        for url in blocked_urls:
+            name = category(url)
+            by_category[name] = by_category.get(name, 0) + 1
+        saved_bytes = sum(sizes.get(url, 0) for url in blocked_urls)
+        unknown = sum(1 for url in blocked_urls if url not in sizes)
+        stats = {
+            'policy': self.name,
+            'requests_loaded': len(loaded_bytes),
+            'bytes_loaded': sum(loaded_bytes.values()),
+            'requests_blocked': len(blocked),
+            'blocked_by_category': by_category,
+            'bytes_saved_estimate': saved_bytes,
+            'blocked_unknown_size': unknown,
+            'measured_at': measurement.get('measured_at'),
+        }
+        print(f"Ressources ({self.name}): {stats['requests_loaded']} chargées ({stats['bytes_loaded'] / 1024:.0f} Ko), "
+              f"{stats['requests_blocked']} bloquées"
+              + (f" ({', '.join(f'{name}: {count}' for name, count in sorted(by_category.items()))})"
+                 if by_category else ""))
+        if blocked:
+            if stats['measured_at']:
+                print(f"  Économie estimée: ≈{saved_bytes / 1024:.0f} Ko d'après la mesure sans blocage du "
+                      f"{stats['measured_at']}" + (f" ({unknown} requête(s) absente(s) de la mesure)" if unknown else ""))
+            else:
+                print("  Économie en octets inconnue: pas de mesure sans blocage "
+                      "(une exécution avec --resource-policy none --resource-report l'enregistre)")
+        return stats
+
+    def _load_sizes(self):
+        """
+        Dernière mesure sans blocage: {'measured_at': date, 'sizes': {url: octets}}
+        """
+        try:
+            with open(self.sizes_file, encoding='utf-8') as f:
+                measurement = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Ancien format (tailles seules, mesurées pendant des exécutions bloquantes): pas une mesure de référence
+        return measurement if 'sizes' in measurement else {}
+
+    def _save_sizes(self, sizes):
+        directory = os.path.dirname(self.sizes_file)
+        os.makedirs(directory, exist_ok=True)
+        # Fichier temporaire unique: navigateurs parallèles dans le même processus
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.sizes_file) + '.', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(sizes, f)
+        os.replace(tmp_path, self.sizes_file)
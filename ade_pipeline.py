@@ -0,0 +1,103 @@
+"""
+Capture et parsing en flux: chaque semaine capturée est parsée dans un thread d'arrière-plan
+pendant que le navigateur charge la semaine suivante.
+Parsing parallèle (processus) de nombreuses semaines déjà capturées: longues périodes, archives.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from ade_grid import grid_events
+import threading
+import os
+import queue
+import time
+
+# Marqueur de fin de capture
+_DONE = object()
+
+
+class ParsePipeline:
+    """
+    File bornée entre la capture (navigateur) et le parsing (thread d'arrière-plan).
+    Au plus `maxsize` semaines attendent en mémoire: submit() bloque si le parsing prend du retard.
+    Les événements sont construits au fur et à mesure, dans l'ordre des semaines soumises.
+
+        with ParsePipeline() as pipeline:
+            for week_content in scraper.iter_schedule(weeks):
+                pipeline.submit(week_content)
+        events = pipeline.events
+    """
+
+    def __init__(self, parse=grid_events, maxsize=2):
+        self.parse = parse
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.events = []
+        self.weeks = 0
+        self.failed = 0
+        self.parse_time = 0.0
+        self.wait_time = 0.0
+        self.thread = threading.Thread(target=self._run, name='ade-parse', daemon=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def submit(self, week_content):
+        """
+        Transmet une semaine capturée (HTML ou grille compacte) au thread de parsing
+        """
+        start = time.time()
+        self.queue.put(week_content)
+        self.wait_time += time.time() - start
+
+    def _run(self):
+        while True:
+            week_content = self.queue.get()
+            if week_content is _DONE:
+                break
+            start = time.time()
+            try:
+                self.events.extend(self.parse(week_content))
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠ Semaine {self.weeks + 1} non parsée: {e}")
+            self.weeks += 1
+            self.parse_time += time.time() - start
+            # Libérer la semaine avant d'attendre la suivante
+            del week_content
+
+    def close(self):
+        """
+        Attend la fin du parsing des semaines en file et retourne les événements
+        """
+        if self.thread.is_alive():
+            self.queue.put(_DONE)
+            self.thread.join()
+        print(f"  Parsing en flux: {self.weeks} semaine(s) en {self.parse_time:.2f}s "
+              f"(capture bloquée {self.wait_time:.2f}s sur la file)")
+        return self.events
+
+
+def parse_weeks(week_contents, workers=1):
+    """
+    Parse des semaines capturées (HTML ou grilles compactes) et retourne leurs cours, dans l'ordre des semaines.
+    workers > 1 répartit les semaines sur autant de processus (0: un par coeur); les EventRecord renvoyés
+    par les processus sont compacts à sérialiser et le résultat est identique au parsing séquentiel.
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(week_contents))
+    if workers <= 1:
+        return [event for week_content in week_contents for event in grid_events(week_content)]
+
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map conserve l'ordre des semaines: fusion déterministe
+        weeks = list(executor.map(grid_events, week_contents))
+    events = [event for week_events in weeks for event in week_events]
+    print(f"  Parsing parallèle: {len(week_contents)} semaine(s) sur {workers} processus en {time.time() - start:.2f}s")
+    return events
@@ -1,20 +1,116 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-from icalendar import Calendar, Event
-from datetime import datetime
 import time
-import re
-import pytz
+import os
+from ade_readiness import PageReadiness
+from ade_browser import create_driver, page_timings, report_startup
+from ade_network import ResourcePolicy
+from ade_grid import EXTRACT_GRID_JS
+from ade_weeks import WeekNavigator, resolve_weeks
+from ade_pipeline import ParsePipeline, parse_weeks
+from ade_archive import WeekArchive
+from ade_sync import publish_ics, sync_with_published, write_if_changed
+from ade_shards import write_shards
+from ade_store import STORE_FILE, update_store
+from ade_refresh import refresh_weeks
+
+# Interface publique anonyme (projet 26)
+PUBLIC_URL = "https://ade-production.ut-capitole.fr/direct/index.jsp?showTree=true&showPianoDays=true&showPianoWeeks=true&showOptions=false&days=0,1,2,3,4,5&displayConfName=Web&projectId=26&login=anonymous"
+
+# Séquence de clics pour déplier l'arborescence (clic sur les icônes)
+NAVIGATION_PATH = [
+    "Groupes d'étudiants",
+    "UFR Informatique",
+    "M1 MIAGE FA-ALT",
+    "IMMGA1AN",
+    "IMMGA1CM",
+    "IMMGA1DO",
+    "IMMGA1DV",
+    "IMMGA1TD"
+]
+
+# Nom du programme dans l'archive des semaines capturées
+PROGRAMME = "M1 MIAGE FA-ALT"
+
+# Éléments finaux à sélectionner avec Ctrl+clic (sélection multiple)
+FINAL_SELECTIONS = [
+    "IMMGA1AN01",
+    "IMMGA1CM01",
+    "IMMGA1DO01",
+    "IMMGA1DV01",
+    "IMMGA1TD01"
+]
+
+# En-tête des calendriers générés
+PRODID = '-//UT Capitole M1 MIAGE FA-ALT//FR'
+CALNAME = 'M1 MIAGE FA-ALT'
+
+# Calendrier d'un seul groupe (--fan-out)
+GROUP_FILE = 'edt_m1_miage_{group}.ics'
+
+# Calendrier publié précédemment, téléchargé par le workflow avant le scraping
+BACKUP_FILE = 'edt_backup.ics'
+# Code de sortie quand le calendrier est identique au calendrier publié: écriture et déploiement inutiles
+EXIT_UNCHANGED = 3
+
+
+def export_ical(events, output_file='edt_m1_miage.ics', previous_file=None, shards_dir=None):
+    """
+    Écrit les événements iCal dans le fichier du calendrier M1 MIAGE FA-ALT
+    (écriture en flux, remplacement atomique du fichier).
+    UID, SEQUENCE et DTSTAMP sont repris du calendrier publié précédemment (edt_backup.ics,
+    sinon le fichier de sortie existant) pour que les abonnés ne resynchronisent que les changements.
+    shards_dir: écrire aussi les calendriers par semaine, par mois et des 14 prochains jours (ade_shards).
+    Retourne None sans réécrire le calendrier si les cours (et les tranches par semaine et par mois) sont ceux
+    de la dernière publication.
+    """
+    if previous_file is None:
+        previous_file = BACKUP_FILE if os.path.exists(BACKUP_FILE) else output_file
+    events = sync_with_published(events, previous_file)
+    # Tranches par semaine ou par mois ajoutées ou modifiées (SHA-256): republier même si l'empreinte des cours
+    # est identique; la fenêtre des 14 prochains jours est rafraîchie sans forcer la publication
+    shards_changed = write_shards(events, shards_dir, PRODID, CALNAME) if shards_dir else False
+    if write_if_changed(events, output_file, previous_file, PRODID, CALNAME, force=shards_changed) is None:
+        return None
+
+    print(f"✓ Fichier iCal généré: {output_file}")
+    return output_file
+
+
+def export_group_icals(group_weeks, workers=1):
+    """
+    Écrit un calendrier par groupe (edt_m1_miage_<groupe>.ics) à partir des semaines capturées de chaque groupe
+    et retourne les cours de tous les groupes pour le calendrier fusionné, sans doublons
+    (un cours commun à plusieurs groupes apparaît dans chaque capture)
+    """
+    merged = {}
+    for group, week_contents in group_weeks:
+        events = parse_weeks(week_contents, workers)
+        print(f"✓ {group}: {len(events)} événements trouvés")
+        output_file = GROUP_FILE.format(group=group)
+        if publish_ics(events, output_file, output_file,
+                       prodid=PRODID, calname=f'{CALNAME} {group}') is not None:
+            print(f"✓ Fichier iCal généré: {output_file}")
+        for event in events:
+            merged.setdefault(event, event)
+    return sorted(merged, key=lambda event: event.start)
+
+
+def store_events(events, args, weeks=None):
+    """
+    Avec --store (ou ADE_STORE): enregistre les semaines capturées dans la base des cours
+    et retourne les cours connus à partir de la semaine courante, captures précédentes comprises
+    """
+    if not (args.store or os.environ.get('ADE_STORE')):
+        return events
+    return update_store(PROGRAMME, events, weeks, args.store)
+
 
 class ADEPublicScraper:
-    def __init__(self):
+    def __init__(self, timeout=30, remote_debugging_port=9222, profile_dir=None, driver_path=None, resource_policy=None,
+                 resource_report=None, archive_dir=None):
         self.base_url = "https://ade-production.ut-capitole.fr/direct/index.jsp"
 
         # Configuration Selenium
@@ -26,27 +122,52 @@ class ADEPublicScraper:
         options.add_argument('--disable-gpu')
         options.add_argument('--disable-extensions')
         options.add_argument('--disable-software-rasterizer')
-        options.add_argument('--remote-debugging-port=9222')
+        # Port fixe pratique pour le debug, à désactiver (None) si plusieurs navigateurs tournent en parallèle
+        if remote_debugging_port:
+            options.add_argument(f'--remote-debugging-port={remote_debugging_port}')
         # User agent pour éviter la détection de bot
         options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
         # Forcer la langue française
         options.add_argument('--lang=fr-FR')
         options.add_experimental_option('prefs', {'intl.accept_languages': 'fr-FR,fr'})
 
-        self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+        # Ressources inutiles au scraping (polices, images, statistiques) bloquées via CDP
+        # (rapport d'économie seulement sur demande: resource_report ou ADE_RESOURCE_REPORT=1)
+        self.resource_policy = ResourcePolicy(resource_policy or os.environ.get('ADE_RESOURCE_POLICY', 'safe'),
+                                              report=resource_report)
+        self.resource_policy.apply_options(options)
+
+        # Profil persistant optionnel (démarrage à chaud) et driver résolu sans accès réseau si possible
+        profile_dir = profile_dir or os.environ.get('ADE_PROFILE_DIR')
+        self.driver, self.startup_metrics = create_driver(options, profile_dir=profile_dir, driver_path=driver_path)
+        self.resource_policy.install(self.driver)
+
+        # Attentes sur signaux réels, bornées par timeout (secondes)
+        self.readiness = PageReadiness(self.driver, timeout=timeout)
+        self.week_navigator = WeekNavigator(self.driver, self.readiness)
+
+        # Archive optionnelle des semaines capturées (reparsing sans navigateur)
+        archive_dir = archive_dir or os.environ.get('ADE_ARCHIVE_DIR')
+        self.archive = WeekArchive(archive_dir) if archive_dir else None
+        # Semaines effectivement affichées et capturées (seules remplacées dans la base des cours)
+        self.captured_weeks = []
 
-    def navigate_and_select_calendar(self):
+    def navigate_and_select_calendar(self, final_selections=None):
         """
         Navigue vers l'emploi du temps public et sélectionne le calendrier M1 MIAGE FA-ALT
+        (final_selections: groupes à sélectionner, par défaut FINAL_SELECTIONS; [] pour seulement déplier l'arbre)
         """
         try:
             print("Accès à l'interface publique...")
-            url = f"{self.base_url}?showTree=true&showPianoDays=true&showPianoWeeks=true&showOptions=false&days=0,1,2,3,4,5&displayConfName=Web&projectId=26&login=anonymous"
+            url = PUBLIC_URL
+            self.readiness.install()
+            start = time.time()
             self.driver.get(url)
 
-            # Attendre que la page se charge (plus long pour CI/CD)
-            print("Attente du chargement de la page (15s)...")
-            time.sleep(15)
+            # Attendre que la page se charge (réseau inactif, au plus self.readiness.timeout)
+            print(f"Attente du chargement de la page (max {self.readiness.timeout}s)...")
+            self.readiness.wait_until_ready(quiet_ms=500)
+            print(f"  Page chargée en {time.time() - start:.1f}s")
 
             # Debug: afficher le titre de la page
             print(f"Titre de la page: {self.driver.title}")
@@ -57,15 +178,23 @@ class ADEPublicScraper:
             try:
                 # Déclencher un resize pour forcer GWT à rendre l'arbre
                 self.driver.execute_script("window.dispatchEvent(new Event('resize'));")
-                time.sleep(1)
+                self.readiness.wait_for_dom_quiet()
 
                 # Resize de la fenêtre (simule F12)
                 current_size = self.driver.get_window_size()
                 print(f"  Resize fenêtre: {current_size['width']}x{current_size['height']}")
                 self.driver.set_window_size(current_size['width'] - 50, current_size['height'])
-                time.sleep(0.5)
+                self.readiness.wait_for_dom_quiet(quiet_ms=100)
                 self.driver.set_window_size(current_size['width'], current_size['height'])
-                time.sleep(2)
+
+                # Attendre que GWT ait rendu les noeuds de l'arbre
+                self.readiness.wait_for_tree()
+                self.readiness.wait_for_dom_quiet()
+
+                # Temps jusqu'au premier rendu de l'arbre (comparaison démarrage à froid / à chaud)
+                self.startup_metrics['time_to_first_render_s'] = round(time.time() - start, 3)
+                self.startup_metrics.update(page_timings(self.driver))
+                report_startup(self.startup_metrics)
 
                 # Debug: lister les éléments visibles dans l'arbre
                 tree_elements = self.driver.find_elements(By.CSS_SELECTOR, ".x-tree3-node-text, .x-grid3-cell-inner")
@@ -75,9 +204,15 @@ class ADEPublicScraper:
                     print(f"  Exemples: {sample}")
                 else:
                     # Essayer d'autres sélecteurs
-                    all_spans = self.driver.find_elements(By.TAG_NAME, "span")
-                    texts = [s.text.strip() for s in all_spans if s.text.strip() and len(s.text.strip()) < 50][:10]
-                    print(f"  Spans trouvés ({len(all_spans)}): {texts}")
+                    spans_count, texts = self.driver.execute_script("""
+                        var spans = document.getElementsByTagName('span'), texts = [];
+                        for (var i = 0; i < spans.length && texts.length < 10; i++) {
+                            var t = (spans[i].innerText || '').trim();
+                            if (t && t.length < 50) { texts.push(t); }
+                        }
+                        return [spans.length, texts];
+                    """)
+                    print(f"  Spans trouvés ({spans_count}): {texts}")
 
                 # Sauvegarder une capture d'écran pour debug
                 screenshot_path = "debug_screenshot.png"
@@ -87,141 +222,83 @@ class ADEPublicScraper:
             except Exception as e:
                 print(f"  ⚠ Erreur lors du forçage GWT: {e}")
 
-            # Séquence de clics pour déplier l'arborescence (clic sur les icônes)
-            navigation_path = [
-                "Groupes d'étudiants",
-                "UFR Informatique",
-                "M1 MIAGE FA-ALT",
-                "IMMGA1AN",
-                "IMMGA1CM",
-                "IMMGA1DO",
-                "IMMGA1DV",
-                "IMMGA1TD"
-            ]
-
-            # Éléments finaux à sélectionner avec Ctrl+clic (sélection multiple)
-            final_selections = [
-                "IMMGA1AN01",
-                "IMMGA1CM01",
-                "IMMGA1DO01",
-                "IMMGA1DV01",
-                "IMMGA1TD01"
-            ]
+            navigation_path = NAVIGATION_PATH
+            if final_selections is None:
+                final_selections = FINAL_SELECTIONS
 
             # Combiner pour la boucle de navigation
             selections = navigation_path
 
-            # Fonction pour attendre qu'un élément apparaisse
-            def wait_for_element(text_to_find, timeout=20):
-                """Attendre qu'un élément contenant le texte apparaisse dans le DOM"""
-                print(f"  Attente de l'apparition de '{text_to_find}' (max {timeout}s)...")
-                start_time = time.time()
-                attempt = 0
-
-                while time.time() - start_time < timeout:
-                    attempt += 1
-                    elements = self.driver.find_elements(By.TAG_NAME, "span")
-                    elements.extend(self.driver.find_elements(By.TAG_NAME, "div"))
-
-                    for elem in elements:
-                        try:
-                            elem_text = elem.text.strip()
-                            is_match = (elem_text == text_to_find or
-                                       elem_text.startswith(text_to_find + '\n') or
-                                       (text_to_find in elem_text and len(elem_text) < 100))
-                            if is_match:
-                                elapsed = int(time.time() - start_time)
-                                print(f"  ✓ Élément trouvé après {elapsed}s (tentative #{attempt})")
-                                return True
-                        except:
-                            continue
-
-                    time.sleep(1)
-
-                elapsed = int(time.time() - start_time)
-                print(f"  ✗ Timeout après {elapsed}s ({attempt} tentatives)")
-                return False
-
             for i, text_to_find in enumerate(selections):
                 print(f"Recherche de: '{text_to_find}'...")
 
                 try:
-                    # Attendre que l'élément soit présent dans le DOM
-                    if not wait_for_element(text_to_find, timeout=25):
+                    # Attendre que l'élément soit présent dans le DOM (recherche faite dans le navigateur)
+                    # Règles: texte exact, commence par, ou contient mais court
+                    matches = self.readiness.find_by_text(text_to_find, timeout=25)
+                    if not matches:
                         print(f"✗ Impossible de trouver '{text_to_find}' (timeout)")
                         return False
 
-                    # Chercher tous les spans et divs
-                    all_elements = self.driver.find_elements(By.TAG_NAME, "span")
-                    all_elements.extend(self.driver.find_elements(By.TAG_NAME, "div"))
-
                     found = False
-                    for elem in all_elements:
+                    for elem, elem_text in matches:
                         try:
-                            elem_text = elem.text.strip()
-                            # Recherche plus stricte: texte exact, commence par, ou contient mais court
-                            is_match = (elem_text == text_to_find or
-                                       elem_text.startswith(text_to_find + '\n') or
-                                       (text_to_find in elem_text and len(elem_text) < 100))
+                            print(f"  Trouvé: '{elem_text[:80]}...' " if len(elem_text) > 80 else f"  Trouvé: '{elem_text}'")
 
-                            if is_match:
-                                print(f"  Trouvé: '{elem_text[:80]}...' " if len(elem_text) > 80 else f"  Trouvé: '{elem_text}'")
+                            # Scroller vers l'élément
+                            self.driver.execute_script("arguments[0].scrollIntoView(true);", elem)
 
-                                # Scroller vers l'élément
-                                self.driver.execute_script("arguments[0].scrollIntoView(true);", elem)
-                                time.sleep(1)
+                            # Pour tous les éléments de navigation, cliquer sur l'icône pour déployer
+                            try:
+                                # Récupérer la div parente du span
+                                parent_div = elem.find_element(By.XPATH, "..")
 
-                                # Pour tous les éléments de navigation, cliquer sur l'icône pour déployer
+                                # Chercher l'image avec la classe x-tree3-node-joint dans cette div
                                 try:
-                                    # Récupérer la div parente du span
-                                    parent_div = elem.find_element(By.XPATH, "..")
-
-                                    # Chercher l'image avec la classe x-tree3-node-joint dans cette div
-                                    try:
-                                        tree_icon = parent_div.find_element(By.CSS_SELECTOR, "img.x-tree3-node-joint")
-                                        print(f"  Icône trouvée dans la div parente")
-                                    except:
-                                        # Si pas trouvée directement, chercher dans tous les enfants
-                                        tree_icon = parent_div.find_element(By.TAG_NAME, "img")
-                                        print(f"  Image trouvée dans la div parente")
-
-                                    # Cliquer sur l'icône (sans scroll pour éviter les bugs)
-                                    tree_icon.click()
-                                    print(f"✓ Cliqué sur l'icône de: '{text_to_find}'")
-                                    found = True
-                                    break
-                                except Exception as e1:
-                                    # Si pas d'icône trouvée, essayer via JavaScript
-                                    try:
-                                        print(f"  Tentative JS... ({e1})")
-                                        result = self.driver.execute_script("""
-                                            var span = arguments[0];
-                                            var parentDiv = span.parentElement;
-
-                                            // Chercher l'image dans la même div
-                                            var icon = parentDiv.querySelector('img.x-tree3-node-joint');
-                                            if (!icon) {
-                                                // Si pas trouvée, chercher n'importe quelle image
-                                                icon = parentDiv.querySelector('img');
-                                            }
-
-                                            if (icon) {
-                                                icon.click();
-                                                return true;
-                                            }
-                                            return false;
-                                        """, elem)
-
-                                        if result:
-                                            print(f"✓ Cliqué (JS) sur l'icône de: '{text_to_find}'")
-                                            found = True
-                                            break
-                                        else:
-                                            print(f"  Aucune icône trouvée via JS")
-                                            continue
-                                    except Exception as e2:
-                                        print(f"  Erreur JS: {e2}")
+                                    tree_icon = parent_div.find_element(By.CSS_SELECTOR, "img.x-tree3-node-joint")
+                                    print(f"  Icône trouvée dans la div parente")
+                                except:
+                                    # Si pas trouvée directement, chercher dans tous les enfants
+                                    tree_icon = parent_div.find_element(By.TAG_NAME, "img")
+                                    print(f"  Image trouvée dans la div parente")
+
+                                # Cliquer sur l'icône (sans scroll pour éviter les bugs)
+                                tree_icon.click()
+                                print(f"✓ Cliqué sur l'icône de: '{text_to_find}'")
+                                found = True
+                                break
+                            except Exception as e1:
+                                # Si pas d'icône trouvée, essayer via JavaScript
+                                try:
+                                    print(f"  Tentative JS... ({e1})")
+                                    result = self.driver.execute_script("""
+                                        var span = arguments[0];
+                                        var parentDiv = span.parentElement;
+
+                                        // Chercher l'image dans la même div
+                                        var icon = parentDiv.querySelector('img.x-tree3-node-joint');
+                                        if (!icon) {
+                                            // Si pas trouvée, chercher n'importe quelle image
+                                            icon = parentDiv.querySelector('img');
+                                        }
+
+                                        if (icon) {
+                                            icon.click();
+                                            return true;
+                                        }
+                                        return false;
+                                    """, elem)
+
+                                    if result:
+                                        print(f"✓ Cliqué (JS) sur l'icône de: '{text_to_find}'")
+                                        found = True
+                                        break
+                                    else:
+                                        print(f"  Aucune icône trouvée via JS")
                                         continue
+                                except Exception as e2:
+                                    print(f"  Erreur JS: {e2}")
+                                    continue
                         except:
                             continue
 
@@ -232,9 +309,9 @@ class ADEPublicScraper:
                     # Debug: afficher l'index
                     print(f"  [Debug] i={i}, total={len(selections)}")
 
-                    # Attendre que l'animation de dépliage se termine et scroller
+                    # Attendre que le dépliage soit chargé (requête GWT) et rendu, puis scroller
                     print(f"  → Démarrage du scroll (élément {i+1}/{len(selections)})...")
-                    time.sleep(2)
+                    self.readiness.wait_until_ready()
 
                     # Scroller le conteneur scrollable de l'arbre
                     try:
@@ -268,28 +345,28 @@ class ADEPublicScraper:
                         print(f"  → Résultat: {result}")
 
                         if result.get('found'):
-                            print(f"  → Attente du lazy loading (1s)...")
-                            time.sleep(1)
+                            print(f"  → Attente du lazy loading...")
+                            self.readiness.wait_until_ready()
 
                             # Forcer GWT à re-render comme quand on ouvre F12
                             print(f"  → Déclenchement d'un resize pour forcer le re-render...")
                             self.driver.execute_script("""
                                 window.dispatchEvent(new Event('resize'));
                             """)
-                            time.sleep(0.5)
+                            self.readiness.wait_for_dom_quiet(quiet_ms=100)
 
                             # Redimensionner légèrement la fenêtre (comme F12)
                             current_size = self.driver.get_window_size()
                             print(f"  → Resize fenêtre {current_size['width']} -> {current_size['width'] - 10} -> {current_size['width']}")
                             self.driver.set_window_size(current_size['width'] - 10, current_size['height'])
-                            time.sleep(0.3)
+                            self.readiness.wait_for_dom_quiet(quiet_ms=100)
                             self.driver.set_window_size(current_size['width'], current_size['height'])
-                            time.sleep(1)
+                            self.readiness.wait_for_dom_quiet()
 
                             print(f"  ✓ Re-render forcé !")
                         else:
-                            print(f"  ⚠ Conteneur non trouvé, attente de 1s...")
-                            time.sleep(1)
+                            print(f"  ⚠ Conteneur non trouvé, attente du DOM stable...")
+                            self.readiness.wait_for_dom_quiet()
 
                         print(f"  ✓ Scroll effectué !")
                     except Exception as e:
@@ -300,7 +377,7 @@ class ADEPublicScraper:
                     return False
 
             print("✓ Navigation terminée, démarrage de la sélection multiple...")
-            time.sleep(2)
+            self.readiness.wait_until_ready()
 
             # Scroller au milieu de la liste pour voir tous les éléments à sélectionner
             print("Scroll vers le milieu de l'arbre pour voir tous les éléments...")
@@ -310,17 +387,17 @@ class ADEPublicScraper:
                     scroller.scrollTop = scroller.scrollHeight / 2;
                 }
             """)
-            time.sleep(1)
+            self.readiness.wait_until_ready()
 
             # Forcer le re-render après le scroll au milieu
             print("Forcer le re-render après scroll au milieu...")
             self.driver.execute_script("window.dispatchEvent(new Event('resize'));")
-            time.sleep(0.5)
+            self.readiness.wait_for_dom_quiet(quiet_ms=100)
             current_size = self.driver.get_window_size()
             self.driver.set_window_size(current_size['width'] - 10, current_size['height'])
-            time.sleep(0.3)
+            self.readiness.wait_for_dom_quiet(quiet_ms=100)
             self.driver.set_window_size(current_size['width'], current_size['height'])
-            time.sleep(1)
+            self.readiness.wait_for_dom_quiet()
 
             # Sélection multiple avec Ctrl+clic sur les éléments finaux
             from selenium.webdriver.common.keys import Keys
@@ -330,66 +407,60 @@ class ADEPublicScraper:
                 print(f"Sélection de '{element_name}' ({idx+1}/{len(final_selections)})...")
 
                 try:
-                    # Attendre que l'élément soit présent
-                    if not wait_for_element(element_name, timeout=15):
+                    # Attendre que l'élément soit présent (texte exact ou contenu dans un texte court)
+                    matches = self.readiness.find_by_text(element_name, timeout=15, allow_prefix=False)
+                    if not matches:
                         print(f"  ⚠ Élément '{element_name}' non trouvé, skip...")
                         continue
 
-                    # Chercher l'élément
-                    all_elements = self.driver.find_elements(By.TAG_NAME, "span")
-                    all_elements.extend(self.driver.find_elements(By.TAG_NAME, "div"))
-
                     found = False
-                    for elem in all_elements:
+                    for elem, elem_text in matches:
                         try:
-                            elem_text = elem.text.strip()
-                            if elem_text == element_name or element_name in elem_text and len(elem_text) < 100:
-                                print(f"  Trouvé: '{elem_text}' (tag={elem.tag_name}, visible={elem.is_displayed()})")
-
-                                # Scroller vers l'élément pour qu'il soit visible
-                                self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", elem)
-                                time.sleep(0.5)
+                            print(f"  Trouvé: '{elem_text}' (tag={elem.tag_name}, visible={elem.is_displayed()})")
 
-                                # Ctrl+clic pour sélection multiple
-                                # Le premier élément doit être cliqué normalement, les autres avec Ctrl
-                                try:
-                                    if idx == 0:
-                                        # Premier élément: clic simple
-                                        elem.click()
-                                        print(f"  ✓ Clic simple effectué sur '{element_name}' (premier élément)")
-                                    else:
-                                        # Éléments suivants: Ctrl+clic
-                                        actions = ActionChains(self.driver)
-                                        # Utiliser COMMAND sur Mac, CONTROL sinon
-                                        ctrl_key = Keys.COMMAND if 'mac' in self.driver.capabilities.get('platformName', '').lower() else Keys.CONTROL
-                                        actions.key_down(ctrl_key)
-                                        actions.click(elem)
-                                        actions.key_up(ctrl_key)
-                                        actions.perform()
-                                        print(f"  ✓ Ctrl+Clic effectué sur '{element_name}' (avec {ctrl_key})")
-                                except Exception as click_error:
-                                    # Si ActionChains échoue, essayer avec JavaScript
-                                    print(f"  ⚠ Erreur ActionChains: {click_error}, tentative JS...")
-                                    if idx == 0:
-                                        self.driver.execute_script("arguments[0].click();", elem)
-                                        print(f"  ✓ Clic simple JS effectué sur '{element_name}'")
-                                    else:
-                                        # Simuler Ctrl+clic avec JavaScript
-                                        self.driver.execute_script("""
-                                            var elem = arguments[0];
-                                            var evt = new MouseEvent('click', {
-                                                bubbles: true,
-                                                cancelable: true,
-                                                view: window,
-                                                ctrlKey: true,
-                                                metaKey: true  // Pour Mac
-                                            });
-                                            elem.dispatchEvent(evt);
-                                        """, elem)
-                                        print(f"  ✓ Ctrl+Clic JS effectué sur '{element_name}'")
+                            # Scroller vers l'élément pour qu'il soit visible
+                            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", elem)
 
-                                found = True
-                                break
+                            # Ctrl+clic pour sélection multiple
+                            # Le premier élément doit être cliqué normalement, les autres avec Ctrl
+                            try:
+                                if idx == 0:
+                                    # Premier élément: clic simple
+                                    elem.click()
+                                    print(f"  ✓ Clic simple effectué sur '{element_name}' (premier élément)")
+                                else:
+                                    # Éléments suivants: Ctrl+clic
+                                    actions = ActionChains(self.driver)
+                                    # Utiliser COMMAND sur Mac, CONTROL sinon
+                                    ctrl_key = Keys.COMMAND if 'mac' in self.driver.capabilities.get('platformName', '').lower() else Keys.CONTROL
+                                    actions.key_down(ctrl_key)
+                                    actions.click(elem)
+                                    actions.key_up(ctrl_key)
+                                    actions.perform()
+                                    print(f"  ✓ Ctrl+Clic effectué sur '{element_name}' (avec {ctrl_key})")
+                            except Exception as click_error:
+                                # Si ActionChains échoue, essayer avec JavaScript
+                                print(f"  ⚠ Erreur ActionChains: {click_error}, tentative JS...")
+                                if idx == 0:
+                                    self.driver.execute_script("arguments[0].click();", elem)
+                                    print(f"  ✓ Clic simple JS effectué sur '{element_name}'")
+                                else:
+                                    # Simuler Ctrl+clic avec JavaScript
+                                    self.driver.execute_script("""
+                                        var elem = arguments[0];
+                                        var evt = new MouseEvent('click', {
+                                            bubbles: true,
+                                            cancelable: true,
+                                            view: window,
+                                            ctrlKey: true,
+                                            metaKey: true  // Pour Mac
+                                        });
+                                        elem.dispatchEvent(evt);
+                                    """, elem)
+                                    print(f"  ✓ Ctrl+Clic JS effectué sur '{element_name}'")
+
+                            found = True
+                            break
                         except Exception as e:
                             print(f"  ⚠ Erreur sur élément: {e}")
                             continue
@@ -397,7 +468,8 @@ class ADEPublicScraper:
                     if not found:
                         print(f"  ⚠ Impossible de cliquer sur '{element_name}'")
 
-                    time.sleep(0.5)
+                    # Laisser GWT enregistrer la sélection avant le clic suivant
+                    self.readiness.wait_for_dom_quiet(quiet_ms=200)
 
                 except Exception as e:
                     print(f"  ✗ Erreur sur '{element_name}': {e}")
@@ -406,7 +478,7 @@ class ADEPublicScraper:
 
             # Attendre que le planning se charge complètement
             print("Attente du chargement complet du planning...")
-            time.sleep(8)
+            self.readiness.wait_for_events_stable()
 
             return True
 
@@ -414,292 +486,340 @@ class ADEPublicScraper:
             print(f"✗ Erreur lors de la navigation: {e}")
             return False
 
-    def get_schedule(self, weeks=2):
+    def capture_week(self, extract='html'):
         """
-        Récupère le HTML de l'emploi du temps pour plusieurs semaines
+        Capture la semaine affichée: HTML complet ou grille compacte (quelques Ko de JSON)
         """
-        all_html = []
+        if extract == 'grid':
+            return self.driver.execute_script(EXTRACT_GRID_JS)
+        return self.driver.page_source
 
-        try:
-            # Le planning devrait déjà être chargé après la sélection
-            print("Récupération du planning...")
-            time.sleep(2)
-
-            for week in range(weeks):
-                print(f"Récupération semaine {week + 1}/{weeks}...")
+    def select_only(self, element_name):
+        """
+        Sélectionne un seul élément de l'arbre déjà déplié (clic simple: remplace la sélection courante)
+        et attend le rechargement du planning
+        """
+        matches = self.readiness.find_by_text(element_name, timeout=15, allow_prefix=False)
+        if not matches:
+            print(f"  ⚠ Élément '{element_name}' non trouvé")
+            return False
 
-                # Récupérer le HTML de la semaine actuelle
-                all_html.append(self.driver.page_source)
+        elem = matches[0][0]
+        self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", elem)
+        self.readiness.mark()
+        try:
+            elem.click()
+        except Exception:
+            self.driver.execute_script("arguments[0].click();", elem)
+        print(f"  ✓ Sélection de '{element_name}'")
+        self.readiness.wait_for_events_stable()
+        return True
+
+    def iter_group_schedules(self, groups, weeks=2, extract='html'):
+        """
+        Capture les semaines de chaque groupe dans la même session (générateur de (groupe, semaines capturées)):
+        l'arbre reste déplié, seul le groupe sélectionné change, puis navigation directe entre les semaines.
+        Les semaines sont parcourues alternativement dans un sens puis dans l'autre: la première semaine
+        d'un groupe est celle déjà affichée pour le groupe précédent.
+        """
+        targets = resolve_weeks(weeks)
+        for idx, group in enumerate(groups):
+            print(f"Groupe '{group}' ({idx + 1}/{len(groups)})...")
+            if not self.select_only(group):
+                continue
+            backwards = idx % 2 == 1
+            week_contents = list(self.iter_schedule(targets[::-1] if backwards else targets, extract,
+                                                    programme=f"{PROGRAMME}/{group}"))
+            yield group, week_contents[::-1] if backwards else week_contents
+
+    def iter_schedule(self, weeks=2, extract='html', programme=PROGRAMME):
+        """
+        Capture les semaines demandées une à une (générateur): un nombre de semaines à partir de la semaine courante,
+        une sélection ("36-52", "2025-11-17:2025-12-31", voir ade_weeks) ou une liste de numéros de semaine.
+        extract='html': HTML complet de la page, extract='grid': grille compacte extraite dans le navigateur
+        programme: nom des semaines dans l'archive
+        """
+        captured = 0
 
-                # Passer à la semaine suivante (même logique que le script précédent)
-                if week < weeks - 1:
-                    try:
-                        all_buttons = self.driver.find_elements(By.TAG_NAME, "button")
-                        week_buttons = []
-                        current_week_text = None
+        # Le planning devrait déjà être chargé après la sélection
+        print("Récupération du planning...")
+        self.readiness.wait_for_events_stable()
 
-                        for btn in all_buttons:
-                            try:
-                                btn_text = btn.text.strip()
-                                if btn_text and re.match(r'^\(\d+\)', btn_text):
-                                    week_buttons.append(btn)
-                                    aria_pressed = btn.get_attribute('aria-pressed')
-                                    if aria_pressed == 'true':
-                                        current_week_text = btn_text
-                            except:
-                                continue
-
-                        if not current_week_text and week_buttons:
-                            current_week_text = week_buttons[0].text
-
-                        print(f"  Semaine actuelle: {current_week_text}")
-
-                        week_match = re.search(r'\((\d+)\)', current_week_text)
-
-                        if week_match:
-                            current_week_num = int(week_match.group(1))
-                            next_week_num = current_week_num + 1
-
-                            for btn in week_buttons:
-                                btn_text = btn.text.strip()
-                                if f"({next_week_num})" in btn_text:
-                                    try:
-                                        self.driver.execute_script("arguments[0].scrollIntoView(true);", btn)
-                                        time.sleep(0.5)
-                                        btn.click()
-
-                                        wait = WebDriverWait(self.driver, 10)
-                                        wait.until(lambda d: btn.get_attribute('aria-pressed') == 'true')
-                                        print(f"  → Navigation vers: {btn_text}")
-                                        break
-                                    except:
-                                        self.driver.execute_script("arguments[0].click();", btn)
-                                        time.sleep(2)
-                                        break
+        # Index des boutons de semaine construit une seule fois, puis navigation directe
+        targets = resolve_weeks(weeks)
+        self.week_navigator.build_index()
 
-                        time.sleep(5)
+        for idx, week_number in enumerate(targets):
+            print(f"Récupération semaine {week_number} ({idx + 1}/{len(targets)})...")
+            if not self.week_navigator.goto(week_number):
+                continue
 
-                    except Exception as e:
-                        print(f"⚠ Erreur navigation: {e}")
-                        break
+            # Récupérer la semaine actuelle
+            week_content = self.capture_week(extract)
+            if self.archive:
+                self.archive.put(week_content, programme, week_number)
+            if week_number not in self.captured_weeks:
+                self.captured_weeks.append(week_number)
+            yield week_content
+            captured += 1
 
-            print(f"✓ {len(all_html)} semaine(s) récupérée(s)")
-            return all_html
+        print(f"✓ {captured} semaine(s) récupérée(s)")
 
+    def get_schedule(self, weeks=2, extract='html'):
+        """
+        Récupère l'emploi du temps des semaines demandées (voir iter_schedule), retourne la liste des semaines capturées
+        """
+        try:
+            return list(self.iter_schedule(weeks, extract))
         except Exception as e:
             print(f"✗ Erreur: {e}")
             return None
 
-    def parse_and_export_ical(self, html_content_list):
+    @classmethod
+    def capture_week_range(cls, weeks, worker=0, timeout=30, profile_dir=None, resource_policy=None, resource_report=None,
+                           extract='html', archive_dir=None):
+        """
+        Ouvre son propre navigateur, sélectionne le calendrier et capture les semaines `weeks` (liste de numéros)
+        (utilisé par ade_capture pour les captures en parallèle)
+        """
+        # Un profil Chrome ne peut être ouvert que par un navigateur à la fois: un profil par navigateur,
+        # indexé par son rang pour être réutilisé (à chaud) quelles que soient les semaines capturées
+        profile_dir = profile_dir or os.environ.get('ADE_PROFILE_DIR')
+        if profile_dir:
+            profile_dir = f"{profile_dir}-{worker}"
+        scraper = cls(timeout=timeout, remote_debugging_port=None, profile_dir=profile_dir, resource_policy=resource_policy,
+                      resource_report=resource_report, archive_dir=archive_dir)
+        try:
+            if not scraper.navigate_and_select_calendar():
+                return None
+            return scraper.get_schedule(weeks=weeks, extract=extract)
+        finally:
+            scraper.close()
+
+    @staticmethod
+    def parse_and_export_ical(html_content_list, workers=1, previous_file=None):
         """
-        Parse le HTML et crée un fichier iCal (même logique que le script précédent)
+        Parse les semaines capturées (HTML complet ou grille compacte) et crée un fichier iCal
+        (fichier None si le calendrier publié est inchangé)
         """
         if not isinstance(html_content_list, list):
             html_content_list = [html_content_list]
 
-        paris_tz = pytz.timezone('Europe/Paris')
-
-        cal = Calendar()
-        cal.add('prodid', '-//UT Capitole M1 MIAGE FA-ALT//FR')
-        cal.add('version', '2.0')
-        cal.add('X-WR-CALNAME', 'M1 MIAGE FA-ALT')
-        cal.add('X-WR-TIMEZONE', 'Europe/Paris')
-        cal.add('method', 'PUBLISH')
-
         print("Parsing des événements...")
 
-        events_found = 0
-
-        for week_idx, html_content in enumerate(html_content_list):
-            soup = BeautifulSoup(html_content, 'html.parser')
-
-            # Calibration automatique
-            hour_labels = soup.find_all('div', class_='slot')
-            pixels_per_hour = None
-
-            for i, label in enumerate(hour_labels):
-                text = label.get_text(strip=True)
-                style = label.get('style', '')
-
-                if '08h00' in text:
-                    match_8h = re.search(r'top:\s*(\d+)px', style)
-                    if match_8h:
-                        top_8h = int(match_8h.group(1))
-                elif '09h00' in text and 'top_8h' in locals():
-                    match_9h = re.search(r'top:\s*(\d+)px', style)
-                    if match_9h:
-                        top_9h = int(match_9h.group(1))
-                        pixels_per_hour = top_9h - top_8h
-                        hour_offset = top_8h
-                        print(f"  Calibration: {pixels_per_hour}px/heure, offset={hour_offset}px")
-                        break
-
-            if not pixels_per_hour:
-                pixels_per_hour = 17.5
-                hour_offset = 17
-                print(f"  Calibration par défaut: {pixels_per_hour}px/heure")
-
-            # Extraire les dates
-            day_labels = soup.find_all('div', class_='labelLegend')
-            days_mapping = {}
-            day_positions = []
-
-            for label in day_labels:
-                style = label.get('style', '')
-                text = label.get_text(strip=True)
-
-                if '/' in text and any(day in text for day in ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']):
-                    left_match = re.search(r'left:(\d+)px', style)
-                    date_match = re.search(r'(\d{2})/(\d{2})/(\d{4})', text)
-
-                    if left_match and date_match:
-                        left_pos = int(left_match.group(1))
-                        day = int(date_match.group(1))
-                        month = int(date_match.group(2))
-                        year = int(date_match.group(3))
-                        days_mapping[left_pos] = datetime(year, month, day)
-                        day_positions.append(left_pos)
-
-            # Calculer largeur colonne
-            if len(day_positions) >= 2:
-                day_positions.sort()
-                column_width = day_positions[1] - day_positions[0]
-                print(f"  Largeur colonne: {column_width}px")
-            else:
-                column_width = 115
-
-            # Parser les événements
-            event_divs = soup.find_all('div', attrs={'aria-label': True, 'class': 'eventText'})
-
-            for event_div in event_divs:
-                try:
-                    parent = event_div.find_parent('div', style=lambda s: s and 'position: absolute' in s)
-                    if not parent or not parent.get('style'):
-                        continue
-
-                    style = parent.get('style')
-                    left_match = re.search(r'left:\s*(\d+)px', style)
-                    top_match = re.search(r'top:\s*(\d+)px', style)
-
-                    if not left_match or not top_match:
-                        continue
-
-                    left = int(left_match.group(1))
-                    top = int(top_match.group(1))
-
-                    day_column = left // column_width
-
-                    base_date = None
-                    sorted_days = sorted(days_mapping.items())
-                    for i, (day_left, date) in enumerate(sorted_days):
-                        if i == day_column:
-                            base_date = date
-                            break
-
-                    if not base_date:
-                        continue
-
-                    # Calcul heure
-                    event_offset = 8
-                    hours_from_8am = (top - hour_offset - event_offset) / pixels_per_hour
-                    start_hour_float = 8 + hours_from_8am
+        events = parse_weeks(html_content_list, workers)
 
-                    if start_hour_float < 0 or start_hour_float > 23:
-                        continue
-
-                    # Durée
-                    table = parent.find('table', class_='event')
-                    if table and table.get('style'):
-                        height_match = re.search(r'height:(\d+)px', table.get('style'))
-                        if height_match:
-                            height = int(height_match.group(1))
-                            duration_hours = height / pixels_per_hour
-                        else:
-                            duration_hours = 1.5
-                    else:
-                        duration_hours = 1.5
+        print(f"✓ {len(events)} événements trouvés")
 
-                    # Arrondir
-                    def round_to_15min(hour_float):
-                        total_minutes = hour_float * 60
-                        rounded_minutes = round(total_minutes / 15) * 15
-                        return int(rounded_minutes // 60), int(rounded_minutes % 60)
+        output_file = export_ical(events, previous_file=previous_file)
+        return output_file, len(events)
 
-                    start_hour, start_minute = round_to_15min(start_hour_float)
-                    end_hour, end_minute = round_to_15min(start_hour_float + duration_hours)
-
-                    if not (0 <= start_hour <= 23) or not (0 <= end_hour <= 23):
-                        continue
+    def close(self):
+        """
+        Ferme le navigateur
+        """
+        if self.driver:
+            self.resource_policy.report(self.driver)
+            self.driver.quit()
 
-                    start_time = paris_tz.localize(base_date.replace(hour=start_hour, minute=start_minute))
-                    end_time = paris_tz.localize(base_date.replace(hour=end_hour, minute=end_minute))
 
-                    # Extraire infos
-                    aria_label = event_div.get('aria-label', '')
-                    lines = [line.strip() for line in aria_label.split('null') if line.strip()]
+def run_http_backend(args):
+    """
+    Récupère le calendrier sans navigateur via le backend HTTP
+    """
+    import sys
+    from ade_http import ADEHttpClient
 
-                    summary = lines[0] if lines else "Cours"
-                    description_parts = lines[1:] if len(lines) > 1 else []
-                    description = '\n'.join(description_parts)
+    client = ADEHttpClient(base_url=args.base_url, record_dir=args.record_dir)
+    try:
+        events = client.fetch_events(FINAL_SELECTIONS, NAVIGATION_PATH, weeks=args.weeks)
+    except Exception as e:
+        print(f"\n❌ Erreur backend HTTP: {e}")
+        sys.exit(1)
+    finally:
+        client.close()
 
-                    # Créer événement
-                    event = Event()
-                    event.add('summary', summary)
-                    event.add('dtstart', start_time.astimezone(pytz.UTC))
-                    event.add('dtend', end_time.astimezone(pytz.UTC))
-                    if description:
-                        event.add('description', description)
-                    event.add('location', description_parts[0] if description_parts else '')
+    if not events:
+        print("\n❌ Aucun événement trouvé - le fichier ne sera pas utilisé")
+        sys.exit(1)
 
-                    cal.add_component(event)
-                    events_found += 1
+    events = store_events(events, args, resolve_weeks(args.weeks))
+    ical_file = export_ical(events, previous_file=args.previous, shards_dir=args.shards)
+    if ical_file is None:
+        sys.exit(EXIT_UNCHANGED)
+    print(f"\nFichier généré: {ical_file}")
+    print(f"Événements: {len(events)}")
+    sys.exit(0)
 
-                except Exception as e:
-                    continue
 
-        print(f"✓ {events_found} événements trouvés")
+def run_archive_backend(args):
+    """
+    Reconstruit le calendrier à partir de l'archive des semaines capturées, sans navigateur
+    """
+    import sys
 
-        output_file = 'edt_m1_miage.ics'
-        with open(output_file, 'wb') as f:
-            f.write(cal.to_ical())
+    weeks = None if args.weeks == 'all' else resolve_weeks(args.weeks)
+    archive = WeekArchive(args.archive)
+    week_contents = archive.load_weeks(PROGRAMME, weeks)
+    if not week_contents:
+        print("\n❌ Aucune semaine archivée - le fichier ne sera pas utilisé")
+        sys.exit(1)
 
-        print(f"✓ Fichier iCal généré: {output_file}")
-        return output_file, events_found
+    events = parse_weeks(week_contents, args.parse_workers)
+    if not events:
+        print("\n❌ Aucun événement trouvé - le fichier ne sera pas utilisé")
+        sys.exit(1)
 
-    def close(self):
-        """
-        Ferme le navigateur
-        """
-        if self.driver:
-            self.driver.quit()
+    print(f"✓ {len(events)} événements trouvés")
+    # Seules les semaines présentes dans l'archive remplacent celles de la base
+    events = store_events(events, args, archive.loaded_weeks if weeks else None)
+    ical_file = export_ical(events, previous_file=args.previous, shards_dir=args.shards)
+    if ical_file is None:
+        sys.exit(EXIT_UNCHANGED)
+    print(f"\nFichier généré: {ical_file}")
+    print(f"Événements: {len(events)}")
+    sys.exit(0)
 
 
 def main():
     import sys
+    import argparse
+    from functools import partial
+    from ade_http import ADE_HOST
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        # Sous-commande: serveur local du calendrier pour les abonnés (voir ade_server)
+        from ade_server import main as serve
+        serve(sys.argv[2:], ics_file='edt_m1_miage.ics', programme=PROGRAMME,
+              prodid=PRODID, calname=CALNAME)
+        return
+
+    parser = argparse.ArgumentParser(description="ADE Public Scraper - M1 MIAGE FA-ALT",
+                                     epilog="Sous-commande: serve [--port 8000] (serveur local du calendrier, "
+                                            "voir ade_server.py)")
+    parser.add_argument('--backend', choices=['selenium', 'http', 'archive'], default='selenium',
+                        help="selenium: navigateur Chrome (défaut), http: requêtes HTTP directes sans navigateur, "
+                             "archive: semaines déjà capturées (voir --archive)")
+    parser.add_argument('--weeks', default='2',
+                        help="Nombre de semaines à partir de la semaine courante, ou sélection: 36-52, 36,40-42, 2025-11-17:2025-12-31 "
+                             "(backend archive: 'all' pour toutes les semaines archivées)")
+    parser.add_argument('--archive', help="Archiver chaque semaine capturée dans ce dossier (ou ADE_ARCHIVE_DIR); "
+                                          "source du backend archive")
+    parser.add_argument('--extract', choices=['grid', 'html'], default='grid',
+                        help="grid: extraction compacte dans le navigateur (défaut), html: page complète")
+    parser.add_argument('--store', help="Enregistrer les cours dans cette base SQLite (ou ADE_STORE) et générer "
+                                        "le calendrier à partir de la base (semaines capturées précédemment comprises)")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Ne capturer que les semaines à rafraîchir (proches à chaque exécution, puis chaque jour, "
+                             "puis chaque semaine sur 26 semaines) et reprendre les autres de la base des cours "
+                             "(--store, ADE_STORE ou ~/.cache/edt-miage/events.sqlite3); remplace --weeks")
+    parser.add_argument('--refresh-budget', type=int,
+                        help="Semaines capturées au plus par exécution avec --refresh (voir ade_refresh.py)")
+    parser.add_argument('--shards', help="Écrire aussi dans ce dossier les calendriers par semaine, par mois et "
+                                         "des 14 prochains jours, précompressés, avec un manifeste")
+    parser.add_argument('--previous', help="Calendrier publié précédemment, pour des UID et SEQUENCE stables "
+                                           "(défaut: edt_backup.ics s'il existe, sinon le fichier de sortie)")
+    parser.add_argument('--parse-workers', type=int, default=1,
+                        help="Processus de parsing des semaines capturées en parallèle (0: un par coeur)")
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help="Nombre de navigateurs capturant des semaines en parallèle (backend selenium)")
+    parser.add_argument('--fan-out', action='store_true',
+                        help="Un calendrier par groupe (edt_m1_miage_<groupe>.ics) en plus du calendrier fusionné, "
+                             "capturés dans une seule session navigateur (backend selenium)")
+    parser.add_argument('--base-url', default=ADE_HOST, help="Serveur ADE (backend http), ex: serveur de rejeu local")
+    parser.add_argument('--record-dir', help="Enregistrer les réponses HTTP pour les rejouer (backend http)")
+    parser.add_argument('--profile-dir', help="Profil Chrome persistant pour un démarrage à chaud (ou ADE_PROFILE_DIR)")
+    parser.add_argument('--resource-policy', choices=['none', 'safe', 'aggressive'],
+                        help="Ressources bloquées au chargement: safe bloque polices, images et statistiques "
+                             "(défaut: ADE_RESOURCE_POLICY ou safe; none pour tout charger)")
+    parser.add_argument('--resource-report', action='store_true',
+                        help="Rapport des requêtes bloquées et des octets économisés (ou ADE_RESOURCE_REPORT=1)")
+    parser.add_argument('--prime-profile', action='store_true',
+                        help="Préchauffer le profil (cache HTTP et cache de code GWT) puis quitter")
+    args = parser.parse_args()
 
     print("=" * 50)
     print("ADE Public Scraper - M1 MIAGE FA-ALT")
     print("=" * 50)
 
-    scraper = ADEPublicScraper()
+    if args.refresh:
+        if args.backend == 'archive':
+            parser.error("--refresh: backends selenium et http seulement")
+        # Base des cours obligatoire: elle fournit les semaines qui ne sont pas recapturées
+        args.store = args.store or os.environ.get('ADE_STORE') or STORE_FILE
+        args.weeks = refresh_weeks(PROGRAMME, args.store, args.refresh_budget)
+
+    if args.backend == 'http':
+        run_http_backend(args)
+    if args.backend == 'archive':
+        run_archive_backend(args)
+
+    scraper = None
     success = False
+    html_content = None
+    events = None
+
+    if args.fan_out and args.concurrency > 1:
+        print("⚠ --fan-out: capture dans une seule session, --concurrency ignoré")
+        args.concurrency = 1
 
     try:
-        # Naviguer et sélectionner le calendrier
-        if not scraper.navigate_and_select_calendar():
-            print("\n❌ Impossible de sélectionner le calendrier")
-            sys.exit(1)
+        if args.concurrency > 1:
+            # Chaque navigateur sélectionne le calendrier puis capture sa tranche de semaines
+            from ade_capture import capture_weeks_concurrently
+            html_content = capture_weeks_concurrently(
+                partial(ADEPublicScraper.capture_week_range, profile_dir=args.profile_dir,
+                        resource_policy=args.resource_policy,
+                        resource_report=args.resource_report or None, extract=args.extract, archive_dir=args.archive),
+                resolve_weeks(args.weeks), args.concurrency)
+        else:
+            scraper = ADEPublicScraper(profile_dir=args.profile_dir, resource_policy=args.resource_policy,
+                                       resource_report=args.resource_report or None, archive_dir=args.archive)
+
+            if args.prime_profile:
+                from ade_browser import prime_profile
+                prime_profile(scraper.driver, PUBLIC_URL, scraper.readiness)
+                success = True
+                return
+
+            # Naviguer et sélectionner le calendrier (--fan-out: les groupes sont sélectionnés un par un ensuite)
+            if not scraper.navigate_and_select_calendar(final_selections=[] if args.fan_out else None):
+                print("\n❌ Impossible de sélectionner le calendrier")
+                sys.exit(1)
 
-        # Récupérer l'emploi du temps
-        html_content = scraper.get_schedule(weeks=2)
+            if args.fan_out:
+                # Un calendrier par groupe, le calendrier fusionné regroupe les cours de tous les groupes
+                events = export_group_icals(
+                    scraper.iter_group_schedules(FINAL_SELECTIONS, weeks=args.weeks, extract=args.extract),
+                    args.parse_workers)
+            else:
+                # Récupérer l'emploi du temps: chaque semaine est parsée pendant le chargement de la suivante
+                with ParsePipeline() as pipeline:
+                    for week_content in scraper.iter_schedule(weeks=args.weeks, extract=args.extract):
+                        pipeline.submit(week_content)
+                if pipeline.weeks:
+                    events = pipeline.events
+
+        if events is None and html_content:
+            # Semaines capturées en parallèle: parsing après la capture
+            events = parse_weeks(html_content, args.parse_workers)
+
+        if events is not None:
+            print(f"✓ {len(events)} événements trouvés")
+            if events:
+                # Navigateurs parallèles: semaines capturées inconnues, seules celles des cours sont remplacées
+                events = store_events(events, args, scraper.captured_weeks if scraper else None)
 
-        if html_content:
             # Générer le fichier iCal
-            ical_file, events_count = scraper.parse_and_export_ical(html_content)
+            ical_file = export_ical(events, previous_file=args.previous, shards_dir=args.shards)
+            events_count = len(events)
 
             if events_count == 0:
                 print("\n❌ Aucun événement trouvé - le fichier ne sera pas utilisé")
                 sys.exit(1)
+            if ical_file is None:
+                # Calendrier identique au calendrier publié: rien à déployer
+                sys.exit(EXIT_UNCHANGED)
 
             print("\n" + "=" * 50)
             print("✓ Processus terminé")
@@ -714,7 +834,8 @@ def main():
         print(f"\n❌ Erreur inattendue: {e}")
         sys.exit(1)
     finally:
-        scraper.close()
+        if scraper:
+            scraper.close()
 
     sys.exit(0 if success else 1)
 
@@ -0,0 +1,241 @@
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# Sélecteurs des noeuds de l'arbre GWT (ressources ADE)
+TREE_NODE_SELECTOR = ".x-tree3-node-text, .x-grid3-cell-inner"
+# Sélecteur des événements de la grille du planning
+EVENT_SELECTOR = "div.eventText"
+
+# Instrumentation injectée dans la page: MutationObserver + compteur de requêtes XHR/fetch
+INSTRUMENTATION_JS = """
+(function() {
+    if (window.__adeReadiness) { return; }
+    var s = window.__adeReadiness = {
+        pending: 0,
+        resources: 0,
+        events: -1,
+        mark: Date.now(),
+        lastMutation: Date.now(),
+        lastNetwork: Date.now(),
+        lastEventChange: Date.now()
+    };
+
+    function observe() {
+        new MutationObserver(function() { s.lastMutation = Date.now(); })
+            .observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+    }
+    if (document.documentElement) { observe(); }
+    else { document.addEventListener('DOMContentLoaded', observe); }
+
+    function done() { s.pending = Math.max(0, s.pending - 1); s.lastNetwork = Date.now(); }
+
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        s.pending++;
+        s.lastNetwork = Date.now();
+        this.addEventListener('loadend', done);
+        return send.apply(this, arguments);
+    };
+
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function() {
+            s.pending++;
+            s.lastNetwork = Date.now();
+            return fetch.apply(this, arguments).finally(done);
+        };
+    }
+})();
+"""
+
+# Photographie de l'état de la page (un seul aller-retour WebDriver)
+SNAPSHOT_JS = """
+var s = window.__adeReadiness;
+if (!s) { return null; }
+var now = Date.now();
+var resources = performance.getEntriesByType('resource').length;
+if (resources !== s.resources) { s.resources = resources; s.lastNetwork = now; }
+var events = document.querySelectorAll(arguments[1]).length;
+if (events !== s.events) { s.events = events; s.lastEventChange = now; }
+return {
+    readyState: document.readyState,
+    pending: s.pending,
+    sinceMutation: now - Math.max(s.lastMutation, s.mark),
+    sinceNetwork: now - Math.max(s.lastNetwork, s.mark),
+    sinceEventChange: now - Math.max(s.lastEventChange, s.mark),
+    treeNodes: document.querySelectorAll(arguments[0]).length,
+    events: events
+};
+"""
+
+# Recherche des noeuds par texte dans la page (mêmes règles que la recherche Python historique)
+FIND_BY_TEXT_JS = """
+var text = arguments[0], allowPrefix = arguments[1], timeoutMs = arguments[2], pollMs = arguments[3];
+var done = arguments[arguments.length - 1];
+var start = Date.now(), attempts = 0;
+
+function visibleText(el) {
+    // Comme WebElement.text: vide si l'élément n'est pas rendu
+    if (!el.getClientRects().length) { return ''; }
+    return (el.innerText || '').trim();
+}
+
+function search() {
+    attempts++;
+    var elements = [], texts = [];
+    var tags = ['span', 'div'];
+    for (var t = 0; t < tags.length; t++) {
+        var nodes = document.getElementsByTagName(tags[t]);
+        for (var i = 0; i < nodes.length; i++) {
+            var el = nodes[i];
+            // Filtre rapide (pas de layout) avant de calculer le texte visible
+            if ((el.textContent || '').indexOf(text) === -1) { continue; }
+            var s = visibleText(el);
+            if (s === text || (allowPrefix && s.indexOf(text + '\\n') === 0) || (s.indexOf(text) !== -1 && s.length < 100)) {
+                elements.push(el);
+                texts.push(s);
+            }
+        }
+    }
+    if (elements.length || Date.now() - start >= timeoutMs) {
+        done({elements: elements, texts: texts, attempts: attempts, elapsed: Date.now() - start});
+    } else {
+        setTimeout(search, pollMs);
+    }
+}
+search();
+"""
+
+MARK_JS = "if (window.__adeReadiness) { window.__adeReadiness.mark = Date.now(); return true; } return false;"
+
+
+class PageReadiness:
+    """
+    Attend que la page ADE soit prête en observant des signaux réels (arbre GWT rendu,
+    DOM stable, réseau inactif, nombre d'événements stable) au lieu de pauses fixes.
+    Chaque attente rend la main dès que le signal est observé, et au plus tard après `timeout`.
+    """
+
+    def __init__(self, driver, timeout=30, poll_interval=0.1):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def install(self):
+        """
+        Injecte l'instrumentation (avant le chargement des prochaines pages si CDP est disponible)
+        """
+        try:
+            self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': INSTRUMENTATION_JS})
+        except Exception:
+            # Pas de CDP (autre navigateur): injection à la volée dans snapshot()
+            pass
+        self._inject()
+
+    def _inject(self):
+        try:
+            self.driver.execute_script(INSTRUMENTATION_JS)
+        except WebDriverException:
+            pass
+
+    def mark(self):
+        """
+        Démarre une nouvelle fenêtre d'observation: les périodes de calme sont mesurées à partir de maintenant
+        """
+        try:
+            if not self.driver.execute_script(MARK_JS):
+                self._inject()
+        except WebDriverException:
+            pass
+
+    def snapshot(self):
+        """
+        Retourne l'état courant de la page (dict) ou None si indisponible
+        """
+        try:
+            state = self.driver.execute_script(SNAPSHOT_JS, TREE_NODE_SELECTOR, EVENT_SELECTOR)
+        except WebDriverException:
+            return None
+        if state is None:
+            # Page rechargée sans instrumentation: la réinjecter
+            self._inject()
+        return state
+
+    def _wait(self, condition, description, timeout=None):
+        """Attend que condition(state) soit vraie, sans jamais dépasser timeout"""
+        timeout = self.timeout if timeout is None else timeout
+        self.mark()
+        last_state = {}
+
+        def check(driver):
+            state = self.snapshot()
+            if state is None:
+                return False
+            last_state.update(state)
+            return condition(state)
+
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=self.poll_interval).until(check)
+            return True
+        except TimeoutException:
+            print(f"  ⚠ {description}: non atteint après {timeout}s ({last_state})")
+            return False
+
+    def wait_for_document(self, timeout=None):
+        """
+        Attend document.readyState == 'complete'
+        """
+        return self._wait(lambda s: s['readyState'] == 'complete', "Document chargé", timeout)
+
+    def wait_for_tree(self, min_nodes=1, timeout=None):
+        """
+        Attend que l'arbre GWT affiche au moins min_nodes noeuds
+        """
+        return self._wait(lambda s: s['treeNodes'] >= min_nodes, "Arbre GWT rendu", timeout)
+
+    def wait_for_dom_quiet(self, quiet_ms=300, timeout=None):
+        """
+        Attend qu'aucune mutation du DOM n'ait eu lieu pendant quiet_ms
+        """
+        return self._wait(lambda s: s['sinceMutation'] >= quiet_ms, "DOM stable", timeout)
+
+    def wait_for_network_idle(self, idle_ms=300, timeout=None):
+        """
+        Attend qu'aucune requête ne soit en cours ni terminée depuis idle_ms
+        """
+        return self._wait(lambda s: s['pending'] == 0 and s['sinceNetwork'] >= idle_ms, "Réseau inactif", timeout)
+
+    def wait_for_events_stable(self, stable_ms=500, timeout=None):
+        """
+        Attend que le nombre d'événements de la grille ne change plus pendant stable_ms
+        """
+        return self._wait(
+            lambda s: s['pending'] == 0 and s['sinceEventChange'] >= stable_ms and s['sinceMutation'] >= stable_ms,
+            "Grille stable", timeout)
+
+    def wait_until_ready(self, quiet_ms=300, timeout=None):
+        """
+        Attend à la fois le réseau inactif et le DOM stable
+        """
+        return self._wait(
+            lambda s: s['readyState'] == 'complete' and s['pending'] == 0
+            and s['sinceNetwork'] >= quiet_ms and s['sinceMutation'] >= quiet_ms,
+            "Page prête", timeout)
+
+    def find_by_text(self, text, timeout=None, allow_prefix=True, poll_ms=200):
+        """
+        Cherche dans la page, en un seul appel WebDriver, les <span> puis <div> dont le texte visible
+        correspond (texte exact, texte suivi d'un retour à la ligne, ou le contient en moins de 100 caractères).
+        La recherche est répétée dans le navigateur jusqu'à trouver ou jusqu'à timeout.
+        Retourne une liste de (element, texte), vide si rien trouvé.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            self.driver.set_script_timeout(timeout + 5)
+            result = self.driver.execute_async_script(FIND_BY_TEXT_JS, text, allow_prefix, int(timeout * 1000), poll_ms)
+        except WebDriverException as e:
+            print(f"  ⚠ Recherche de '{text}' interrompue: {e}")
+            return []
+        print(f"  Recherche de '{text}': {len(result['elements'])} résultat(s) en {result['elapsed'] / 1000:.1f}s "
+              f"({result['attempts']} passage(s) dans la page)")
+        return list(zip(result['elements'], result['texts']))
@@ -0,0 +1,115 @@
+"""
+Rafraîchissement par paliers: seules les semaines dont la dernière capture est trop ancienne sont recapturées,
+les autres sont reprises de la base des cours (ade_store, table weeks).
+    semaines 0-1 (courante et suivante)   -> à chaque exécution
+    semaines 2-7                          -> une fois par jour
+    semaines 8-25                         -> une fois par semaine
+Le nombre de semaines capturées par exécution est plafonné (budget, par défaut le régime établi d'une
+exécution quotidienne): les semaines jamais capturées puis les plus anciennes passent en premier, les
+captures lointaines s'étalent ainsi sur les jours de la semaine au lieu de tomber toutes le même jour.
+
+L'horizon s'arrête à 26 semaines: au-delà, un numéro de semaine ISO désigne aussi une semaine passée
+plus proche (voir ade_weeks.monday_of_week).
+
+Utilisation: python ade_refresh.py [--store FICHIER] [--programme NOM] [--budget N]  (plan, sans capture)
+"""
+from ade_store import EventStore
+from datetime import datetime, timedelta
+import sqlite3
+import math
+
+TIERS = [
+    # (première semaine, dernière semaine, âge maximal d'une capture), comptées depuis la semaine courante
+    (0, 1, timedelta(0)),
+    (2, 7, timedelta(days=1)),
+    (8, 25, timedelta(weeks=1)),
+]
+# Exécution quotidienne du workflow à heure approximative (file d'attente du runner)
+RUN_INTERVAL = timedelta(days=1)
+TOLERANCE = timedelta(hours=3)
+
+
+def default_budget(tiers=TIERS, interval=RUN_INTERVAL):
+    """
+    Semaines capturées par exécution en régime établi: chaque palier recapturé au rythme de son âge maximal
+    """
+    total = 0
+    for first, last, max_age in tiers:
+        count = last - first + 1
+        total += count if max_age <= interval else math.ceil(count * interval / max_age)
+    return total
+
+
+def plan_refresh(freshness, now=None, tiers=TIERS, budget=None):
+    """
+    Semaines à capturer (lundis, par ordre chronologique) d'après la date de leur dernière capture
+    (dict lundi → datetime). Le premier palier est toujours capturé, même au-delà du budget.
+    Retourne (lundis à capturer, lundis dus).
+    """
+    now = now or datetime.now()
+    budget = default_budget(tiers) if budget is None else budget
+    current = now.date() - timedelta(days=now.weekday())
+
+    due = []
+    for rank, (first, last, max_age) in enumerate(tiers):
+        for offset in range(first, last + 1):
+            monday = current + timedelta(weeks=offset)
+            captured_at = freshness.get(monday)
+            age = None if captured_at is None else now - captured_at
+            if age is None or age >= max_age - TOLERANCE:
+                due.append((rank, monday, age))
+
+    # Par palier: semaines jamais capturées, puis de la plus ancienne capture à la plus récente
+    due.sort(key=lambda item: (item[0], item[2] is not None, -(item[2] or timedelta(0)), item[1]))
+    always = sum(1 for rank, _, _ in due if rank == 0)
+    selected = sorted(monday for _, monday, _ in due[:max(budget, always)])
+    return selected, sorted(monday for _, monday, _ in due)
+
+
+def refresh_weeks(programme, path=None, budget=None, now=None):
+    """
+    Numéros de semaine ISO à capturer pour le programme d'après la base des cours
+    (base inaccessible: premier palier seulement)
+    """
+    now = now or datetime.now()
+    try:
+        with EventStore(path) as store:
+            freshness = store.freshness(programme)
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠ Base des cours inaccessible ({e}): rafraîchissement des semaines proches seulement")
+        freshness = {}
+        budget = 0
+
+    selected, due = plan_refresh(freshness, now, budget=budget)
+    horizon = TIERS[-1][1] + 1
+    print(f"✓ Rafraîchissement: {len(selected)} semaine(s) à capturer, {len(due) - len(selected)} reportée(s), "
+          f"{horizon - len(due)} reprise(s) de la base")
+    return [monday.isocalendar()[1] for monday in selected]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Semaines à recapturer (rafraîchissement par paliers)")
+    parser.add_argument('--store', help="Fichier SQLite (défaut: ADE_STORE ou ~/.cache/edt-miage/events.sqlite3)")
+    parser.add_argument('--programme', default='M1 MIAGE FA-ALT', help="Programme (défaut: %(default)s)")
+    parser.add_argument('--budget', type=int, help=f"Semaines capturées au plus par exécution "
+                                                   f"(défaut: {default_budget()})")
+    args = parser.parse_args()
+
+    now = datetime.now()
+    with EventStore(args.store) as store:
+        freshness = store.freshness(args.programme)
+    selected, due = plan_refresh(freshness, now, budget=args.budget)
+    current = now.date() - timedelta(days=now.weekday())
+    for rank, (first, last, max_age) in enumerate(TIERS):
+        for offset in range(first, last + 1):
+            monday = current + timedelta(weeks=offset)
+            captured_at = freshness.get(monday)
+            last_capture = captured_at.isoformat(sep=' ', timespec='minutes') if captured_at else 'jamais'
+            state = 'capture' if monday in selected else 'reportée' if monday in due else 'à jour'
+            print(f"S{monday.isocalendar()[1]:02d}  {monday}  palier {rank}  {last_capture:<16}  {state}")
+
+
+if __name__ == "__main__":
+    main()
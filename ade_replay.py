@@ -0,0 +1,94 @@
+"""
+Enregistrement et rejeu de réponses HTTP d'ADE, pour tester le backend HTTP sans accès au serveur
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import threading
+import hashlib
+import json
+import os
+import sys
+
+
+def record_key(url):
+    """
+    Clé stable d'une requête GET: chemin + paramètres triés (indépendant de l'hôte et de l'ordre)
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return hashlib.sha256(f"{parts.path}?{query}".encode('utf-8')).hexdigest()[:32]
+
+
+def save_response(record_dir, url, status, content_type, body):
+    """
+    Enregistre une réponse dans record_dir (corps + métadonnées)
+    """
+    os.makedirs(record_dir, exist_ok=True)
+    key = record_key(url)
+    with open(os.path.join(record_dir, f"{key}.body"), 'wb') as f:
+        f.write(body)
+    with open(os.path.join(record_dir, f"{key}.json"), 'w', encoding='utf-8') as f:
+        json.dump({'url': url, 'status': status, 'content_type': content_type}, f, ensure_ascii=False, indent=2)
+
+
+class ReplayServer:
+    """
+    Serveur HTTP local qui rejoue les réponses enregistrées dans record_dir.
+    Utilisable comme context manager: `with ReplayServer(dir) as server: server.base_url`
+    """
+
+    def __init__(self, record_dir, host='127.0.0.1', port=0):
+        self.record_dir = record_dir
+        self.requests = []
+
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                replay.requests.append(self.path)
+                key = record_key(self.path)
+                meta_path = os.path.join(replay.record_dir, f"{key}.json")
+                if not os.path.exists(meta_path):
+                    self.send_error(404, f"Pas de réponse enregistrée pour {self.path}")
+                    return
+                with open(meta_path, encoding='utf-8') as f:
+                    meta = json.load(f)
+                with open(os.path.join(replay.record_dir, f"{key}.body"), 'rb') as f:
+                    body = f.read()
+                self.send_response(meta['status'])
+                self.send_header('Content-Type', meta['content_type'])
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    # python ade_replay.py <dossier_enregistrements> [port]
+    server = ReplayServer(sys.argv[1], port=int(sys.argv[2]) if len(sys.argv) > 2 else 8080)
+    print(f"Rejeu de {sys.argv[1]} sur {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
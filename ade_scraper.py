@@ -2,18 +2,46 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-from icalendar import Calendar, Event
-from datetime import datetime
+from selenium.common.exceptions import TimeoutException
 import time
-import re
-import pytz
 import os
+from ade_readiness import PageReadiness
+from ade_browser import create_driver, page_timings, report_startup
+from ade_network import ResourcePolicy
+from ade_grid import EXTRACT_GRID_JS
+from ade_weeks import WeekNavigator, resolve_weeks
+from ade_session import CookieStore
+from ade_pipeline import ParsePipeline, parse_weeks
+from ade_archive import WeekArchive
+from ade_sync import publish_ics
+from ade_store import update_store
+
+# Nom du planning personnel dans l'archive des semaines capturées
+PROGRAMME = 'myplanning'
+
+
+def export_ical(events, output_file='emploi_du_temps.ics', previous_file=None):
+    """
+    Écrit les événements iCal dans le fichier de l'emploi du temps
+    (UID, SEQUENCE et DTSTAMP repris du calendrier précédent, par défaut le fichier de sortie existant;
+    fichier non réécrit si les cours n'ont pas changé)
+    """
+    if events:
+        print(f"✓ {len(events)} événements trouvés")
+    else:
+        print("⚠ Aucun événement trouvé - La structure HTML doit être analysée")
+        print("→ Consultez le fichier schedule.html pour adapter le parsing")
+
+    # Sauvegarder le fichier .ics (écriture en flux, remplacement atomique)
+    if publish_ics(events, output_file, previous_file or output_file,
+                   prodid='-//UT Capitole Schedule//FR', calname='Emploi du Temps UT Capitole') is not None:
+        print(f"✓ Fichier iCal généré: {output_file}")
+    return output_file
+
 
 class ADEScraper:
-    def __init__(self, username=None, password=None):
+    def __init__(self, username=None, password=None, timeout=30, profile_dir=None, driver_path=None, resource_policy=None,
+                 resource_report=None, session_cache=True, archive_dir=None):
         # Lire depuis les variables d'environnement si non fournis
         self.username = username or os.environ.get('SSO_USERNAME')
         self.password = password or os.environ.get('SSO_PASSWORD')
@@ -23,6 +51,9 @@ class ADEScraper:
 
         self.base_url = "https://ade-production.ut-capitole.fr"
 
+        # Cookies SSO réutilisés d'une exécution à l'autre (fichier ADE_COOKIE_FILE ou cache utilisateur)
+        self.cookie_store = CookieStore(self.username, os.environ.get('ADE_COOKIE_FILE')) if session_cache else None
+
         # Configuration Selenium
         options = webdriver.ChromeOptions()
         options.add_argument('--headless')  # Mode sans interface graphique
@@ -31,7 +62,27 @@ class ADEScraper:
         options.add_argument('--disable-gpu')
         options.add_argument('--window-size=1920,1080')
 
-        self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+        # Ressources inutiles au scraping (polices, images, statistiques) bloquées via CDP
+        # (rapport d'économie seulement sur demande: resource_report ou ADE_RESOURCE_REPORT=1)
+        self.resource_policy = ResourcePolicy(resource_policy or os.environ.get('ADE_RESOURCE_POLICY', 'safe'),
+                                              report=resource_report)
+        self.resource_policy.apply_options(options)
+
+        # Profil persistant optionnel (démarrage à chaud) et driver résolu sans accès réseau si possible
+        profile_dir = profile_dir or os.environ.get('ADE_PROFILE_DIR')
+        self.driver, self.startup_metrics = create_driver(options, profile_dir=profile_dir, driver_path=driver_path)
+        self.resource_policy.install(self.driver)
+
+        # Attentes sur signaux réels, bornées par timeout (secondes)
+        self.readiness = PageReadiness(self.driver, timeout=timeout)
+        self.week_navigator = WeekNavigator(self.driver, self.readiness)
+
+        # Archive optionnelle des semaines capturées (reparsing sans navigateur)
+        archive_dir = archive_dir or os.environ.get('ADE_ARCHIVE_DIR')
+        self.archive = WeekArchive(archive_dir) if archive_dir else None
+        # Semaines effectivement affichées et capturées (seules remplacées dans la base des cours)
+        self.captured_weeks = []
+        self.navigation_start = None
 
     def login(self):
         """
@@ -39,11 +90,32 @@ class ADEScraper:
         """
         try:
             print("Connexion au SSO...")
-            # Accéder à la page de planning (redirige vers le SSO)
-            self.driver.get(f"{self.base_url}/direct/myplanning.jsp?logout=true")
+            self.readiness.install()
+            self.navigation_start = time.time()
+            wait = WebDriverWait(self.driver, 10)
+
+            if self.cookie_store and self.cookie_store.restore(self.driver):
+                # Session enregistrée: charger directement le planning, le SSO ne redemande
+                # le formulaire que si la session a expiré
+                print("Reprise de la session enregistrée...")
+                self.driver.get(f"{self.base_url}/direct/myplanning.jsp")
+                try:
+                    state = WebDriverWait(self.driver, 20).until(
+                        lambda d: 'planning' if d.find_elements(By.ID, "MyPlanning")
+                        else 'form' if d.find_elements(By.ID, "userfield") else False)
+                except TimeoutException:
+                    state = None
+                if state == 'planning':
+                    print("✓ Connexion réussie (session réutilisée)")
+                    return True
+                print("  Session expirée, connexion via le formulaire...")
+                if state != 'form':
+                    self.driver.get(f"{self.base_url}/direct/myplanning.jsp?logout=true")
+            else:
+                # Accéder à la page de planning (redirige vers le SSO)
+                self.driver.get(f"{self.base_url}/direct/myplanning.jsp?logout=true")
 
             # Attendre le formulaire de connexion
-            wait = WebDriverWait(self.driver, 10)
             username_field = wait.until(EC.presence_of_element_located((By.ID, "userfield")))
 
             print("Envoi des identifiants...")
@@ -60,148 +132,93 @@ class ADEScraper:
             wait.until(lambda driver: "myplanning.jsp" in driver.current_url)
 
             print("✓ Connexion réussie")
+            if self.cookie_store:
+                self.cookie_store.save(self.driver)
             return True
         except Exception as e:
             print(f"✗ Échec de la connexion: {e}")
             return False
 
-    def get_schedule(self, weeks=2):
+    def capture_week(self, extract='html'):
         """
-        Récupère le HTML de l'emploi du temps pour plusieurs semaines
+        Capture la semaine affichée: HTML complet ou grille compacte (quelques Ko de JSON)
         """
-        all_html = []
+        if extract == 'grid':
+            return self.driver.execute_script(EXTRACT_GRID_JS)
+        return self.driver.page_source
 
+    def iter_schedule(self, weeks=2, extract='html'):
+        """
+        Capture les semaines demandées une à une (générateur): un nombre de semaines à partir de la semaine courante,
+        une sélection ("36-52", "2025-11-17:2025-12-31", voir ade_weeks) ou une liste de numéros de semaine.
+        extract='html': HTML complet de la page, extract='grid': grille compacte extraite dans le navigateur
+        """
+        captured = 0
+
+        # Attendre que l'application GWT se charge
+        wait = WebDriverWait(self.driver, 20)
+        wait.until(EC.presence_of_element_located((By.ID, "MyPlanning")))
+        self.readiness.wait_for_events_stable()
+
+        # Temps jusqu'au premier rendu du planning (comparaison démarrage à froid / à chaud)
+        if 'time_to_first_render_s' not in self.startup_metrics and self.navigation_start:
+            self.startup_metrics['time_to_first_render_s'] = round(time.time() - self.navigation_start, 3)
+            self.startup_metrics.update(page_timings(self.driver))
+            report_startup(self.startup_metrics)
+
+        # Index des boutons de semaine construit une seule fois, puis navigation directe
+        targets = resolve_weeks(weeks)
+        self.week_navigator.build_index()
+
+        for idx, week_number in enumerate(targets):
+            print(f"Récupération semaine {week_number} ({idx + 1}/{len(targets)})...")
+            if not self.week_navigator.goto(week_number):
+                continue
+
+            # Récupérer la semaine actuelle
+            week_content = self.capture_week(extract)
+            if self.archive:
+                self.archive.put(week_content, PROGRAMME, week_number)
+            if week_number not in self.captured_weeks:
+                self.captured_weeks.append(week_number)
+            yield week_content
+            captured += 1
+
+        print(f"✓ {captured} semaine(s) récupérée(s)")
+
+    def get_schedule(self, weeks=2, extract='html'):
+        """
+        Récupère l'emploi du temps des semaines demandées (voir iter_schedule), retourne la liste des semaines capturées
+        """
         try:
-            # Attendre que l'application GWT se charge
-            wait = WebDriverWait(self.driver, 20)
-            wait.until(EC.presence_of_element_located((By.ID, "MyPlanning")))
-            time.sleep(5)
-
-            for week in range(weeks):
-                print(f"Récupération semaine {week + 1}/{weeks}...")
-
-                # Récupérer le HTML de la semaine actuelle
-                all_html.append(self.driver.page_source)
-
-                # Passer à la semaine suivante (sauf pour la dernière itération)
-                if week < weeks - 1:
-                    try:
-                        # ADE utilise des boutons avec format "(XX)JJ mois AA"
-                        # Stratégie: extraire le numéro de semaine actuel, chercher semaine+1
-
-                        # 1. Chercher TOUS les boutons, même sans aria-pressed
-                        all_buttons = self.driver.find_elements(By.TAG_NAME, "button")
-                        week_buttons = []
-                        current_week_text = None
-
-                        for btn in all_buttons:
-                            try:
-                                btn_text = btn.text.strip()
-                                # Filtrer uniquement les boutons qui commencent par (XX)
-                                if btn_text and re.match(r'^\(\d+\)', btn_text):
-                                    week_buttons.append(btn)
-                                    aria_pressed = btn.get_attribute('aria-pressed')
-                                    if aria_pressed == 'true':
-                                        current_week_text = btn_text
-                            except:
-                                continue
-
-                        if not current_week_text and week_buttons:
-                            # Si aucun bouton actif, prendre le premier
-                            current_week_text = week_buttons[0].text
-
-                        print(f"  Semaine actuelle: {current_week_text}")
-                        print(f"  Boutons de semaine trouvés: {len(week_buttons)}")
-
-                        # Extraire le numéro de semaine (XX)
-                        if not current_week_text:
-                            print("⚠ Aucun bouton de semaine trouvé")
-                            break
-
-                        week_match = re.search(r'\((\d+)\)', current_week_text)
-
-                        clicked = False
-                        if week_match:
-                            current_week_num = int(week_match.group(1))
-                            next_week_num = current_week_num + 1
-                            print(f"  Recherche semaine {next_week_num}...")
-
-                            for btn in week_buttons:
-                                btn_text = btn.text.strip()
-                                print(f"    - {btn_text} (visible: {btn.is_displayed()}, enabled: {btn.is_enabled()})")
-                                if f"({next_week_num})" in btn_text:
-                                    print(f"  ✓ Bouton trouvé, tentative de clic...")
-                                    try:
-                                        # Scroll vers l'élément si nécessaire
-                                        self.driver.execute_script("arguments[0].scrollIntoView(true);", btn)
-                                        time.sleep(0.5)
-                                        btn.click()
-                                        clicked = True
-                                        print(f"  → Navigation vers: {btn_text}")
-
-                                        # Attendre que le bouton devienne actif (aria-pressed="true")
-                                        wait = WebDriverWait(self.driver, 10)
-                                        wait.until(lambda d: btn.get_attribute('aria-pressed') == 'true')
-                                        print(f"  ✓ Page changée")
-                                        break
-                                    except Exception as click_error:
-                                        print(f"  Erreur clic: {click_error}")
-                                        # Essayer avec JavaScript
-                                        try:
-                                            self.driver.execute_script("arguments[0].click();", btn)
-                                            clicked = True
-                                            print(f"  → Navigation JS vers: {btn_text}")
-
-                                            # Attendre que le bouton devienne actif
-                                            wait = WebDriverWait(self.driver, 10)
-                                            wait.until(lambda d: btn.get_attribute('aria-pressed') == 'true')
-                                            print(f"  ✓ Page changée")
-                                            break
-                                        except:
-                                            pass
-
-                        if not clicked:
-                            print("⚠ Impossible de naviguer vers la semaine suivante")
-                            print("  Tentative avec JavaScript...")
-
-                            # Dernier recours: utiliser JavaScript pour cliquer
-                            try:
-                                result = self.driver.execute_script(f"""
-                                    var buttons = document.querySelectorAll('button[role="button"][aria-pressed="false"]');
-                                    for (var i = 0; i < buttons.length; i++) {{
-                                        if (buttons[i].textContent.includes('({next_week_num})')) {{
-                                            buttons[i].click();
-                                            return buttons[i].textContent;
-                                        }}
-                                    }}
-                                    return null;
-                                """)
-                                if result:
-                                    print(f"  → Navigation JS vers: {result}")
-                                    clicked = True
-                            except Exception as js_error:
-                                print(f"  Erreur JS: {js_error}")
-
-                        if not clicked:
-                            break
-
-                        # Attendre le rechargement complet des événements
-                        time.sleep(5)
-
-                    except Exception as e:
-                        print(f"⚠ Erreur navigation semaine suivante: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        break
-
-            print(f"✓ {len(all_html)} semaine(s) récupérée(s)")
-            return all_html
-
+            return list(self.iter_schedule(weeks, extract))
         except Exception as e:
             print(f"✗ Erreur lors de la récupération: {e}")
             return None
 
-    def save_html(self, html_content_list, filename="schedule.html"):
+    @classmethod
+    def capture_week_range(cls, username, password, weeks, worker=0, timeout=30, profile_dir=None, resource_policy=None,
+                           resource_report=None, session_cache=True, extract='html', archive_dir=None):
+        """
+        Ouvre son propre navigateur, se connecte et capture les semaines `weeks` (liste de numéros)
+        (utilisé par ade_capture pour les captures en parallèle)
+        """
+        # Un profil Chrome ne peut être ouvert que par un navigateur à la fois: un profil par navigateur,
+        # indexé par son rang pour être réutilisé (à chaud) quelles que soient les semaines capturées
+        profile_dir = profile_dir or os.environ.get('ADE_PROFILE_DIR')
+        if profile_dir:
+            profile_dir = f"{profile_dir}-{worker}"
+        scraper = cls(username, password, timeout=timeout, profile_dir=profile_dir, resource_policy=resource_policy,
+                      resource_report=resource_report, session_cache=session_cache, archive_dir=archive_dir)
+        try:
+            if not scraper.login():
+                return None
+            return scraper.get_schedule(weeks=weeks, extract=extract)
+        finally:
+            scraper.close()
+
+    @staticmethod
+    def save_html(html_content_list, filename="schedule.html"):
         """
         Sauvegarde le HTML pour analyse
         """
@@ -215,217 +232,28 @@ class ADEScraper:
                 f.write(html_content_list)
             print(f"✓ HTML sauvegardé dans {filename}")
 
-    def parse_and_export_ical(self, html_content_list):
+    @staticmethod
+    def parse_and_export_ical(html_content_list, workers=1, previous_file=None):
         """
-        Parse le HTML de l'emploi du temps ADE et crée un fichier iCal
+        Parse le HTML (ou la grille compacte) de l'emploi du temps ADE et crée un fichier iCal
         """
         # Gérer liste ou string unique
         if not isinstance(html_content_list, list):
             html_content_list = [html_content_list]
 
-        # Créer le calendrier avec timezone
-        paris_tz = pytz.timezone('Europe/Paris')
-
-        cal = Calendar()
-        cal.add('prodid', '-//UT Capitole Schedule//FR')
-        cal.add('version', '2.0')
-        cal.add('X-WR-CALNAME', 'Emploi du Temps UT Capitole')
-        cal.add('X-WR-TIMEZONE', 'Europe/Paris')
-        cal.add('method', 'PUBLISH')
-
         print("Parsing des événements...")
 
-        events_found = 0
-
-        # Traiter chaque semaine
-        for week_idx, html_content in enumerate(html_content_list):
-            soup = BeautifulSoup(html_content, 'html.parser')
-
-            # DÉTECTER L'ÉCHELLE AUTOMATIQUEMENT
-            # Chercher les labels d'heure pour calibrer
-            hour_labels = soup.find_all('div', class_='slot')
-            pixels_per_hour = None
-
-            for i, label in enumerate(hour_labels):
-                text = label.get_text(strip=True)
-                style = label.get('style', '')
-
-                # Chercher "08h00" et "09h00" pour calibrer
-                if '08h00' in text:
-                    match_8h = re.search(r'top:\s*(\d+)px', style)
-                    if match_8h:
-                        top_8h = int(match_8h.group(1))
-                elif '09h00' in text and 'top_8h' in locals():
-                    match_9h = re.search(r'top:\s*(\d+)px', style)
-                    if match_9h:
-                        top_9h = int(match_9h.group(1))
-                        pixels_per_hour = top_9h - top_8h
-                        hour_offset = top_8h  # Position de 8h
-                        print(f"  Calibration détectée: {pixels_per_hour}px/heure, offset={hour_offset}px pour 8h")
-                        break
-
-            if not pixels_per_hour:
-                # Valeurs par défaut (ancienne échelle)
-                pixels_per_hour = 17.5
-                hour_offset = 17
-                print(f"  Calibration par défaut: {pixels_per_hour}px/heure")
-
-            # Extraire les dates des jours de la semaine
-            day_labels = soup.find_all('div', class_='labelLegend')
-            days_mapping = {}  # left position -> date
-            day_positions = []  # Pour calculer la largeur des colonnes
-
-            for label in day_labels:
-                style = label.get('style', '')
-                text = label.get_text(strip=True)
-
-                # Chercher les dates au format "Lundi 17/11/2025"
-                if '/' in text and any(day in text for day in ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']):
-                    # Extraire la position left
-                    left_match = re.search(r'left:(\d+)px', style)
-                    date_match = re.search(r'(\d{2})/(\d{2})/(\d{4})', text)
-
-                    if left_match and date_match:
-                        left_pos = int(left_match.group(1))
-                        day = int(date_match.group(1))
-                        month = int(date_match.group(2))
-                        year = int(date_match.group(3))
-                        days_mapping[left_pos] = datetime(year, month, day)
-                        day_positions.append(left_pos)
-
-            # Calculer la largeur des colonnes automatiquement
-            if len(day_positions) >= 2:
-                day_positions.sort()
-                column_width = day_positions[1] - day_positions[0]
-                print(f"  Largeur colonne détectée: {column_width}px")
-            else:
-                column_width = 115  # Défaut
-                print(f"  Largeur colonne par défaut: {column_width}px")
-
-            # Chercher tous les événements
-            event_divs = soup.find_all('div', attrs={'aria-label': True, 'class': 'eventText'})
-
-            for event_div in event_divs:
-                try:
-                    # Récupérer le parent avec position absolute
-                    parent = event_div.find_parent('div', style=lambda s: s and 'position: absolute' in s)
-                    if not parent or not parent.get('style'):
-                        continue
-
-                    style = parent.get('style')
-                    left_match = re.search(r'left:\s*(\d+)px', style)
-                    top_match = re.search(r'top:\s*(\d+)px', style)
-
-                    if not left_match or not top_match:
-                        continue
-
-                    left = int(left_match.group(1))
-                    top = int(top_match.group(1))
-
-                    # Trouver la date du jour en utilisant la largeur détectée
-                    day_column = left // column_width
-
-                    # Trouver la date correspondante
-                    base_date = None
-                    sorted_days = sorted(days_mapping.items())
-                    for i, (day_left, date) in enumerate(sorted_days):
-                        if i == day_column:
-                            base_date = date
-                            break
-
-                    if not base_date:
-                        continue
-
-                    # Calculer l'heure à partir de top en utilisant la calibration détectée
-                    # Les événements ont un offset de ~8px par rapport à la grille
-                    event_offset = 8
-                    hours_from_8am = (top - hour_offset - event_offset) / pixels_per_hour
-                    start_hour_float = 8 + hours_from_8am
-
-                    # Ignorer les événements hors limites (probablement chevauchement ou erreur)
-                    if start_hour_float < 0 or start_hour_float > 23:
-                        continue
-
-                    # Récupérer la durée depuis la table event
-                    table = parent.find('table', class_='event')
-                    if table and table.get('style'):
-                        height_match = re.search(r'height:(\d+)px', table.get('style'))
-                        if height_match:
-                            height = int(height_match.group(1))
-                            duration_hours = height / pixels_per_hour
-                        else:
-                            duration_hours = 1.5  # Défaut
-                    else:
-                        duration_hours = 1.5
-
-                    # Arrondir à 15 minutes (créneaux standards universitaires)
-                    def round_to_15min(hour_float):
-                        total_minutes = hour_float * 60
-                        rounded_minutes = round(total_minutes / 15) * 15
-                        return int(rounded_minutes // 60), int(rounded_minutes % 60)
-
-                    start_hour, start_minute = round_to_15min(start_hour_float)
-                    end_hour, end_minute = round_to_15min(start_hour_float + duration_hours)
-
-                    # Valider les heures (doivent être entre 0 et 23)
-                    if not (0 <= start_hour <= 23) or not (0 <= end_hour <= 23):
-                        print(f"⚠ Heure invalide: {start_hour}h{start_minute} - {end_hour}h{end_minute}")
-                        continue
-
-                    # Créer les datetime avec timezone Paris (réutiliser paris_tz défini au début)
-                    start_time = paris_tz.localize(base_date.replace(
-                        hour=start_hour,
-                        minute=start_minute
-                    ))
-                    end_time = paris_tz.localize(base_date.replace(
-                        hour=end_hour,
-                        minute=end_minute
-                    ))
-
-                    # Extraire le titre et les détails
-                    aria_label = event_div.get('aria-label', '')
-                    lines = [line.strip() for line in aria_label.split('null') if line.strip()]
-
-                    summary = lines[0] if lines else "Cours"
-                    description_parts = lines[1:] if len(lines) > 1 else []
-                    description = '\n'.join(description_parts)
-
-                    # Créer l'événement iCal
-                    event = Event()
-                    event.add('summary', summary)
-                    # Convertir en UTC pour compatibilité maximale avec Apple Calendar
-                    event.add('dtstart', start_time.astimezone(pytz.UTC))
-                    event.add('dtend', end_time.astimezone(pytz.UTC))
-                    if description:
-                        event.add('description', description)
-                    event.add('location', description_parts[0] if description_parts else '')
-
-                    cal.add_component(event)
-                    events_found += 1
-
-                except Exception as e:
-                    print(f"Erreur lors du parsing d'un événement: {e}")
-                    continue
-
-        if events_found > 0:
-            print(f"✓ {events_found} événements trouvés")
-        else:
-            print("⚠ Aucun événement trouvé - La structure HTML doit être analysée")
-            print("→ Consultez le fichier schedule.html pour adapter le parsing")
-
-        # Sauvegarder le fichier .ics
-        output_file = 'emploi_du_temps.ics'
-        with open(output_file, 'wb') as f:
-            f.write(cal.to_ical())
+        # Traiter chaque semaine (HTML complet ou grille compacte extraite dans le navigateur)
+        events = parse_weeks(html_content_list, workers)
 
-        print(f"✓ Fichier iCal généré: {output_file}")
-        return output_file
+        return export_ical(events, previous_file=previous_file)
 
     def close(self):
         """
         Ferme le navigateur Selenium
         """
         if self.driver:
+            self.resource_policy.report(self.driver)
             self.driver.quit()
 
 
@@ -433,10 +261,56 @@ def main():
     """
     Fonction principale
     """
+    import argparse
+    from functools import partial
+
+    parser = argparse.ArgumentParser(description="ADE Schedule Scraper - UT Capitole")
+    parser.add_argument('--weeks', default='2',
+                        help="Nombre de semaines à partir de la semaine courante, ou sélection: 36-52, 36,40-42, 2025-11-17:2025-12-31 "
+                             "(--from-archive: 'all' pour toutes les semaines archivées)")
+    parser.add_argument('--archive', help="Archiver chaque semaine capturée dans ce dossier (ou ADE_ARCHIVE_DIR)")
+    parser.add_argument('--from-archive', action='store_true',
+                        help="Reconstruire le calendrier à partir des semaines archivées, sans navigateur ni connexion")
+    parser.add_argument('--extract', choices=['html', 'grid'], default='html',
+                        help="html: page complète, sauvegardée dans schedule.html (défaut), grid: extraction compacte dans le navigateur")
+    parser.add_argument('--store', help="Enregistrer les cours dans cette base SQLite (ou ADE_STORE) et générer "
+                                        "le calendrier à partir de la base (semaines capturées précédemment comprises)")
+    parser.add_argument('--previous', help="Calendrier généré précédemment, pour des UID et SEQUENCE stables "
+                                           "(défaut: le fichier de sortie existant)")
+    parser.add_argument('--parse-workers', type=int, default=1,
+                        help="Processus de parsing des semaines capturées en parallèle (0: un par coeur)")
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help="Nombre de navigateurs capturant des semaines en parallèle")
+    parser.add_argument('--profile-dir', help="Profil Chrome persistant pour un démarrage à chaud (ou ADE_PROFILE_DIR)")
+    parser.add_argument('--resource-policy', choices=['none', 'safe', 'aggressive'],
+                        help="Ressources bloquées au chargement: safe bloque polices, images et statistiques "
+                             "(défaut: ADE_RESOURCE_POLICY ou safe; none pour tout charger)")
+    parser.add_argument('--resource-report', action='store_true',
+                        help="Rapport des requêtes bloquées et des octets économisés (ou ADE_RESOURCE_REPORT=1)")
+    parser.add_argument('--no-session-cache', action='store_true',
+                        help="Ne pas réutiliser ni enregistrer les cookies de session SSO")
+    args = parser.parse_args()
+
     print("=" * 50)
     print("ADE Schedule Scraper - UT Capitole")
     print("=" * 50)
 
+    store = args.store or os.environ.get('ADE_STORE')
+
+    if args.from_archive:
+        weeks = None if args.weeks == 'all' else resolve_weeks(args.weeks)
+        archive = WeekArchive(args.archive)
+        week_contents = archive.load_weeks(PROGRAMME, weeks)
+        if week_contents:
+            events = parse_weeks(week_contents, args.parse_workers)
+            if store:
+                # Seules les semaines présentes dans l'archive remplacent celles de la base
+                events = update_store(PROGRAMME, events, archive.loaded_weeks if weeks else None, args.store)
+            export_ical(events, previous_file=args.previous)
+        else:
+            print("\n❌ Aucune semaine archivée")
+        return
+
     # Utiliser les variables d'environnement ou demander
     username = os.environ.get('SSO_USERNAME')
     password = os.environ.get('SSO_PASSWORD')
@@ -446,24 +320,59 @@ def main():
         username = input("Identifiant: ")
         password = input("Mot de passe: ")
 
-    # Créer le scraper
-    scraper = ADEScraper(username, password)
+    scraper = None
+    events = None
 
     try:
-        # Se connecter
-        if not scraper.login():
-            print("\n❌ Impossible de se connecter. Vérifiez vos identifiants.")
-            return
-
-        # Récupérer l'emploi du temps
-        html_content = scraper.get_schedule()
+        if args.concurrency > 1:
+            # Chaque navigateur se connecte puis capture sa tranche de semaines
+            from ade_capture import capture_weeks_concurrently
+            html_content = capture_weeks_concurrently(
+                partial(ADEScraper.capture_week_range, username, password, profile_dir=args.profile_dir,
+                        resource_policy=args.resource_policy,
+                        resource_report=args.resource_report or None, session_cache=not args.no_session_cache,
+                        extract=args.extract, archive_dir=args.archive),
+                resolve_weeks(args.weeks), args.concurrency)
+        else:
+            # Créer le scraper
+            scraper = ADEScraper(username, password, profile_dir=args.profile_dir, resource_policy=args.resource_policy,
+                                 resource_report=args.resource_report or None,
+                                 session_cache=not args.no_session_cache, archive_dir=args.archive)
+
+            # Se connecter
+            if not scraper.login():
+                print("\n❌ Impossible de se connecter. Vérifiez vos identifiants.")
+                return
+
+            # Récupérer l'emploi du temps: chaque semaine est parsée pendant le chargement de la suivante
+            html_content = []
+            try:
+                with ParsePipeline() as pipeline:
+                    for week_content in scraper.iter_schedule(weeks=args.weeks, extract=args.extract):
+                        # Seule la première semaine est conservée (schedule.html)
+                        if not html_content:
+                            html_content.append(week_content)
+                        pipeline.submit(week_content)
+                events = pipeline.events
+            except Exception as e:
+                print(f"✗ Erreur lors de la récupération: {e}")
+                html_content = None
 
         if html_content:
             # Sauvegarder le HTML pour analyse
-            scraper.save_html(html_content)
+            if args.extract == 'html':
+                ADEScraper.save_html(html_content)
+
+            if events is None:
+                # Semaines capturées en parallèle: parsing après la capture
+                events = parse_weeks(html_content, args.parse_workers)
+            if store:
+                # Semaines effectivement capturées; navigateurs parallèles: semaines des cours seulement
+                # (une tranche en échec ne doit pas vider la base)
+                events = update_store(PROGRAMME, events, scraper.captured_weeks if scraper else None, args.store)
 
             # Générer le fichier iCal
-            ical_file = scraper.parse_and_export_ical(html_content)
+            ical_file = export_ical(events, previous_file=args.previous)
 
             print("\n" + "=" * 50)
             print("✓ Processus terminé")
@@ -478,7 +387,8 @@ def main():
             print("\n❌ Impossible de récupérer l'emploi du temps")
     finally:
         # Toujours fermer le navigateur
-        scraper.close()
+        if scraper:
+            scraper.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,257 @@
+"""
+Serveur local des calendriers (flux iCal pour les abonnés), à partir d'un index en mémoire.
+
+Les cours (fichier iCal publié ou base ade_store) sont triés par début et chaque VEVENT est sérialisé
+une seule fois; une réponse n'est qu'une concaténation des VEVENT sélectionnés:
+    - ETag fort (version des données + filtres + encodage) et Last-Modified: réponse 304 sans rien construire
+      (If-None-Match, sinon If-Modified-Since)
+    - corps gzip précompressé (calendrier complet) ou compressé une fois par filtre (cache LRU)
+    - filtres ?from=AAAA-MM-JJ&to=AAAA-MM-JJ&group=IMMGA1TD01, par recherche dichotomique sur les débuts
+L'index est rechargé quand le fichier (ou la base) change.
+
+Utilisation: python ade_server.py [--ics edt_m1_miage.ics | --store FICHIER --programme NOM] [--port 8000]
+             python ade_public_scraper.py serve [--port 8000]
+"""
+from ade_ics import ICSWriter
+from ade_store import EventStore, day_start_minutes
+from ade_sync import event_groups, load_published
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import urlsplit, parse_qs
+from functools import lru_cache
+from datetime import date
+import threading
+import hashlib
+import bisect
+import gzip
+import io
+import os
+
+CONTENT_TYPE = 'text/calendar; charset=utf-8'
+CACHE_CONTROL = 'public, max-age=300'
+
+
+class FeedIndex:
+    """
+    Cours triés par début, VEVENT sérialisés une fois; rendu de calendriers complets ou filtrés
+    """
+
+    def __init__(self, events, prodid, calname, modified):
+        self.modified = int(modified)
+        events = sorted(events, key=lambda event: (event.start, event.uid or ''))
+        stamp = self.modified // 60
+        for event in events:
+            # Cours de la base ou d'un calendrier antérieur aux UID: DTSTAMP de la source
+            if event.uid and event.stamp is None:
+                event.stamp = stamp
+
+        stream = io.BytesIO()
+        writer = ICSWriter(stream, prodid, calname)
+        self.header = stream.getvalue()
+        self.chunks = []
+        for event in events:
+            position = stream.tell()
+            writer.write_event(event)
+            self.chunks.append(stream.getvalue()[position:])
+        position = stream.tell()
+        writer.close()
+        self.footer = stream.getvalue()[position:]
+
+        self.starts = [event.start for event in events]
+        self.ends = [event.end for event in events]
+        self.groups = [frozenset(event_groups(event)) for event in events]
+        self.max_duration = max((end - start for start, end in zip(self.starts, self.ends)), default=0)
+
+        digest = hashlib.sha256(self.header + self.footer)
+        for chunk in self.chunks:
+            digest.update(chunk)
+        self.version = digest.hexdigest()[:20]
+        self.render = lru_cache(maxsize=256)(self._render)
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def select(self, start=None, end=None, group=None):
+        """
+        Indices des cours qui chevauchent [start, end[ (minutes UTC), éventuellement d'un seul groupe
+        """
+        # Un cours qui chevauche start commence au plus max_duration avant
+        low = 0 if start is None else bisect.bisect_left(self.starts, start - self.max_duration)
+        high = len(self.starts) if end is None else bisect.bisect_left(self.starts, end)
+        return [i for i in range(low, high)
+                if (start is None or self.ends[i] > start) and (not group or group in self.groups[i])]
+
+    def etag(self, start=None, end=None, group=None, encoding=None):
+        """
+        ETag fort: les octets servis ne dépendent que des données, des filtres et de l'encodage
+        (le corps gzip est une autre représentation, avec son propre ETag)
+        """
+        tag = self.version
+        if start is not None or end is not None or group:
+            tag += '-' + hashlib.sha1(f"{start}|{end}|{group or ''}".encode('utf-8')).hexdigest()[:8]
+        if encoding:
+            tag += f'-{encoding}'
+        return f'"{tag}"'
+
+    def _render(self, start=None, end=None, group=None):
+        """
+        (corps, corps gzip) du calendrier filtré
+        """
+        if start is None and end is None and not group:
+            chunks = self.chunks
+        else:
+            chunks = [self.chunks[i] for i in self.select(start, end, group)]
+        body = self.header + b''.join(chunks) + self.footer
+        return body, gzip.compress(body, compresslevel=6, mtime=0)
+
+
+class FeedSource:
+    """
+    Source des cours (fichier iCal ou base ade_store), index reconstruit quand la source change
+    """
+
+    def __init__(self, ics_file=None, store=None, programme=None, prodid='-//edt-miage//FR', calname='Emploi du temps'):
+        self.ics_file = ics_file
+        self.store = store
+        self.programme = programme
+        self.prodid = prodid
+        self.calname = calname
+        self.lock = threading.Lock()
+        self._index = None
+        self._mtime = None
+
+    def _source_mtime(self):
+        if self.store:
+            # Écritures en mode WAL: le fichier -wal change avant la base
+            paths = [self.store, self.store + '-wal']
+        else:
+            paths = [self.ics_file]
+        return max((os.stat(path).st_mtime for path in paths if os.path.exists(path)), default=None)
+
+    def _load(self):
+        if self.store:
+            with EventStore(self.store) as store:
+                return store.events(self.programme)
+        return list(load_published(self.ics_file).values())
+
+    def index(self):
+        mtime = self._source_mtime()
+        with self.lock:
+            if self._index is None or mtime != self._mtime:
+                events = self._load() if mtime is not None else []
+                self._index = FeedIndex(events, self.prodid, self.calname, mtime or 0)
+                self._mtime = mtime
+                print(f"✓ Index du flux: {len(self._index)} cours (version {self._index.version})")
+            return self._index
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    server_version = 'edt-miage'
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head=False):
+        url = urlsplit(self.path)
+        if url.path != '/' and not url.path.endswith('.ics'):
+            self.send_error(404)
+            return
+        try:
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            start = day_start_minutes(date.fromisoformat(params['from'])) if params.get('from') else None
+            end = day_start_minutes(date.fromisoformat(params['to'])) if params.get('to') else None
+        except ValueError:
+            self.send_error(400, "Dates attendues au format AAAA-MM-JJ")
+            return
+        group = params.get('group') or None
+
+        index = self.server.feed.index()
+        use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+        # ETag de la représentation négociée: un 304 ne valide que les octets déjà reçus
+        etag = index.etag(start, end, group, 'gzip' if use_gzip else None)
+        if self._not_modified(etag, index.modified):
+            self.send_response(304)
+            self._send_cache_headers(etag, index.modified)
+            self.end_headers()
+            return
+
+        body, compressed = index.render(start, end, group)
+        payload = compressed if use_gzip else body
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(payload)))
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self._send_cache_headers(etag, index.modified)
+        self.end_headers()
+        if not head:
+            self.wfile.write(payload)
+
+    def _not_modified(self, etag, modified):
+        """
+        Requête conditionnelle satisfaite pour la représentation négociée (etag: identité ou gzip)
+        """
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            # If-None-Match prime sur If-Modified-Since (RFC 9110 §13.2.2)
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags or f'W/{etag}' in tags
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return int(parsedate_to_datetime(if_modified_since).timestamp()) >= modified
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send_cache_headers(self, etag, modified):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(modified, usegmt=True))
+        self.send_header('Cache-Control', CACHE_CONTROL)
+        self.send_header('Vary', 'Accept-Encoding')
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def create_server(feed, host='127.0.0.1', port=8000, quiet=False):
+    """
+    Serveur HTTP du flux (port 0: port libre choisi par le système, voir server.server_address)
+    """
+    server = ThreadingHTTPServer((host, port), FeedHandler)
+    server.feed = feed
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None, ics_file='edt_m1_miage.ics', programme=None, prodid='-//edt-miage//FR',
+         calname='Emploi du temps'):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serveur local des calendriers (ETag, 304, gzip, filtres)")
+    parser.add_argument('--ics', default=ics_file, help="Calendrier servi (défaut: %(default)s)")
+    parser.add_argument('--store', help="Servir les cours de la base ade_store plutôt qu'un fichier iCal")
+    parser.add_argument('--programme', default=programme, help="Programme servi depuis la base")
+    parser.add_argument('--host', default='127.0.0.1', help="Adresse d'écoute (défaut: %(default)s)")
+    parser.add_argument('--port', type=int, default=8000, help="Port (défaut: %(default)s)")
+    parser.add_argument('--quiet', action='store_true', help="Ne pas journaliser les requêtes")
+    args = parser.parse_args(argv)
+
+    if args.store and not args.programme:
+        parser.error("--store nécessite --programme")
+    feed = FeedSource(ics_file=args.ics, store=args.store, programme=args.programme, prodid=prodid, calname=calname)
+    feed.index()
+    server = create_server(feed, args.host, args.port, args.quiet)
+    host, port = server.server_address[:2]
+    print(f"✓ Flux iCal sur http://{host}:{port}/calendar.ics (?from=AAAA-MM-JJ&to=AAAA-MM-JJ&group=...)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Conservation des cookies de session ADE / CAS entre deux exécutions (évite le formulaire SSO)
+"""
+from ade_browser import CACHE_DIR
+import tempfile
+import hashlib
+import time
+import json
+import os
+
+COOKIE_DOMAIN = 'ut-capitole.fr'
+CDP_COOKIE_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
+
+
+class CookieStore:
+    """
+    Stocke les cookies d'un utilisateur dans un fichier lisible uniquement par le compte courant (0600).
+    Les cookies passent par le protocole DevTools pour inclure ceux du domaine CAS, pas seulement
+    ceux de la page courante.
+    """
+
+    def __init__(self, username, path=None):
+        if not path:
+            # Un fichier par utilisateur, sans exposer l'identifiant dans le nom
+            user_hash = hashlib.sha256(username.encode('utf-8')).hexdigest()[:16]
+            path = os.path.join(CACHE_DIR, f'ade_cookies_{user_hash}.json')
+        self.path = path
+
+    def save(self, driver):
+        """
+        Enregistre les cookies ut-capitole.fr du navigateur (écriture atomique)
+        """
+        try:
+            cookies = driver.execute_cdp_cmd('Network.getAllCookies', {})['cookies']
+        except Exception as e:
+            print(f"  ⚠ Cookies non sauvegardés: {e}")
+            return False
+
+        cookies = [{k: c[k] for k in CDP_COOKIE_FIELDS if k in c}
+                   for c in cookies if c.get('domain', '').endswith(COOKIE_DOMAIN)]
+
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # Fichier temporaire unique: les navigateurs parallèles (--concurrency) partagent le même processus
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + '.', suffix='.tmp')
+        os.chmod(tmp_path, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'saved_at': time.time(), 'cookies': cookies}, f)
+        os.replace(tmp_path, self.path)
+        print(f"  ✓ Session sauvegardée ({len(cookies)} cookies)")
+        return True
+
+    def restore(self, driver):
+        """
+        Réinjecte les cookies enregistrés non expirés, retourne True si des cookies ont été restaurés
+        """
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                cookies = json.load(f)['cookies']
+        except (OSError, ValueError, KeyError):
+            return False
+
+        now = time.time()
+        # expires absent ou <= 0: cookie de session, toujours valable côté navigateur
+        cookies = [c for c in cookies if c.get('expires', -1) <= 0 or c['expires'] > now]
+        if not cookies:
+            return False
+
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+        except Exception as e:
+            print(f"  ⚠ Cookies non restaurés: {e}")
+            return False
+        return True
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
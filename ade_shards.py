@@ -0,0 +1,205 @@
+"""
+Calendriers découpés dans le temps et précompressés, pour servir le plus petit fichier utile:
+
+    shards/
+        manifest.json              # fichiers, période, nombre de cours, taille et SHA-256
+        next-14-days.ics(.gz,.br)  # cours des 14 prochains jours
+        week/2025-W47.ics(...)     # une semaine ISO
+        month/2025-11.ics(...)     # un mois
+
+Chaque fichier est accompagné de sa version gzip (et brotli si le module brotli est installé), chacune
+avec sa taille et son SHA-256 dans le manifeste. Un fichier n'est réécrit que si son contenu change
+(le manifeste publié peut être téléchargé avant la génération, comme le calendrier de backup).
+Les tranches par semaine et par mois décident de la republication; la fenêtre des 14 prochains jours
+avance chaque jour et est seulement rafraîchie, elle est publiée avec le prochain changement.
+
+Utilisation: python ade_shards.py edt_m1_miage.ics [--output shards]
+"""
+from ade_events import from_minutes
+from ade_ics import ICSWriter
+from ade_store import day_start_minutes
+from datetime import date, timedelta
+import hashlib
+import pytz
+import json
+import gzip
+import io
+import os
+
+SHARDS_DIR = 'shards'
+MANIFEST_FILE = 'manifest.json'
+ROLLING_FILE = 'next-14-days.ics'
+ROLLING_DAYS = 14
+PARIS_TZ = pytz.timezone('Europe/Paris')
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def render_ics(events, prodid, calname):
+    """
+    Octets d'un calendrier (même format que write_ics)
+    """
+    stream = io.BytesIO()
+    writer = ICSWriter(stream, prodid, calname)
+    for event in events:
+        writer.write_event(event)
+    writer.close()
+    return stream.getvalue()
+
+
+def build_shards(events, today=None):
+    """
+    Tranches (chemin, type, période, premier jour, lendemain du dernier jour, cours):
+    fenêtre glissante des 14 prochains jours, puis une tranche par semaine ISO et par mois (jour de début, heure de Paris).
+    Cours triés par début: le contenu des tranches ne dépend pas de l'ordre de capture.
+    """
+    today = today or date.today()
+    events = sorted(events, key=lambda event: (event.start, event.uid or ''))
+    rolling_start = day_start_minutes(today)
+    rolling_end = day_start_minutes(today + timedelta(days=ROLLING_DAYS))
+    shards = [(ROLLING_FILE, 'rolling', f'{ROLLING_DAYS}d', today, today + timedelta(days=ROLLING_DAYS),
+               [event for event in events if event.end > rolling_start and event.start < rolling_end])]
+
+    weeks, months = {}, {}
+    for event in events:
+        day = from_minutes(event.start).astimezone(PARIS_TZ).date()
+        year, week, _ = day.isocalendar()
+        weeks.setdefault((year, week), []).append(event)
+        months.setdefault((day.year, day.month), []).append(event)
+
+    for (year, week), week_events in sorted(weeks.items()):
+        monday = date.fromisocalendar(year, week, 1)
+        shards.append((f'week/{year}-W{week:02d}.ics', 'week', f'{year}-W{week:02d}', monday,
+                       monday + timedelta(days=7), week_events))
+    for (year, month), month_events in sorted(months.items()):
+        first = date(year, month, 1)
+        shards.append((f'month/{year}-{month:02d}.ics', 'month', f'{year}-{month:02d}', first,
+                       (first + timedelta(days=32)).replace(day=1), month_events))
+    return shards
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _remove(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _file_hashes(manifest):
+    """
+    SHA-256 de chaque fichier d'un manifeste (tranches et versions compressées), par chemin
+    """
+    hashes = {}
+    for entry in (manifest or {}).get('files', []):
+        hashes[entry['path']] = entry.get('sha256')
+        for encoded in entry.get('encodings', {}).values():
+            hashes[encoded['path']] = encoded.get('sha256')
+    return hashes
+
+
+def write_shards(events, directory=SHARDS_DIR, prodid='-//edt-miage//FR', calname='Emploi du temps', today=None):
+    """
+    Écrit les tranches dont le contenu a changé (ou absentes du dossier) et leurs versions compressées,
+    puis le manifeste. Retourne True si les tranches par semaine ou par mois ont changé (fichiers ajoutés,
+    supprimés ou SHA-256 différent), indépendamment des dates de la fenêtre des 14 prochains jours.
+    """
+    brotli = _brotli()
+    files = []
+    payloads = {}
+    for path, kind, period, first, end, shard_events in build_shards(events, today):
+        label = f"{ROLLING_DAYS} prochains jours" if kind == 'rolling' else period
+        data = render_ics(shard_events, prodid, f"{calname} ({label})")
+        encoded = {'gzip': (path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))}
+        if brotli:
+            encoded['br'] = (path + '.br', brotli.compress(data, quality=11))
+        payloads[path] = data
+        payloads.update(encoded.values())
+        files.append({
+            'path': path,
+            'kind': kind,
+            'period': period,
+            'from': first.isoformat(),
+            'to': end.isoformat(),
+            'events': len(shard_events),
+            'size': len(data),
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'encodings': {name: {'path': encoded_path, 'size': len(content),
+                                 'sha256': hashlib.sha256(content).hexdigest()}
+                          for name, (encoded_path, content) in encoded.items()},
+        })
+
+    manifest = {'calendar': calname, 'files': files}
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    previous = None
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                previous = json.load(f)
+        except ValueError:
+            previous = None
+    published = _file_hashes(previous)
+    current = _file_hashes(manifest)
+    # Fenêtre glissante (et ses versions compressées) exclue: elle change chaque jour
+    changed = ({path: digest for path, digest in current.items() if not path.startswith(ROLLING_FILE)} !=
+               {path: digest for path, digest in published.items() if not path.startswith(ROLLING_FILE)})
+
+    written = 0
+    for path, data in payloads.items():
+        # Manifeste publié téléchargé seul (workflow): fichiers absents écrits sans compter comme un changement
+        target = os.path.join(directory, path)
+        if published.get(path) != hashlib.sha256(data).hexdigest() or not os.path.exists(target):
+            _write_atomic(target, data)
+            written += 1
+    # Tranches disparues (semaines et mois sortis de la période couverte)
+    for entry in (previous or {}).get('files', []):
+        if entry['path'] not in payloads:
+            _remove(os.path.join(directory, entry['path']))
+            for encoded in entry.get('encodings', {}).values():
+                _remove(os.path.join(directory, encoded['path']))
+    if previous != manifest:
+        _write_atomic(manifest_path, (json.dumps(manifest, indent=2, ensure_ascii=False) + '\n').encode('utf-8'))
+
+    total = sum(entry['size'] for entry in files)
+    compressed = sum(entry['encodings']['gzip']['size'] for entry in files)
+    state = "modifiées" if changed else "inchangées"
+    print(f"✓ {len(files)} tranches {state} dans {directory} ({written} fichier(s) écrit(s), {total / 1024:.0f} Ko, "
+          f"gzip {compressed / 1024:.0f} Ko{', brotli' if brotli else ''})")
+    return changed
+
+
+def main():
+    import argparse
+    from ade_sync import load_published
+    from icalendar import Calendar
+
+    parser = argparse.ArgumentParser(description="Calendriers par semaine, par mois et des 14 prochains jours")
+    parser.add_argument('calendar', help="Calendrier iCal source (ex: edt_m1_miage.ics)")
+    parser.add_argument('--output', default=SHARDS_DIR, help="Dossier des tranches (défaut: %(default)s)")
+    args = parser.parse_args()
+
+    with open(args.calendar, 'rb') as f:
+        calendar = Calendar.from_ical(f.read())
+    events = list(load_published(args.calendar).values())
+    stamp = int(os.path.getmtime(args.calendar)) // 60
+    for event in events:
+        # Calendrier antérieur aux UID: DTSTAMP du fichier
+        if event.stamp is None:
+            event.stamp = stamp
+    write_shards(events, args.output, prodid=str(calendar.get('prodid', '-//edt-miage//FR')),
+                 calname=str(calendar.get('x-wr-calname', 'Emploi du temps')))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Base locale des cours (SQLite, mode WAL), alimentée par les deux scrapers.
+
+Chaque cours est enregistré sous son identité stable (programme, UID de ade_sync), avec la semaine
+(lundi, heure de Paris) et l'exécution de capture qui l'a vu en dernier. Une capture ne remplace que
+les semaines qu'elle a parcourues: des captures partielles (plages de semaines, navigateurs parallèles,
+archive) se complètent. Les sorties (iCal...) sont générées par des requêtes indexées:
+    events(programme, dtstart)       -> période
+    event_groups(programme, groupe)  -> cours d'un groupe (IMMGA1TD01...)
+    events(run_id)                   -> cours vus par une capture
+    weeks(programme, lundi)          -> date de la dernière capture de chaque semaine (voir ade_refresh)
+
+Utilisation: python ade_store.py [--store FICHIER] stats | runs | export PROGRAMME [--from --to --group --output]
+"""
+from ade_browser import CACHE_DIR
+from ade_events import EventRecord, from_minutes, to_minutes
+from ade_sync import assign_uids, event_groups
+from ade_weeks import monday_of_week
+from datetime import date, datetime, timedelta
+import sqlite3
+import pytz
+import json
+import os
+
+STORE_FILE = os.path.join(CACHE_DIR, 'events.sqlite3')
+PARIS_TZ = pytz.timezone('Europe/Paris')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    programme TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    weeks TEXT NOT NULL,
+    events INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS events (
+    programme TEXT NOT NULL,
+    uid TEXT NOT NULL,
+    monday TEXT NOT NULL,
+    dtstart INTEGER NOT NULL,
+    dtend INTEGER NOT NULL,
+    summary TEXT NOT NULL,
+    location TEXT NOT NULL,
+    description TEXT,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    PRIMARY KEY (programme, uid)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS events_start ON events (programme, dtstart);
+CREATE INDEX IF NOT EXISTS events_week ON events (programme, monday);
+CREATE INDEX IF NOT EXISTS events_run ON events (run_id);
+CREATE TABLE IF NOT EXISTS event_groups (
+    programme TEXT NOT NULL,
+    group_code TEXT NOT NULL,
+    dtstart INTEGER NOT NULL,
+    uid TEXT NOT NULL,
+    PRIMARY KEY (programme, group_code, dtstart, uid)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS event_groups_uid ON event_groups (programme, uid);
+CREATE TABLE IF NOT EXISTS weeks (
+    programme TEXT NOT NULL,
+    monday TEXT NOT NULL,
+    captured_at TEXT NOT NULL,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    PRIMARY KEY (programme, monday)
+) WITHOUT ROWID;
+"""
+
+EVENT_COLUMNS = 'e.uid, e.dtstart, e.dtend, e.summary, e.location, e.description'
+
+
+def week_monday(minutes):
+    """
+    Lundi (heure de Paris) de la semaine d'un début de cours en minutes UTC
+    """
+    day = from_minutes(minutes).astimezone(PARIS_TZ).date()
+    return day - timedelta(days=day.weekday())
+
+
+def day_start_minutes(day):
+    """
+    Minutes UTC de minuit (heure de Paris) d'une date
+    """
+    return to_minutes(PARIS_TZ.localize(datetime(day.year, day.month, day.day)))
+
+
+class EventStore:
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('ADE_STORE') or STORE_FILE
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        # WAL: lectures (serveur, exports) pendant l'écriture d'une capture
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self.conn.close()
+
+    def save_weeks(self, programme, events, mondays=None):
+        """
+        Enregistre une capture: les cours des semaines parcourues (lundis `mondays`, sinon ceux des cours)
+        remplacent ceux déjà connus pour ces semaines. Retourne l'identifiant de la capture.
+        """
+        assign_uids(events)
+        rows = [(programme, event.uid, week_monday(event.start).isoformat(), event.start, event.end,
+                 event.summary, event.location, event.description) for event in events]
+        touched = sorted(set(mondays or ()) | {row[2] for row in rows})
+
+        started_at = datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            run_id = self.conn.execute(
+                'INSERT INTO runs (programme, started_at, weeks, events) VALUES (?, ?, ?, ?)',
+                (programme, started_at, json.dumps(touched), len(rows))).lastrowid
+            self.conn.executemany('INSERT OR REPLACE INTO weeks VALUES (?, ?, ?, ?)',
+                                  [(programme, monday, started_at, run_id) for monday in touched])
+            for monday in touched:
+                self.conn.execute('DELETE FROM event_groups WHERE programme = ? AND uid IN '
+                                  '(SELECT uid FROM events WHERE programme = ? AND monday = ?)',
+                                  (programme, programme, monday))
+                self.conn.execute('DELETE FROM events WHERE programme = ? AND monday = ?', (programme, monday))
+            self.conn.executemany('INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                  [row + (run_id,) for row in rows])
+            self.conn.executemany('INSERT OR IGNORE INTO event_groups VALUES (?, ?, ?, ?)',
+                                  [(programme, group, event.start, event.uid)
+                                   for event in events for group in event_groups(event)])
+        return run_id
+
+    def events(self, programme, start=None, end=None, group=None):
+        """
+        Cours du programme entre deux dates (début inclus, fin exclue), éventuellement d'un seul groupe,
+        par ordre de début
+        """
+        start = day_start_minutes(start) if isinstance(start, date) else start
+        end = day_start_minutes(end) if isinstance(end, date) else end
+        low = start if start is not None else -2 ** 62
+        high = end if end is not None else 2 ** 62
+        if group:
+            cursor = self.conn.execute(
+                f'SELECT {EVENT_COLUMNS} FROM event_groups g JOIN events e ON e.programme = g.programme '
+                'AND e.uid = g.uid WHERE g.programme = ? AND g.group_code = ? AND g.dtstart >= ? AND g.dtstart < ? '
+                'ORDER BY g.dtstart, g.uid', (programme, group, low, high))
+        else:
+            cursor = self.conn.execute(
+                f'SELECT {EVENT_COLUMNS} FROM events e WHERE e.programme = ? AND e.dtstart >= ? AND e.dtstart < ? '
+                'ORDER BY e.dtstart, e.uid', (programme, low, high))
+
+        events = []
+        for uid, dtstart, dtend, summary, location, description in cursor:
+            event = EventRecord(dtstart, dtend, summary, location, description)
+            event.uid = uid
+            events.append(event)
+        return events
+
+    def freshness(self, programme):
+        """
+        Date de la dernière capture de chaque semaine du programme (lundi → datetime)
+        """
+        return {date.fromisoformat(monday): datetime.fromisoformat(captured_at) for monday, captured_at
+                in self.conn.execute('SELECT monday, captured_at FROM weeks WHERE programme = ?', (programme,))}
+
+    def groups(self, programme):
+        return [row[0] for row in self.conn.execute(
+            'SELECT DISTINCT group_code FROM event_groups WHERE programme = ? ORDER BY group_code', (programme,))]
+
+    def runs(self, programme=None, limit=20):
+        query = 'SELECT id, programme, started_at, weeks, events FROM runs'
+        params = ()
+        if programme:
+            query += ' WHERE programme = ?'
+            params = (programme,)
+        return self.conn.execute(query + ' ORDER BY id DESC LIMIT ?', params + (limit,)).fetchall()
+
+    def stats(self):
+        return {
+            'events': self.conn.execute('SELECT COUNT(*) FROM events').fetchone()[0],
+            'weeks': self.conn.execute('SELECT COUNT(DISTINCT programme || monday) FROM events').fetchone()[0],
+            'runs': self.conn.execute('SELECT COUNT(*) FROM runs').fetchone()[0],
+            'programmes': [row[0] for row in self.conn.execute('SELECT DISTINCT programme FROM events')],
+        }
+
+
+def update_store(programme, events, weeks=None, path=None, today=None):
+    """
+    Enregistre les semaines capturées (numéros ISO `weeks`, sinon les semaines des cours) dans la base
+    et retourne tous les cours connus à partir de la semaine courante (captures précédentes comprises).
+    Si la base est inaccessible, les cours capturés sont retournés tels quels.
+    """
+    today = today or date.today()
+    mondays = [monday_of_week(week, today).isoformat() for week in weeks] if weeks else None
+    try:
+        with EventStore(path) as store:
+            run_id = store.save_weeks(programme, events, mondays)
+            stored = store.events(programme, start=today - timedelta(days=today.weekday()))
+            print(f"✓ Base des cours ({store.path}): capture {run_id}, {len(stored)} cours à partir de cette semaine")
+    except sqlite3.Error as e:
+        print(f"⚠ Base des cours inaccessible: {e}")
+        return events
+    return stored
+
+
+def main():
+    import argparse
+    from ade_sync import publish_ics
+
+    parser = argparse.ArgumentParser(description="Base locale des cours")
+    parser.add_argument('--store', help="Fichier SQLite (défaut: ADE_STORE ou ~/.cache/edt-miage/events.sqlite3)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help="Nombre de cours, semaines et captures")
+    subparsers.add_parser('runs', help="Dernières captures")
+    export_cmd = subparsers.add_parser('export', help="Écrire un calendrier iCal à partir de la base")
+    export_cmd.add_argument('programme', help="Programme (ex: 'M1 MIAGE FA-ALT', 'myplanning')")
+    export_cmd.add_argument('--from', dest='start', type=date.fromisoformat, help="Premier jour (AAAA-MM-JJ)")
+    export_cmd.add_argument('--to', dest='end', type=date.fromisoformat, help="Dernier jour exclu (AAAA-MM-JJ)")
+    export_cmd.add_argument('--group', help="Code du groupe (ex: IMMGA1TD01)")
+    export_cmd.add_argument('--output', default='export.ics', help="Fichier iCal")
+    args = parser.parse_args()
+
+    with EventStore(args.store) as store:
+        if args.command == 'stats':
+            stats = store.stats()
+            print(f"{stats['events']} cours, {stats['weeks']} semaine(s), {stats['runs']} capture(s) "
+                  f"({', '.join(stats['programmes']) or 'aucun programme'})")
+        elif args.command == 'runs':
+            for run_id, programme, started_at, weeks, count in store.runs():
+                weeks = json.loads(weeks)
+                span = f"{weeks[0]} → {weeks[-1]}" if weeks else "-"
+                print(f"{run_id:>5}  {started_at}  {programme:<20} {len(weeks):>2} semaine(s) {span}  {count} cours")
+        else:
+            events = store.events(args.programme, args.start, args.end, args.group)
+            # UID, SEQUENCE et DTSTAMP repris de l'export précédent
+            if publish_ics(events, args.output, args.output, prodid=f"-//{args.programme}//FR",
+                           calname=args.programme) is not None:
+                print(f"✓ {len(events)} cours exportés dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Synchronisation avec le calendrier publié précédemment: UID stables, DTSTAMP et SEQUENCE.
+
+Chaque cours reçoit un UID déterministe dérivé de son identité (titre, groupes, créneau de début).
+Le calendrier précédent (edt_backup.ics téléchargé par le workflow, ou le fichier de sortie en local)
+est comparé aux nouveaux cours:
+    - cours inchangé: même SEQUENCE et même DTSTAMP, les clients (Apple, Google) n'ont rien à resynchroniser
+    - cours modifié (salle, horaire de fin, description...): SEQUENCE + 1, DTSTAMP de l'exécution
+    - nouveau cours: SEQUENCE 0
+    - cours disparu, encore à venir et dans la période capturée: publié en STATUS:CANCELLED (SEQUENCE + 1)
+Les cours hors de la période capturée (semaines passées) ne sont plus publiés, comme avant.
+
+L'empreinte canonique des cours publiés (indépendante de l'ordre, sans DTSTAMP ni SEQUENCE) est écrite dans
+l'en-tête du calendrier (X-EDT-FINGERPRINT): si elle n'a pas changé, le fichier n'est pas réécrit.
+"""
+from ade_events import EventRecord, to_minutes
+from ade_ics import write_ics
+from datetime import datetime
+from icalendar import Calendar
+import hashlib
+import pytz
+import re
+import os
+
+UID_DOMAIN = 'edt-miage'
+# Codes de groupe ADE dans la description (IMMGA1TD01...)
+GROUP_RE = re.compile(r'^(?=[A-Z0-9]*[A-Z])[A-Z0-9]{4,}\d{2}$')
+CANCELLED = 'CANCELLED'
+MINUTES_PER_WEEK = 7 * 24 * 60
+# Le 1er janvier 1970 était un jeudi: décalage du lundi précédent
+MONDAY_OFFSET = 3 * 24 * 60
+# À incrémenter quand le contenu écrit pour un même ensemble de cours change (nouvelles propriétés...)
+FINGERPRINT_VERSION = 1
+FINGERPRINT_RE = re.compile(rb'^X-EDT-FINGERPRINT:([0-9a-f]{64})\r?$', re.MULTILINE)
+
+
+def event_groups(event):
+    """
+    Codes de groupe d'un cours (lignes de la description), triés
+    """
+    lines = (event.description or '').split('\n')
+    return sorted({line.strip() for line in lines if GROUP_RE.match(line.strip())})
+
+
+def event_identity(event):
+    """
+    Identité stable d'un cours: titre (code du cours), groupes et créneau de début.
+    Une salle, un enseignant ou une heure de fin qui change ne change pas l'identité.
+    """
+    return '\x1f'.join([event.summary, ','.join(event_groups(event)), str(event.start)])
+
+
+def assign_uids(events):
+    """
+    Renseigne l'UID de chaque cours; deux cours de même identité (doublons ADE) sont départagés
+    par leur contenu, dans un ordre déterministe
+    """
+    by_identity = {}
+    for event in events:
+        by_identity.setdefault(event_identity(event), []).append(event)
+    for identity, same in by_identity.items():
+        digest = hashlib.sha1(identity.encode('utf-8')).hexdigest()[:24]
+        for i, event in enumerate(sorted(same, key=lambda e: (e.end, e.location, e.description or ''))):
+            event.uid = f"{digest}{f'-{i + 1}' if i else ''}@{UID_DOMAIN}"
+    return events
+
+
+def _utc_minutes(value):
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = pytz.UTC.localize(value)
+    return to_minutes(value)
+
+
+def load_published(path):
+    """
+    Cours du calendrier publié précédemment, par UID (EventRecord avec uid, sequence, stamp et status).
+    Les cours d'un calendrier antérieur aux UID reçoivent l'UID calculé à partir de leur identité.
+    """
+    if not path or not os.path.exists(path) or not os.path.getsize(path):
+        return {}
+    try:
+        with open(path, 'rb') as f:
+            calendar = Calendar.from_ical(f.read())
+    except Exception as e:
+        print(f"⚠ Calendrier précédent illisible ({path}): {e}")
+        return {}
+
+    published = []
+    for component in calendar.walk('VEVENT'):
+        try:
+            start = _utc_minutes(component.decoded('dtstart'))
+            end = _utc_minutes(component.decoded('dtend')) if 'DTEND' in component else start
+        except Exception:
+            continue
+        event = EventRecord(start, end, str(component.get('summary', '')), str(component.get('location', '')),
+                            str(component.get('description', '')))
+        event.uid = str(component['uid']) if 'UID' in component else None
+        event.sequence = int(component.get('sequence', 0))
+        event.stamp = _utc_minutes(component.decoded('dtstamp')) if 'DTSTAMP' in component else None
+        event.status = str(component['status']).upper() if 'STATUS' in component else None
+        published.append(event)
+
+    assign_uids([event for event in published if not event.uid])
+    return {event.uid: event for event in published}
+
+
+def capture_window(events):
+    """
+    Période capturée couverte par les cours: semaines entières (minutes UTC), du lundi de la première
+    semaine au lundi suivant la dernière
+    """
+    first = min(event.start for event in events)
+    last = max(event.start for event in events)
+    start = first - (first + MONDAY_OFFSET) % MINUTES_PER_WEEK
+    end = last - (last + MONDAY_OFFSET) % MINUTES_PER_WEEK + MINUTES_PER_WEEK
+    return start, end
+
+
+def sync_events(events, previous, now=None):
+    """
+    Renseigne UID, SEQUENCE et DTSTAMP des cours par rapport au calendrier précédent (dict UID → cours)
+    et retourne les cours à publier (cours annulés à la fin) avec le bilan des changements
+    """
+    now = to_minutes(now or datetime.now(pytz.UTC))
+    assign_uids(events)
+    stats = {'added': 0, 'changed': 0, 'unchanged': 0, 'cancelled': 0}
+
+    for event in events:
+        old = previous.get(event.uid)
+        if old is None:
+            event.sequence, event.stamp = 0, now
+            stats['added'] += 1
+        elif old == event and old.status != CANCELLED:
+            # Calendrier antérieur aux UID: pas de DTSTAMP à reprendre
+            event.sequence, event.stamp = old.sequence, old.stamp or now
+            stats['unchanged'] += 1
+        else:
+            event.sequence, event.stamp = old.sequence + 1, now
+            stats['changed'] += 1
+
+    if not events:
+        return events, stats
+
+    window_start, window_end = capture_window(events)
+    current = {event.uid for event in events}
+    cancelled = []
+    for uid, old in previous.items():
+        if uid in current or old.end <= now or not window_start <= old.start < window_end:
+            continue
+        if old.status != CANCELLED:
+            old.sequence, old.stamp, old.status = old.sequence + 1, now, CANCELLED
+        cancelled.append(old)
+    cancelled.sort(key=lambda event: (event.start, event.uid))
+    stats['cancelled'] = len(cancelled)
+    return events + cancelled, stats
+
+
+def sync_with_published(events, previous_file, now=None):
+    """
+    Compare les cours au calendrier publié précédemment et retourne les cours à publier
+    """
+    previous = load_published(previous_file)
+    events, stats = sync_events(list(events), previous, now)
+    if previous:
+        print(f"✓ Comparaison avec {previous_file}: {stats['added']} nouveau(x), {stats['changed']} modifié(s), "
+              f"{stats['unchanged']} inchangé(s), {stats['cancelled']} annulé(s)")
+    else:
+        print("⚠ Pas de calendrier précédent: tous les cours sont publiés en SEQUENCE 0")
+    return events
+
+
+def fingerprint(events):
+    """
+    Empreinte canonique (SHA-256) des cours à publier: indépendante de leur ordre,
+    sans les champs volatils (DTSTAMP, SEQUENCE)
+    """
+    lines = sorted('\x1f'.join(map(str, (event.uid, event.start, event.end, event.summary, event.location,
+                                          event.description or '', event.status or '')))
+                   for event in events)
+    digest = hashlib.sha256(f"v{FINGERPRINT_VERSION}\n".encode('utf-8'))
+    for line in lines:
+        digest.update(line.encode('utf-8') + b'\n')
+    return digest.hexdigest()
+
+
+def published_fingerprint(path):
+    """
+    Empreinte enregistrée dans l'en-tête d'un calendrier publié, ou None
+    """
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        header = f.read(4096).split(b'BEGIN:VEVENT', 1)[0]
+    # Lignes pliées (RFC 5545 §3.1): une ligne longue continue après "CRLF + espace"
+    match = FINGERPRINT_RE.search(header.replace(b'\r\n ', b'').replace(b'\n ', b''))
+    return match.group(1).decode('ascii') if match else None
+
+
+def publish_ics(events, output_file, previous_file, prodid, calname):
+    """
+    Synchronise les cours avec le calendrier précédent puis écrit output_file, sauf si l'empreinte des cours
+    est celle du calendrier précédent. Retourne le nombre de cours écrits, ou None si rien n'a changé.
+    """
+    return write_if_changed(sync_with_published(events, previous_file), output_file, previous_file, prodid, calname)
+
+
+def write_if_changed(events, output_file, previous_file, prodid, calname, force=False):
+    """
+    Écrit les cours déjà synchronisés dans output_file, sauf si leur empreinte est celle du calendrier
+    précédent (et que force est faux). Retourne le nombre de cours écrits, ou None.
+    """
+    digest = fingerprint(events)
+    if not force and digest == published_fingerprint(previous_file):
+        print(f"✓ Calendrier inchangé depuis la dernière publication (empreinte {digest[:12]}): pas de réécriture")
+        return None
+    return write_ics(events, output_file, prodid=prodid, calname=calname, fingerprint=digest)
@@ -0,0 +1,72 @@
+"""
+Générateur de semaines ADE synthétiques (même structure que la page du planning), pour les benchmarks:
+libellés d'heures (div.slot), jours (div.labelLegend) et cours (div.eventText dans une table.event,
+elle-même dans un div en position absolue).
+"""
+from datetime import date, timedelta
+import random
+
+DAY_LABELS = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi']
+COURSE_TYPES = ['CM', 'TD', 'TP', 'Examen']
+SUBJECTS = ['Bases de données', 'Génie logiciel', 'Réseaux', 'Gestion de projet', 'Anglais',
+            'Droit du numérique', 'Systèmes d\'information', 'Algorithmique', 'Comptabilité', 'Marketing']
+ROOMS = ['AMPHI E MAURY', 'ME 201', 'ME 305', 'AR 104', 'Salle info MC 05', 'MB 112']
+TEACHERS = ['DUPONT Marie', 'MARTIN Paul', 'BERNARD Luc', 'PETIT Claire', 'ROBERT Anne']
+GROUPS = ['IMMGA1AN01', 'IMMGA1CM01', 'IMMGA1DO01', 'IMMGA1DV01', 'IMMGA1TD01']
+# Créneaux de début (heures décimales) et durées usuels
+STARTS = [8, 9.5, 10, 11, 13, 13.5, 14, 15.5, 16, 17.25]
+DURATIONS = [1, 1.5, 2, 3]
+
+
+def week_html(monday, events=20, days=6, seed=0, pixels_per_hour=35, hour_offset=17, column_width=115,
+              tree_nodes=200):
+    """
+    Page HTML d'une semaine du planning (lundi `monday`) avec `events` cours répartis sur `days` jours
+    """
+    rnd = random.Random(seed)
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>ADE</title></head><body>']
+
+    # Arborescence des ressources (bruit présent dans la vraie page)
+    parts.append('<div class="x-tree">')
+    for i in range(tree_nodes):
+        parts.append(f'<div class="x-tree3-node" role="treeitem"><span class="x-tree3-node-text">Ressource {i}</span></div>')
+    parts.append('</div><div id="Planning" style="position: relative;">')
+
+    for hour in range(8, 21):
+        top = round(hour_offset + (hour - 8) * pixels_per_hour)
+        parts.append(f'<div class="slot" style="position: absolute; top: {top}px; left: 0px;">{hour:02d}h00</div>')
+
+    for day in range(days):
+        label = f"{DAY_LABELS[day]} {monday + timedelta(days=day):%d/%m/%Y}"
+        parts.append(f'<div class="labelLegend" style="left:{day * column_width}px; top:0px; width:{column_width}px;">'
+                     f'{label}</div>')
+
+    for _ in range(events):
+        day = rnd.randrange(days)
+        start = rnd.choice(STARTS)
+        duration = rnd.choice(DURATIONS)
+        top = round(hour_offset + 8 + (start - 8) * pixels_per_hour)
+        height = round(duration * pixels_per_hour)
+        label = ' null '.join([
+            f"{rnd.choice(COURSE_TYPES)} {rnd.choice(SUBJECTS)}",
+            rnd.choice(ROOMS),
+            rnd.choice(TEACHERS),
+            *rnd.sample(GROUPS, rnd.randint(1, 3)),
+        ]).replace("'", '&#39;')
+        parts.append(
+            f'<div style="position: absolute; left: {day * column_width + 2}px; top: {top}px; '
+            f'width: {column_width - 4}px; height: {height}px;">'
+            f'<table class="event" style="height:{height}px; width: 100%;" cellspacing="0"><tbody><tr><td>'
+            f'<div class="eventText" aria-label=\'{label}\'>{label.replace(" null ", "<br>")}</div>'
+            f'</td></tr></tbody></table></div>')
+
+    parts.append('</div></body></html>')
+    return ''.join(parts)
+
+
+def weeks_html(weeks=4, events=20, days=6, first_monday=date(2025, 9, 1), **kwargs):
+    """
+    `weeks` semaines consécutives à partir de first_monday (une graine par semaine: contenu reproductible)
+    """
+    return [week_html(first_monday + timedelta(weeks=i), events=events, days=days, seed=i, **kwargs)
+            for i in range(weeks)]
@@ -0,0 +1,172 @@
+"""
+Sélection des semaines à récupérer et navigation directe vers une semaine du planning ADE.
+
+Les boutons de semaine d'ADE sont libellés "(NN)JJ mois AA" où NN est le numéro de semaine ISO.
+Une sélection de semaines peut s'écrire:
+    "2"                       -> la semaine courante et la suivante (un entier seul est un nombre de semaines)
+    "36-52" ou "36–52"        -> semaines 36 à 52 (passage d'année possible: "36-10")
+    "36,38,40-42"             -> liste de semaines et de plages
+    "2025-11-17:2025-12-31"   -> toutes les semaines entre deux dates
+"""
+from selenium.common.exceptions import WebDriverException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+from datetime import date, timedelta
+import re
+
+# Index des boutons de semaine, en un seul appel WebDriver: [numéro, texte, actif, bouton]
+WEEK_BUTTONS_JS = """
+var out = [];
+document.querySelectorAll('button').forEach(function(b) {
+    var t = (b.innerText || b.textContent || '').trim();
+    var m = /^\\((\\d+)\\)/.exec(t);
+    if (m) { out.push([parseInt(m[1], 10), t, b.getAttribute('aria-pressed') === 'true', b]); }
+});
+return out;
+"""
+
+# Clic direct sur le bouton d'une semaine (si la référence en cache est périmée)
+CLICK_WEEK_JS = """
+var buttons = document.querySelectorAll('button');
+for (var i = 0; i < buttons.length; i++) {
+    var t = (buttons[i].innerText || buttons[i].textContent || '').trim();
+    if (t.indexOf('(' + arguments[0] + ')') === 0) { buttons[i].click(); return t; }
+}
+return null;
+"""
+
+WEEK_PRESSED_JS = """
+var buttons = document.querySelectorAll('button[aria-pressed="true"]');
+for (var i = 0; i < buttons.length; i++) {
+    var t = (buttons[i].innerText || buttons[i].textContent || '').trim();
+    if (t.indexOf('(' + arguments[0] + ')') === 0) { return true; }
+}
+return false;
+"""
+
+
+def monday_of_week(week_number, today=None):
+    """
+    Lundi de la semaine ISO `week_number` la plus proche de today (année précédente, courante ou suivante)
+    """
+    today = today or date.today()
+    candidates = []
+    for year in (today.year - 1, today.year, today.year + 1):
+        try:
+            candidates.append(date.fromisocalendar(year, week_number, 1))
+        except ValueError:
+            # Semaine 53 inexistante cette année-là
+            continue
+    if not candidates:
+        raise ValueError(f"Semaine {week_number} invalide")
+    return min(candidates, key=lambda d: abs((d - today).days))
+
+
+def resolve_weeks(spec, today=None):
+    """
+    Convertit une sélection de semaines (entier, texte ou liste de numéros) en liste ordonnée
+    de numéros de semaine ISO, sans doublons
+    """
+    today = today or date.today()
+    current_monday = today - timedelta(days=today.weekday())
+
+    if isinstance(spec, (list, tuple)):
+        weeks = [int(w) for w in spec]
+    elif isinstance(spec, int) or re.fullmatch(r'\s*\d+\s*', str(spec)):
+        # Un entier seul est un nombre de semaines à partir de la semaine courante ("36-36" pour une seule semaine)
+        count = int(spec)
+        weeks = [(current_monday + timedelta(weeks=i)).isocalendar()[1] for i in range(count)]
+    else:
+        spec = str(spec).replace('–', '-').replace(' ', '')
+        weeks = []
+        date_range = re.fullmatch(r'(\d{4}-\d{2}-\d{2}):(\d{4}-\d{2}-\d{2})', spec)
+        if date_range:
+            first = date.fromisoformat(date_range.group(1))
+            last = date.fromisoformat(date_range.group(2))
+            monday = first - timedelta(days=first.weekday())
+            while monday <= last:
+                weeks.append(monday.isocalendar()[1])
+                monday += timedelta(weeks=1)
+        else:
+            for part in spec.split(','):
+                bounds = re.fullmatch(r'(\d+)(?:-(\d+))?', part)
+                if not bounds:
+                    raise ValueError(f"Sélection de semaines invalide: '{part}'")
+                start = int(bounds.group(1))
+                end = int(bounds.group(2) or start)
+                # Parcourir les lundis pour gérer le passage d'année (52 ou 53 semaines)
+                monday = monday_of_week(start, today)
+                for _ in range(54):
+                    week = monday.isocalendar()[1]
+                    weeks.append(week)
+                    if week == end:
+                        break
+                    monday += timedelta(weeks=1)
+
+    ordered = []
+    for week in weeks:
+        if week not in ordered:
+            ordered.append(week)
+    return ordered
+
+
+class WeekNavigator:
+    """
+    Index numéro de semaine -> bouton, construit une fois par session, pour aller directement
+    sur n'importe quelle semaine du planning
+    """
+
+    def __init__(self, driver, readiness):
+        self.driver = driver
+        self.readiness = readiness
+        self.buttons = {}
+        self.order = []
+        self.current = None
+
+    def build_index(self):
+        try:
+            rows = self.driver.execute_script(WEEK_BUTTONS_JS)
+        except WebDriverException as e:
+            print(f"  ⚠ Index des semaines indisponible: {e}")
+            rows = []
+        self.buttons = {}
+        self.order = []
+        for number, text, pressed, button in rows:
+            if number not in self.buttons:
+                self.buttons[number] = button
+                self.order.append(number)
+            if pressed:
+                self.current = number
+        print(f"  Index des semaines: {len(self.order)} boutons, semaine actuelle: {self.current}")
+        return self.buttons
+
+    def goto(self, week_number):
+        """
+        Affiche la semaine demandée et attend le rechargement de la grille. Retourne True si elle est affichée.
+        """
+        if not self.buttons:
+            self.build_index()
+        if week_number == self.current:
+            return True
+        if week_number not in self.buttons:
+            print(f"  ⚠ Semaine {week_number} absente du planning")
+            return False
+
+        try:
+            self.driver.execute_script("arguments[0].click();", self.buttons[week_number])
+        except WebDriverException:
+            # Bouton re-rendu par GWT: cliquer en le retrouvant dans la page
+            if not self.driver.execute_script(CLICK_WEEK_JS, week_number):
+                print(f"  ⚠ Bouton de la semaine {week_number} introuvable")
+                return False
+
+        try:
+            WebDriverWait(self.driver, 10, poll_frequency=0.1).until(
+                lambda d: d.execute_script(WEEK_PRESSED_JS, week_number))
+        except TimeoutException:
+            print(f"  ⚠ La semaine {week_number} ne s'est pas activée")
+            return False
+
+        print(f"  → Navigation vers la semaine {week_number}")
+        self.current = week_number
+        self.readiness.wait_for_events_stable()
+        return True
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules ade_*.py à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
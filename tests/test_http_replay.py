@@ -0,0 +1,117 @@
+"""
+Backend HTTP contre un serveur local: une exécution enregistrée puis rejouée (ade_replay.ReplayServer)
+donne les mêmes cours, sans accès au serveur d'origine.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from datetime import date, datetime
+from icalendar import Calendar, Event
+import threading
+import pytest
+import pytz
+import requests
+from ade_http import ADEHttpClient
+from ade_replay import ReplayServer
+
+PARIS_TZ = pytz.timezone('Europe/Paris')
+NAVIGATION_PATH = ["Groupes d'étudiants", "UFR Informatique", "M1 MIAGE FA-ALT"]
+RESOURCES = {'IMMGA1TD01': '101', 'IMMGA1CM01': '102'}
+START = date(2025, 11, 17)
+
+
+def export_calendar():
+    calendar = Calendar()
+    calendar.add('prodid', '-//ADE//FR')
+    calendar.add('version', '2.0')
+    for day, hour, summary, location, group in [
+            (18, 8, 'TD Bases de données', 'ME 201', 'IMMGA1TD01'),
+            (19, 13, 'CM Génie logiciel', 'AMPHI E MAURY', 'IMMGA1CM01'),
+            (26, 10, 'TD Réseaux', 'AR 104', 'IMMGA1TD01')]:
+        event = Event()
+        event.add('summary', summary)
+        event.add('dtstart', PARIS_TZ.localize(datetime(2025, 11, day, hour)))
+        event.add('dtend', PARIS_TZ.localize(datetime(2025, 11, day, hour + 2)))
+        event.add('location', location)
+        event.add('description', f"\n{group}\nDUPONT Marie\n(Exporté le:17/11/2025 05:00)\n")
+        calendar.add_component(event)
+    return calendar.to_ical()
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    """
+    Réponses minimales de la web API et de l'export iCal d'ADE
+    """
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self.server.requests.append(self.path)
+        if url.path == '/jsp/webapi':
+            function = params['function']
+            if function == 'connect':
+                body = '<session id="s1" />'
+            elif function == 'setProject':
+                body = f'<setProject projectId="{params["projectId"]}" sessionId="s1" />'
+            else:
+                name = params['name']
+                # Homonyme hors du chemin de navigation: écarté par resolve_resources
+                body = (f'<resources><resource id="9{RESOURCES[name]}" name="{name}" path="Enseignants" />'
+                        f'<resource id="{RESOURCES[name]}" name="{name}" path="{".".join(NAVIGATION_PATH)}" />'
+                        '</resources>')
+            payload, content_type = body.encode('utf-8'), 'text/xml; charset=utf-8'
+        elif url.path == '/jsp/custom/modules/plannings/anonymous_cal.jsp':
+            assert params['resources'] == '101,102'
+            payload, content_type = export_calendar(), 'text/calendar; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def origin():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), OriginHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(base_url, record_dir=None):
+    client = ADEHttpClient(base_url=base_url, record_dir=record_dir)
+    try:
+        return client.fetch_events(list(RESOURCES), NAVIGATION_PATH, weeks=2, start=START)
+    finally:
+        client.close()
+
+
+def test_recorded_run_replays_identically(origin, tmp_path):
+    host, port = origin.server_address[:2]
+    recorded = fetch(f"http://{host}:{port}", record_dir=str(tmp_path))
+    assert [event.summary for event in recorded] == ['TD Bases de données', 'CM Génie logiciel', 'TD Réseaux']
+    assert recorded[0].location == 'ME 201'
+    assert recorded[0].description == 'ME 201\nIMMGA1TD01\nDUPONT Marie'
+    origin_requests = len(origin.requests)
+
+    with ReplayServer(str(tmp_path)) as replay:
+        replayed = fetch(replay.base_url)
+
+    assert len(replay.requests) == origin_requests
+    assert len(origin.requests) == origin_requests
+    assert [(e.start, e.end, e.summary, e.location, e.description) for e in replayed] == \
+           [(e.start, e.end, e.summary, e.location, e.description) for e in recorded]
+
+
+def test_replay_without_recording_fails(tmp_path):
+    with ReplayServer(str(tmp_path)) as replay:
+        with pytest.raises(requests.HTTPError):
+            fetch(replay.base_url)
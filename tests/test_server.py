@@ -0,0 +1,118 @@
+"""
+Serveur local du flux iCal (ade_server): 200, 304 (If-None-Match, If-Modified-Since), gzip, filtres, 400 et 404
+"""
+from email.utils import formatdate
+from datetime import datetime
+import http.client
+import threading
+import gzip
+import pytest
+import pytz
+from ade_events import EventRecord, to_minutes
+from ade_server import FeedSource, create_server
+from ade_sync import publish_ics
+
+PARIS_TZ = pytz.timezone('Europe/Paris')
+COURSES = [
+    (17, 8, 'TD Bases de données', 'IMMGA1TD01'),
+    (18, 13, 'CM Génie logiciel', 'IMMGA1CM01'),
+    (25, 10, 'TD Réseaux', 'IMMGA1TD01'),
+]
+
+
+def course(day, hour, summary, group):
+    start = to_minutes(PARIS_TZ.localize(datetime(2025, 11, day, hour)))
+    return EventRecord(start, start + 120, summary, 'ME 201', f"ME 201\n{group}\nDUPONT Marie")
+
+
+@pytest.fixture
+def server(tmp_path):
+    ics_file = str(tmp_path / 'calendar.ics')
+    publish_ics([course(*args) for args in COURSES], ics_file, None, '-//test//FR', 'Test')
+    server = create_server(FeedSource(ics_file=ics_file, prodid='-//test//FR', calname='Test'), port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path, **headers):
+    host, port = server.server_address[:2]
+    conn = http.client.HTTPConnection(host, port, timeout=5)
+    try:
+        conn.request('GET', path, headers={name.replace('_', '-'): value for name, value in headers.items()})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def summaries(body):
+    return [line.split(':', 1)[1] for line in body.decode('utf-8').split('\r\n') if line.startswith('SUMMARY:')]
+
+
+def test_full_calendar(server):
+    status, headers, body = get(server, '/calendar.ics')
+    assert status == 200
+    assert headers['Content-Type'] == 'text/calendar; charset=utf-8'
+    assert int(headers['Content-Length']) == len(body)
+    assert headers['ETag'].startswith('"') and headers['Last-Modified']
+    assert body.startswith(b'BEGIN:VCALENDAR') and body.endswith(b'END:VCALENDAR\r\n')
+    assert summaries(body) == [summary for _, _, summary, _ in COURSES]
+
+
+def test_not_modified(server):
+    _, headers, _ = get(server, '/calendar.ics')
+    status, cached, body = get(server, '/calendar.ics', If_None_Match=headers['ETag'])
+    assert status == 304 and body == b'' and cached['ETag'] == headers['ETag']
+    # If-None-Match prime sur If-Modified-Since
+    assert get(server, '/calendar.ics', If_None_Match='"autre"', If_Modified_Since=headers['Last-Modified'])[0] == 200
+
+    assert get(server, '/calendar.ics', If_Modified_Since=headers['Last-Modified'])[0] == 304
+    assert get(server, '/calendar.ics', If_Modified_Since=formatdate(0, usegmt=True))[0] == 200
+
+
+def test_gzip(server):
+    _, _, plain = get(server, '/calendar.ics')
+    status, headers, body = get(server, '/calendar.ics', Accept_Encoding='gzip')
+    assert status == 200
+    assert headers['Content-Encoding'] == 'gzip' and headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(body) == plain
+
+
+def test_gzip_has_its_own_etag(server):
+    _, identity, _ = get(server, '/calendar.ics')
+    _, compressed, _ = get(server, '/calendar.ics', Accept_Encoding='gzip')
+    assert compressed['ETag'] != identity['ETag']
+    assert compressed['ETag'] == identity['ETag'][:-1] + '-gzip"'
+
+    status, headers, _ = get(server, '/calendar.ics', Accept_Encoding='gzip', If_None_Match=compressed['ETag'])
+    assert status == 304 and headers['ETag'] == compressed['ETag']
+    assert get(server, '/calendar.ics', If_None_Match=identity['ETag'])[0] == 304
+    # Le tag d'une représentation ne valide pas l'autre
+    assert get(server, '/calendar.ics', Accept_Encoding='gzip', If_None_Match=identity['ETag'])[0] == 200
+    assert get(server, '/calendar.ics', If_None_Match=compressed['ETag'])[0] == 200
+
+
+def test_filters(server):
+    _, full, _ = get(server, '/calendar.ics')
+    status, headers, body = get(server, '/calendar.ics?from=2025-11-18&to=2025-11-25')
+    assert status == 200 and summaries(body) == ['CM Génie logiciel']
+    assert headers['ETag'] != full['ETag']
+
+    _, _, body = get(server, '/calendar.ics?group=IMMGA1TD01')
+    assert summaries(body) == ['TD Bases de données', 'TD Réseaux']
+    _, _, body = get(server, '/calendar.ics?from=2025-11-18&group=IMMGA1TD01')
+    assert summaries(body) == ['TD Réseaux']
+
+    # 304 aussi pour un calendrier filtré
+    status, _, _ = get(server, '/calendar.ics?group=IMMGA1TD01',
+                       If_None_Match=get(server, '/calendar.ics?group=IMMGA1TD01')[1]['ETag'])
+    assert status == 304
+
+
+def test_errors(server):
+    assert get(server, '/calendar.ics?from=18/11/2025')[0] == 400
+    assert get(server, '/calendar.ics?to=2025-13-01')[0] == 400
+    assert get(server, '/index.html')[0] == 404
@@ -0,0 +1,71 @@
+"""
+Tranches précompressées (ade_shards): changement décidé par les SHA-256 des tranches par semaine et par mois,
+pas par les dates de la fenêtre des 14 prochains jours
+"""
+from datetime import date, datetime
+import hashlib
+import json
+import gzip
+import os
+import pytz
+from ade_events import EventRecord, to_minutes
+from ade_shards import MANIFEST_FILE, ROLLING_FILE, write_shards
+
+PARIS_TZ = pytz.timezone('Europe/Paris')
+TODAY = date(2025, 11, 17)
+
+
+def course(day, hour, summary):
+    start = to_minutes(PARIS_TZ.localize(datetime(2025, 11, day, hour)))
+    event = EventRecord(start, start + 120, summary, 'ME 201', "ME 201\nIMMGA1TD01")
+    event.uid, event.sequence, event.stamp = f"{day}-{hour}@edt-miage", 0, start
+    return event
+
+
+EVENTS = [course(18, 8, 'TD Bases de données'), course(20, 13, 'CM Génie logiciel'), course(26, 10, 'TD Réseaux')]
+
+
+def manifest(directory):
+    with open(os.path.join(directory, MANIFEST_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_every_file_has_a_hash(tmp_path):
+    assert write_shards(EVENTS, str(tmp_path), today=TODAY)
+    for entry in manifest(tmp_path)['files']:
+        with open(tmp_path / entry['path'], 'rb') as f:
+            data = f.read()
+        assert entry['sha256'] == hashlib.sha256(data).hexdigest()
+        for encoded in entry['encodings'].values():
+            with open(tmp_path / encoded['path'], 'rb') as f:
+                content = f.read()
+            assert encoded['sha256'] == hashlib.sha256(content).hexdigest()
+        assert gzip.decompress((tmp_path / entry['encodings']['gzip']['path']).read_bytes()) == data
+
+
+def test_next_day_is_not_a_change(tmp_path):
+    write_shards(EVENTS, str(tmp_path), today=TODAY)
+    rolling = (tmp_path / ROLLING_FILE).read_bytes()
+    assert not write_shards(EVENTS, str(tmp_path), today=date(2025, 11, 19))
+    # Fenêtre glissante rafraîchie quand même (le cours du 18 en est sorti)
+    assert (tmp_path / ROLLING_FILE).read_bytes() != rolling
+    assert manifest(tmp_path)['files'][0]['from'] == '2025-11-19'
+
+
+def test_changed_course_is_a_change(tmp_path):
+    write_shards(EVENTS, str(tmp_path), today=TODAY)
+    moved = EVENTS[:2] + [course(27, 10, 'TD Réseaux')]
+    assert write_shards(moved, str(tmp_path), today=TODAY)
+    assert not write_shards(moved, str(tmp_path), today=TODAY)
+
+
+def test_published_manifest_alone(tmp_path):
+    published = tmp_path / 'published'
+    write_shards(EVENTS, str(published), today=TODAY)
+    # Workflow: seul le manifeste publié est téléchargé
+    ci = tmp_path / 'ci'
+    ci.mkdir()
+    (ci / MANIFEST_FILE).write_bytes((published / MANIFEST_FILE).read_bytes())
+    assert not write_shards(EVENTS, str(ci), today=date(2025, 11, 18))
+    for entry in manifest(ci)['files']:
+        assert (ci / entry['path']).exists()